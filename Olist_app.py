@@ -1,10 +1,14 @@
+from __future__ import annotations
+
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import joblib
 import os
 
+# olist_profiling hanya memakai stdlib; dibutuhkan saat definisi fungsi (decorator span/cache)
+from olist_profiling import finish_trace, instrumented_cache, observe, span, start_trace, timed
+
+# pandas, plotly, model dan modul olist_* diimpor di dalam fungsi / halaman yang memakainya,
+# supaya cold start dan halaman Home tidak ikut memuat semuanya
+
 # =========================
 # CONFIG
 # =========================
@@ -16,15 +20,11 @@ st.set_page_config(
 
 DATA_PATH = "Olist_Dataset_Clustering.csv"
 MODEL_PATH = "rfm_kmeans_pipeline.pkl"
+# Panel profiling di sidebar hanya tampil jika OLIST_ADMIN=1
+ADMIN_PANEL = os.environ.get("OLIST_ADMIN") == "1"
 
-FEATURES = [
-    "recency",
-    "frequency",
-    "monetary",
-    "payment_installments",
-    "price",
-    "review_score"
-]
+# Trace timing per rerun; ditutup di akhir script (atau saat rerun berikutnya jika terhenti st.stop/st.rerun)
+trace = start_trace(st.session_state.get("menu", "Home"), st.session_state)
 
 # =========================
 # CSS
@@ -226,26 +226,31 @@ st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 # =========================
 # FUNCTION
 # =========================
-def title_case_cols(df: pd.DataFrame) -> pd.DataFrame:
+def title_case_cols(df: pd.DataFrame, copy=True) -> pd.DataFrame:
     new_cols = []
     for c in df.columns:
         c2 = str(c).replace("_", " ").strip()
         c2 = " ".join([w.capitalize() for w in c2.split()])
         new_cols.append(c2)
-    df2 = df.copy()
+    df2 = df.copy() if copy else df
     df2.columns = new_cols
     return df2
 
+@timed
 def clean_df(df: pd.DataFrame) -> pd.DataFrame:
+    import numpy as np
+
     df2 = df.copy()
     df2 = df2.replace([np.inf, -np.inf], np.nan)
     df2 = df2.dropna(how="all")
     df2 = df2.dropna(axis=1, how="all")
     return df2
 
+@timed
 def df_to_html_table(df: pd.DataFrame, max_rows=50):
-    df2 = clean_df(df).head(max_rows)
-    df2 = title_case_cols(df2)
+    # Potong dulu baru dibersihkan, jadi biayanya sebanding dengan baris yang tampil
+    df2 = clean_df(df.head(max_rows))
+    df2 = title_case_cols(df2, copy=False)
     return f"""
     <div class="table-scroll">
         {df2.to_html(index=False, escape=False)}
@@ -281,25 +286,348 @@ def plot_template():
         )
     )
 
+@timed
+def counts_frame(counts: dict, columns) -> pd.DataFrame:
+    import pandas as pd
+
+    return pd.DataFrame({columns[0]: counts["labels"], columns[1]: counts["values"]})
+
+@timed
+def plotly_chart(fig):
+    # Serialisasi figure ke JSON terjadi di sini
+    st.plotly_chart(fig, use_container_width=True)
+
 def title_case_col(c: str) -> str:
     c2 = str(c).replace("_", " ").strip()
     return " ".join([w.capitalize() for w in c2.split()])
 
-def make_download_csv(df: pd.DataFrame) -> bytes:
-    return df.to_csv(index=False).encode("utf-8")
+def segment_card(cluster):
+    # Karakteristik & strategi per cluster (definisi di olist_segments.SEGMENTS)
+    from olist_segments import SEGMENTS
+
+    segment = SEGMENTS.get(int(cluster))
+    if segment is None:
+        return
+    color = segment["color"]
+    retention = "\n".join(f"<li>{item}</li>" for item in segment["retention"])
+    campaign = "\n".join(f"<li>{item}</li>" for item in segment["campaign"])
+    st.markdown(f"""
+    <div style="background: rgba(255,255,255,0.05); padding: 20px; border-radius: 15px; border-left: 5px solid {color};">
+    <h4 style="margin-top:0; color:{color};">📋 Segment: {segment["name"]}</h4>
+    <p><b>Karakteristik:</b> {segment["characteristics"]}</p>
+    <p style="margin-bottom: 5px;"><b>Strategi Retention:</b></p>
+    <ul style="margin-bottom:0;">
+    {retention}
+    </ul>
+    <p style="margin-top: 20px; margin-bottom: 5px;"><b>Strategi Campaign:</b></p>
+    <ul style="margin-bottom:0;">
+    {campaign}
+    </ul>
+    </div>
+    """, unsafe_allow_html=True)
+
+CLUSTER_MAP_MODES = ("Densitas", "Sampel Titik")
+
+def png_data_uri(image) -> str:
+    import base64
+    import io
+
+    from PIL import Image
+
+    buf = io.BytesIO()
+    Image.fromarray(image).save(buf, format="PNG", optimize=True)
+    return "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+
+@timed
+def cluster_map_figure(cmap, mode, title):
+    # Yang dikirim ke browser: raster PNG ukuran tetap atau sampel per cluster (Scattergl), plus centroid
+    import numpy as np
+    import plotly.graph_objects as go
+
+    from olist_segments import SEGMENTS, segment_name
+
+    colors = [SEGMENTS.get(c, {}).get("color", "#cccccc") for c in range(cmap.n_clusters)]
+    x0, x1, y0, y1 = cmap.bounds
+    fig = go.Figure()
+    if mode == "Densitas":
+        # Baris 0 raster = y terkecil, baris 0 gambar = atas
+        fig.add_layout_image(source=png_data_uri(cmap.density_rgba(colors)[::-1]), xref="x", yref="y",
+                             x=x0, y=y1, sizex=x1 - x0, sizey=y1 - y0, sizing="stretch", layer="below")
+        for c in range(cmap.n_clusters):
+            fig.add_trace(go.Scattergl(x=[None], y=[None], mode="markers", marker=dict(color=colors[c], size=10),
+                                       name=f"Cluster {c} - {segment_name(c)} ({cmap.counts[c]:,})"))
+    else:
+        hover = "<br>".join(f"{title_case_col(f)}: %{{customdata[{j}]:,.2f}}" for j, f in enumerate(cmap.features))
+        for c in range(cmap.n_clusters):
+            sel = cmap.sample_cluster == c
+            fig.add_trace(go.Scattergl(
+                x=cmap.sample_xy[sel, 0], y=cmap.sample_xy[sel, 1], mode="markers",
+                marker=dict(color=colors[c], size=4, opacity=0.6), customdata=cmap.sample_values[sel],
+                name=f"Cluster {c} - {segment_name(c)} ({sel.sum():,} dari {cmap.counts[c]:,})",
+                hovertemplate=hover + "<extra>Cluster " + str(c) + "</extra>",
+            ))
+    # Centroid di luar jangkauan raster digambar di tepi (segitiga), posisi aslinya di hover
+    cx = np.clip(cmap.centroids_xy[:, 0], x0, x1)
+    cy = np.clip(cmap.centroids_xy[:, 1], y0, y1)
+    clipped = (cx != cmap.centroids_xy[:, 0]) | (cy != cmap.centroids_xy[:, 1])
+    fig.add_trace(go.Scattergl(
+        x=cx, y=cy, mode="markers+text", name="Centroid",
+        text=[f"C{c}" for c in range(cmap.n_clusters)], textposition="top center",
+        marker=dict(symbol=np.where(clipped, "triangle-up", "x").tolist(), size=14, color=colors,
+                    line=dict(color="#FFFFFF", width=2)),
+        customdata=cmap.centroids_xy,
+        hovertemplate="Centroid %{text}<br>PC1 %{customdata[0]:,.2f}, PC2 %{customdata[1]:,.2f}<extra></extra>",
+    ))
+    fig.update_layout(**plot_template())
+    fig.update_layout(title_text=title, height=560, legend_font_color="#FFFFFF")
+    fig.update_xaxes(title=f"PC1 ({cmap.explained[0]:.0%} varians)", range=[x0, x1])
+    fig.update_yaxes(title=f"PC2 ({cmap.explained[1]:.0%} varians)", range=[y0, y1])
+    return fig
+
+def cluster_map_section(cmap, key, title):
+    # Data kecil: sampel sudah memuat semua baris, jadi default tampil per titik
+    default = 1 if cmap.complete else 0
+    mode = st.radio("Tampilan", CLUSTER_MAP_MODES, index=default, horizontal=True, key=f"cluster_map_mode_{key}")
+    with span("clustermap.figure"):
+        fig = cluster_map_figure(cmap, mode, title)
+    plotly_chart(fig)
+    shown = len(cmap.sample_cluster) if mode != "Densitas" else cmap.rows - cmap.outside
+    st.caption(
+        f"PCA di ruang RobustScaler (data + centroid) • {cmap.rows:,} baris • "
+        + (f"raster {cmap.density.shape[1]}×{cmap.density.shape[2]}, {shown:,} baris di dalam jangkauan"
+           if mode == "Densitas" else f"{shown:,} titik (sampel acak per cluster)")
+        + (f" • {cmap.outside:,} baris di luar jangkauan (zoom out untuk sampelnya)" if cmap.outside else "")
+    )
 
+DOWNLOAD_FORMATS = {
+    "CSV": ("csv", "olist_cluster_results.csv", "text/csv"),
+    "CSV (gzip)": ("csv.gz", "olist_cluster_results.csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "olist_cluster_results.parquet", "application/octet-stream"),
+}
+
+@timed
+def download_result_section(path, columns, column_mapping, row_filter=None):
+    # File download baru dibuat saat diminta, lalu dipakai ulang (tidak di-encode ulang tiap rerun)
+    from olist_scoring import export_result
+
+    label = st.radio("Format Download", list(DOWNLOAD_FORMATS), horizontal=True, key="download_format")
+    fmt, file_name, mime = DOWNLOAD_FORMATS[label]
+    exports = st.session_state.setdefault("download_exports", {})
+    export_key = (path, fmt, row_filter)
+
+    if export_key not in exports or not os.path.exists(exports[export_key]):
+        if st.button("Siapkan File Download", use_container_width=True):
+            with st.spinner("Menyiapkan file..."):
+                exports[export_key] = export_result(path, fmt, columns, column_mapping, row_filter)
+            st.rerun()
+        return
+
+    with open(exports[export_key], "rb") as f:
+        st.download_button(
+            f"⬇️ Download Hasil {label}",
+            data=f,
+            file_name=file_name,
+            mime=mime,
+            use_container_width=True
+        )
+
+@timed
 def pretty_table(df: pd.DataFrame, max_rows=50):
     st.markdown(df_to_html_table(df, max_rows=max_rows), unsafe_allow_html=True)
 
-def validate_manual_input(recency, frequency, monetary, payment_installments, price, review_score):
-    errors = []
-    if recency < 0: errors.append("Recency tidak boleh negatif.")
-    if frequency <= 0: errors.append("Frequency minimal 1.")
-    if monetary < 0: errors.append("Monetary tidak boleh negatif.")
-    if payment_installments < 0: errors.append("Payment Installments tidak boleh negatif.")
-    if price < 0: errors.append("Price tidak boleh negatif.")
-    if review_score < 1 or review_score > 5: errors.append("Review Score harus antara 1 sampai 5.")
-    return errors
+def result_handle(path, key):
+    # Handle sesi ke result store bersama (satu per tabel); handle lama dilepas saat tabel pindah ke file lain
+    handles = st.session_state.setdefault("result_handles", {})
+    handle = handles.get(key)
+    if handle is None or handle.path != path or not handle.is_current():
+        if handle is not None:
+            handle.release()
+        handle = handles[key] = get_result_store().acquire(path)
+    return handle
+
+@timed
+def paginated_result_table(path, columns, column_mapping, key, row_filter=None):
+    # Pagination & sorting di server: file hasil dibuka sekali per proses (mmap), tiap interaksi hanya
+    # menyalin satu halaman; urutan sort dihitung sekali dan dipakai bersama semua sesi
+    from olist_scoring import integer_features
+
+    handle = result_handle(path, key)
+    total = handle.count(row_filter)
+    c1, c2, c3, c4 = st.columns([2, 1, 2, 1], gap="medium")
+    with c1:
+        page_size = st.slider("Pilih Jumlah Baris yang Ingin Ditampilkan", 5, 100, 10, step=5, key=f"slider_{key}")
+    n_pages = max(1, -(-total // page_size))
+    if st.session_state.get(f"page_{key}", 1) > n_pages:
+        st.session_state[f"page_{key}"] = n_pages
+    with c2:
+        page = st.number_input("Halaman", 1, n_pages, 1, key=f"page_{key}")
+    with c3:
+        sort_col = st.selectbox("Urutkan Berdasarkan", [None] + columns, key=f"sort_{key}",
+                                format_func=lambda c: "-" if c is None else column_mapping.get(c, c))
+    with c4:
+        ascending = st.radio("Arah", ["Naik", "Turun"], horizontal=True, key=f"order_{key}") == "Naik"
+
+    start = (page - 1) * page_size
+    page_df = handle.rows(start, start + page_size, columns=columns, sort=sort_col, ascending=ascending,
+                          row_filter=row_filter)
+    # Feature yang semua nilainya bulat tampil tanpa ".0" (sama dengan file download)
+    integers = [c for c in integer_features(path) if c in page_df.columns]
+    page_df[integers] = page_df[integers].astype("int64")
+    pretty_table(page_df.rename(columns=column_mapping).fillna("-"), max_rows=page_size)
+    st.caption(f"Baris {min(start + 1, total):,}–{min(start + page_size, total):,} dari {total:,}")
+
+@timed
+def validation_section(path):
+    # Baris yang gagal validasi skema tidak diprediksi; ringkasannya dibaca dari laporan di samping file hasil
+    from olist_scoring import quarantine_path, read_result_head, validation_report_path
+    from olist_validation import load_validation_report
+
+    report = load_validation_report(validation_report_path(path))
+    if report is None or not report.quarantined_rows:
+        return
+    st.warning(f"{report.quarantined_rows:,} dari {report.rows:,} baris tidak valid dan tidak diprediksi (dikarantina).")
+    with st.expander("Detail Validasi"):
+        pretty_table(report.summary().rename(columns={
+            "feature": "Feature", "rule": "Rule", "rows": "Jumlah Baris", "sample_rows": "Contoh Baris"
+        }))
+        if os.path.exists(quarantine_path(path)):
+            st.caption("Contoh baris yang dikarantina (nomor baris dihitung dari 0, tanpa header):")
+            pretty_table(read_result_head(quarantine_path(path), 20), max_rows=20)
+
+@timed
+def drift_section(path):
+    # Perbandingan distribusi batch upload vs dataset training (PSI/KS), dihitung saat prediksi
+    import pandas as pd
+
+    from olist_drift import PSI_ALERT, load_drift_report
+    from olist_scoring import drift_report_path
+
+    report = load_drift_report(drift_report_path(path))
+    if report is None:
+        return
+    drifted = [name for name, score in report["scores"].items() if score["psi"] >= PSI_ALERT]
+    ood = f"{report['ood_share']:.1%} baris jauh dari centroid (referensi {report['expected_ood_share']:.0%})"
+    if drifted:
+        names = ", ".join(title_case_col(n) for n in drifted)
+        st.warning(f"Distribusi data upload berbeda dari data training pada: {names}. {ood}.")
+    with st.expander("Monitoring Drift (vs Data Training)"):
+        rows = [
+            {"Feature": title_case_col(name),
+             "PSI": round(score["psi"], 3), "KS": round(score["ks"], 3), "Status": score["level"].title()}
+            for name, score in report["scores"].items()
+        ]
+        pretty_table(pd.DataFrame(rows))
+        st.caption(f"{ood}. PSI < 0.1 stabil, 0.1–0.25 bergeser, ≥ 0.25 drift.")
+
+@timed
+def customer_lookup_section(path, column_mapping):
+    # Cari satu customer lewat index di samping file hasil (binary search di memmap, file hasil tidak dibaca)
+    import time
+
+    from olist_index import ID_COLUMN, build_customer_index, load_customer_index
+    from olist_scoring import FEATURES, OUTPUT_COLUMNS, result_columns
+    from olist_segments import segment_name
+
+    if ID_COLUMN not in result_columns(path):
+        return
+    customer_id = st.text_input("🔎 Cari Customer ID", key="lookup_customer_id",
+                                placeholder="customer_unique_id").strip()
+    if not customer_id:
+        return
+    index = load_customer_index(path)
+    if index is None:
+        # Hasil lama di cache prediksi belum punya index: dibangun sekali dari file hasil
+        with st.spinner("Membangun index customer..."):
+            build_customer_index(path, FEATURES + list(OUTPUT_COLUMNS))
+        index = load_customer_index(path)
+
+    t0 = time.perf_counter()
+    found = index.lookup(customer_id)
+    elapsed = time.perf_counter() - t0
+    if found.empty:
+        st.warning(f"Customer {customer_id} tidak ditemukan di hasil prediksi.")
+    else:
+        segments = ", ".join(f"Cluster {c} ({segment_name(c)})" for c in sorted(set(found["cluster"])))
+        st.success(f"Customer {customer_id}: {segments}")
+        pretty_table(found.drop(columns="row").rename(columns=column_mapping), max_rows=len(found))
+    st.caption(f"Lookup {elapsed * 1e3:,.1f} ms dari {len(index):,} baris")
+
+@timed
+def result_filter_section(path, key):
+    # Filter berdasarkan skor per baris; dikembalikan sebagai spesifikasi filter (mask di atas file hasil yang
+    # sama untuk tabel & download), bukan file baru per kombinasi filter
+    import math
+
+    from olist_scoring import result_column_range, result_columns, result_filter
+
+    if "cluster_confidence" not in result_columns(path):
+        return None
+    lo, hi = result_column_range(path, "cluster")
+    if lo is None:
+        return None
+    max_dist = float(math.ceil(result_column_range(path, "cluster_distance")[1] or 0.0)) or 1.0
+
+    c1, c2, c3 = st.columns(3, gap="medium")
+    with c1:
+        options = list(range(lo, hi + 1))
+        clusters = st.multiselect("Filter Cluster", options, default=options, key=f"filter_cluster_{key}")
+    with c2:
+        min_conf = st.slider("Confidence Minimum", 0.0, 1.0, 0.0, step=0.05, key=f"filter_conf_{key}")
+    with c3:
+        max_distance = st.slider("Distance To Centroid Maksimum", 0.0, max_dist, max_dist, step=max_dist / 100,
+                                 key=f"filter_dist_{key}")
+
+    st.caption("Confidence = keyakinan soft assignment (1/k sampai 1); Margin = selisih jarak ke centroid "
+               "terdekat kedua. Semakin besar keduanya, semakin jelas customer masuk cluster tersebut.")
+    return result_filter(
+        clusters=None if set(clusters) == set(options) else clusters,
+        min_confidence=min_conf or None,
+        max_distance=None if max_distance >= max_dist else max_distance,
+    )
+
+def profiling_panel(trace):
+    # Panel admin: trace rerun ini, hit/miss cache dan span terberat sejak proses mulai
+    import sys
+
+    import pandas as pd
+
+    from olist_profiling import METRICS
+
+    with st.sidebar.expander("🛠️ Profiling"):
+        memory = trace.memory_end or {}
+        info = [f"Rerun {trace.label}: {trace.seconds * 1e3:,.0f} ms"]
+        if memory.get("rss") is not None:
+            delta = memory["rss"] - (trace.memory_start.get("rss") or memory["rss"])
+            info.append(f"RSS {memory['rss'] / 1e6:,.0f} MB ({delta / 1e6:+,.1f} MB)")
+        if memory.get("peak_rss") is not None:
+            info.append(f"peak {memory['peak_rss'] / 1e6:,.0f} MB")
+        if "olist_store" in sys.modules:
+            # Hanya jika store sudah dipakai; panel tidak memuat pyarrow di halaman lain
+            store = get_result_store().stats()
+            info.append(f"Result store: {store['entries']} file, {store['handles']} handle, "
+                        f"{store['mapped_bytes'] / 1e6:,.0f} MB mmap")
+        st.caption(" • ".join(info))
+
+        spans = pd.DataFrame([
+            {"Span": "· " * depth + name, "Waktu (ms)": round(seconds * 1e3, 1)}
+            for name, depth, _, seconds in trace.spans if seconds is not None
+        ], columns=["Span", "Waktu (ms)"])
+        pretty_table(spans, max_rows=len(spans))
+
+        cache = pd.DataFrame([
+            {"Cache": name, "Hit": c["hits"], "Miss": c["misses"]} for name, c in METRICS.cache_stats().items()
+        ], columns=["Cache", "Hit", "Miss"])
+        pretty_table(cache, max_rows=len(cache))
+
+        top = sorted(METRICS.span_stats().items(), key=lambda kv: kv[1]["total"], reverse=True)[:15]
+        pretty_table(pd.DataFrame([
+            {"Span": name, "Calls": s["count"], "Total (ms)": round(s["total"] * 1e3, 1),
+             "Max (ms)": round(s["max"] * 1e3, 1)}
+            for name, s in top
+        ], columns=["Span", "Calls", "Total (ms)", "Max (ms)"]), max_rows=15)
+
+        if st.button("Reset Metrik", key="profiling_reset", use_container_width=True):
+            METRICS.reset()
 
 def soft_divider():
     st.markdown("<div class='soft-line'></div>", unsafe_allow_html=True)
@@ -307,19 +635,157 @@ def soft_divider():
 # =========================
 # LOAD DATA + MODEL
 # =========================
-@st.cache_data
-def load_data(path):
-    return pd.read_csv(path)
-
-@st.cache_resource
-def load_model(path):
-    return joblib.load(path)
-
-# Error handling jika file tidak ada
-try:
-    df = load_data(DATA_PATH)
-    pipeline = load_model(MODEL_PATH)
-except:
+# Dataset dibaca dari Parquet (dikonversi sekali dari CSV), hanya kolom yang dibutuhkan halaman
+@instrumented_cache(st.cache_data)
+def load_preview(path, mtime, n):
+    from olist_data import read_head
+
+    return read_head(path, n)
+
+# Statistik dihitung sekali per versi dataset; jika CSV hanya bertambah baris, hanya delta yang diproses
+@instrumented_cache(st.cache_data)
+def load_stats(path, mtime):
+    from olist_scoring import FEATURES
+    from olist_stats import load_describe_state
+
+    return load_describe_state(path, FEATURES).describe()
+
+# Pool job prediksi dipakai bersama semua sesi; jumlah worker lewat env OLIST_JOB_WORKERS
+@instrumented_cache(st.cache_resource)
+def get_job_manager():
+    from olist_jobs import JobManager
+
+    return JobManager()
+
+@st.fragment(run_every=1.0)
+@timed
+def prediction_job_panel(job_id):
+    from olist_jobs import ACTIVE_STATES
+
+    manager = get_job_manager()
+    status = manager.status(job_id)
+    if status["state"] in ACTIVE_STATES:
+        rows = status.get("rows_done", 0)
+        elapsed = status.get("elapsed") or 0
+        rate = rows / elapsed if elapsed > 0 else 0
+        frac = min(status.get("bytes_done", 0) / status["bytes_total"], 1.0) if status.get("bytes_total") else 0.0
+        label = "Menunggu antrian..." if status["state"] == "queued" else f"{rows:,} baris diproses • {rate:,.0f} baris/detik"
+        st.progress(frac, text=f"Job {job_id}: {label}")
+        if st.button("Cancel Prediction", key=f"cancel_{job_id}", use_container_width=True):
+            manager.cancel(job_id)
+        return
+
+    # Job selesai: simpan hasil di session lalu render ulang seluruh halaman
+    st.session_state.prediction_job = None
+    if status.get("started") and status.get("finished"):
+        # Job jalan di proses worker; durasinya dicatat di sini supaya ikut di metrik
+        observe("prediction_job.queue", status["started"] - status["submitted"])
+        observe(f"prediction_job.{status['state']}", status["finished"] - status["started"])
+    if status["state"] == "done":
+        get_prediction_cache().evict(keep=status["result_path"])
+        st.session_state.hasil_prediksi_path = status["result_path"]
+    elif status["state"] == "cancelled":
+        st.session_state.prediction_job_message = ("warning", "Prediksi dibatalkan.")
+    else:
+        st.session_state.prediction_job_message = ("error", f"Gagal prediksi: {status.get('error')}")
+    st.rerun()
+
+# Profil referensi drift dihitung sekali per (dataset, model); None jika dataset tidak tersedia
+@instrumented_cache(st.cache_data)
+def reference_profile_path(path, mtime, model_version):
+    from olist_drift import ensure_reference_profile
+    from olist_scoring import FEATURES
+
+    try:
+        return ensure_reference_profile(path, MODEL_PATH, FEATURES)
+    except (FileNotFoundError, OSError):
+        return None
+
+# Result store dipakai bersama semua sesi: memori per dataset hasil, bukan per sesi
+@instrumented_cache(st.cache_resource)
+def get_result_store():
+    from olist_store import ResultStore
+
+    return ResultStore()
+
+@instrumented_cache(st.cache_resource)
+def get_prediction_cache():
+    from olist_scoring import PredictionCache
+
+    return PredictionCache()
+
+def active_model_key(path=MODEL_PATH) -> str:
+    # Berubah saat olist_refresh.py mempublikasikan versi model baru; cache model ikut pindah tanpa restart
+    from olist_model import model_key
+
+    key = model_key(path)
+    previous = st.session_state.get("model_key")
+    if previous is not None and previous != key:
+        st.toast(f"Model diperbarui ke {key.split(':')[0]}")
+    st.session_state.model_key = key
+    return key
+
+@instrumented_cache(st.cache_data)
+def model_version(path, key):
+    from olist_data import file_fingerprint
+    from olist_model import model_artifact_path
+
+    return file_fingerprint(model_artifact_path(path))
+
+@timed
+def upload_digest(uploaded) -> str:
+    # Hash isi upload cukup dihitung sekali per file (file_id berubah tiap upload)
+    digests = st.session_state.setdefault("upload_digests", {})
+    file_id = getattr(uploaded, "file_id", uploaded.name)
+    if file_id not in digests:
+        from olist_scoring import content_digest
+
+        digests.clear()
+        digests[file_id] = content_digest(uploaded.getbuffer())
+    return digests[file_id]
+
+# mtime ikut jadi key cache supaya dataset baru memicu pengecekan hash isi file
+@instrumented_cache(st.cache_data)
+def load_eda(path, mtime):
+    from olist_data import load_eda_aggregates
+    from olist_scoring import FEATURES
+
+    return load_eda_aggregates(path, FEATURES)
+
+# Cube segmen dibangun sekali per versi dataset & model (disimpan di .olist_cache), dipakai bersama semua sesi
+@instrumented_cache(st.cache_resource)
+def load_segment_cube(path, mtime, model_path, model_version):
+    import olist_segments
+    from olist_scoring import FEATURES
+
+    return olist_segments.load_segment_cube(path, model_path, FEATURES)
+
+@instrumented_cache(st.cache_resource)
+def load_cluster_map(path, mtime, model_path, model_version):
+    import olist_clustermap
+    from olist_scoring import FEATURES
+
+    return olist_clustermap.load_cluster_map(path, model_path, FEATURES)
+
+# Peta cluster file hasil disimpan di samping file hasil (ikut terhapus bersama hasilnya)
+@instrumented_cache(st.cache_resource(max_entries=8))
+def load_result_cluster_map(path, mtime, model_key):
+    import olist_clustermap
+    from olist_scoring import FEATURES
+
+    model = load_model(MODEL_PATH, model_key)
+    return olist_clustermap.load_result_cluster_map(path, model, FEATURES, model_key)
+
+# Satu versi lama disimpan supaya sesi yang sedang rerun saat versi baru dipublikasikan tidak memuat ulang
+@instrumented_cache(st.cache_resource(max_entries=2))
+def load_model(path, key):
+    # Versi aktif hasil refresh, artifact slim (.npz), atau pipeline .pkl yang dikompilasi ke predictor NumPy
+    from olist_model import load_model_artifact
+
+    return load_model_artifact(path)
+
+# Error handling jika file tidak ada; dataset & model baru dibaca di halaman yang memakainya
+if not (os.path.exists(DATA_PATH) and os.path.exists(MODEL_PATH)):
     st.warning("Pastikan file dataset dan model tersedia di direktori.")
 
 # =========================
@@ -343,6 +809,7 @@ st.sidebar.markdown("<div class='menu-wrap'>", unsafe_allow_html=True)
 menu_btn("🏠  Home", "Home")
 menu_btn("📋  Data Preview & Statistik", "Data Preview & Statistik")
 menu_btn("📊 Exploratory Data Analysis", "EDA")
+menu_btn("📈  Analitik Segmen", "Analitik Segmen")
 menu_btn("🧠  Prediksi Cluster", "Prediksi Cluster")
 st.sidebar.markdown("</div>", unsafe_allow_html=True)
 
@@ -363,95 +830,193 @@ if "Home" in menu:
 elif menu == "Data Preview & Statistik":
     st.subheader("📋 Data Preview")
     n = st.slider("Jumlah Baris Preview", 5, 100, 10, step=5)
-    pretty_table(df, max_rows=n)
+    pretty_table(load_preview(DATA_PATH, os.path.getmtime(DATA_PATH), n), max_rows=n)
     st.markdown("---")
     st.subheader("📌 Statistik Deskriptif")
-    stats = df[FEATURES].describe().T.reset_index().rename(columns={"index": "Feature"})
+    stats = load_stats(DATA_PATH, os.path.getmtime(DATA_PATH)).reset_index().rename(columns={"index": "Feature"})
     pretty_table(stats)
 
 elif menu == "EDA":
+    import plotly.express as px
+
+    from olist_charts import binned_histogram_figure, histogram_y_title
+    from olist_data import SKEWED_FEATURES
+    from olist_scoring import FEATURES
+
     st.subheader("📊 Exploratory Data Analysis (EDA)")
 
+    # Counts & histogram diambil dari agregat yang dihitung sekali per versi dataset
+    eda = load_eda(DATA_PATH, os.path.getmtime(DATA_PATH))
+
     # 1. Payment Method
-    if "payment_type" in df.columns:
-        tmp = df["payment_type"].value_counts().reset_index()
-        tmp.columns = ["Payment Type", "Count"]
+    if "payment_type" in eda["counts"]:
+        with span("eda.payment_type.figure"):
+            tmp = counts_frame(eda["counts"]["payment_type"], ["Payment Type", "Count"])
         
-        fig = px.pie(tmp, names="Payment Type", values="Count", 
-                     title="Payment Method Distribution", 
-                     hole=0.4)
+            fig = px.pie(tmp, names="Payment Type", values="Count", 
+                         title="Payment Method Distribution", 
+                         hole=0.4)
         
-        fig.update_traces(
-            textposition='outside', 
-            textinfo='percent+label',
-            marker=dict(line=dict(color='#FFFFFF', width=1))
-        )
+            fig.update_traces(
+                textposition='outside', 
+                textinfo='percent+label',
+                marker=dict(line=dict(color='#FFFFFF', width=1))
+            )
         
-        fig.update_layout(**plot_template())
+            fig.update_layout(**plot_template())
         
-        fig.update_layout(
-            legend_font_color="#FFFFFF",
-            legend_title_font_color="#FFFFFF"
-        )
+            fig.update_layout(
+                legend_font_color="#FFFFFF",
+                legend_title_font_color="#FFFFFF"
+            )
         
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig)
     
     st.markdown("---")
 
     # 2. Top 5 Customer States
-    if "customer_state" in df.columns:
-        tmp = df["customer_state"].value_counts().head(5).reset_index()
-        tmp.columns = ["Customer State", "Total Orders"]
-        fig = px.bar(tmp, x="Customer State", y="Total Orders", 
-                     title="Top 5 Customer State by Orders", color="Total Orders", 
-                     color_continuous_scale="Blues")
-        fig.update_layout(**plot_template())
-        fig.update_coloraxes(colorbar_tickfont_color="#FFFFFF", colorbar_title_font_color="#FFFFFF")
-        st.plotly_chart(fig, use_container_width=True)
+    if "customer_state" in eda["counts"]:
+        with span("eda.customer_state.figure"):
+            tmp = counts_frame(eda["counts"]["customer_state"], ["Customer State", "Total Orders"])
+            fig = px.bar(tmp, x="Customer State", y="Total Orders", 
+                         title="Top 5 Customer State by Orders", color="Total Orders", 
+                         color_continuous_scale="Blues")
+            fig.update_layout(**plot_template())
+            fig.update_coloraxes(colorbar_tickfont_color="#FFFFFF", colorbar_title_font_color="#FFFFFF")
+        plotly_chart(fig)
 
     st.markdown("---")
 
     # 3. Top 10 Product Categories
-    if "product_category_name_english" in df.columns:
-        # 1. Mengambil top 10 category
-        tmp = df["product_category_name_english"].value_counts().head(10).reset_index()
-        tmp.columns = ["Product Category", "Total Orders"]
+    if "product_category_name_english" in eda["counts"]:
+        with span("eda.product_category.figure"):
+            # 1. Mengambil top 10 category
+            tmp = counts_frame(eda["counts"]["product_category_name_english"], ["Product Category", "Total Orders"])
         
-        # 2. Mengurutkan dataframe dari terkecil ke terbesar 
-        tmp = tmp.sort_values(by="Total Orders", ascending=True) 
-
-        fig = px.bar(tmp, x="Total Orders", y="Product Category", 
-                     orientation='h', 
-                     title="Top 10 Product Categories by Orders", 
-                     color="Total Orders", 
-                     color_continuous_scale="Viridis")
+            # 2. Mengurutkan dataframe dari terkecil ke terbesar 
+            tmp = tmp.sort_values(by="Total Orders", ascending=True) 
+
+            fig = px.bar(tmp, x="Total Orders", y="Product Category", 
+                         orientation='h', 
+                         title="Top 10 Product Categories by Orders", 
+                         color="Total Orders", 
+                         color_continuous_scale="Viridis")
         
-        fig.update_layout(**plot_template())
-        fig.update_coloraxes(colorbar_tickfont_color="#FFFFFF", colorbar_title_font_color="#FFFFFF")
+            fig.update_layout(**plot_template())
+            fig.update_coloraxes(colorbar_tickfont_color="#FFFFFF", colorbar_title_font_color="#FFFFFF")
         
-        fig.update_xaxes(linecolor='#FFFFFF', showline=True)
-        fig.update_yaxes(linecolor='#FFFFFF', showline=True, categoryorder='total ascending')
+            fig.update_xaxes(linecolor='#FFFFFF', showline=True)
+            fig.update_yaxes(linecolor='#FFFFFF', showline=True, categoryorder='total ascending')
         
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig)
 
     st.markdown("---")
 
     # 4. Histogram Feature
     st.subheader("Histogram Feature")
     feature = st.selectbox("Pilih Feature untuk Melihat Distribusinya", FEATURES, index=0)
+
+    # Feature yang skewed bisa dilihat dengan bin log atau quantile
+    scale = "linear"
+    if feature in SKEWED_FEATURES:
+        scale = st.radio("Skala Bin", ["linear", "log", "quantile"], horizontal=True)
+    hist = eda["histograms"][feature][scale]
+
+    with span("eda.histogram.figure"):
+        # Bin dihitung di server, browser hanya menerima 40 bar
+        fig = binned_histogram_figure(hist, title=f"Distribusi {feature.replace('_',' ').title()}")
     
-    fig = px.histogram(df, x=feature, nbins=40, 
-                       title=f"Distribusi {feature.replace('_',' ').title()}",
-                       color_discrete_sequence=["#4facfe"])
-    
-    fig.update_layout(**plot_template())
+        fig.update_layout(**plot_template())
     
-    fig.update_xaxes(title_text=feature.replace('_', ' ').title(), linecolor='#FFFFFF', showline=True, mirror=True)
-    fig.update_yaxes(title_text="Count", linecolor='#FFFFFF', showline=True, mirror=True)
+        fig.update_xaxes(title_text=feature.replace('_', ' ').title(), linecolor='#FFFFFF', showline=True, mirror=True)
+        fig.update_yaxes(title_text=histogram_y_title(hist), linecolor='#FFFFFF', showline=True, mirror=True)
     
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig)
+
+elif menu == "Analitik Segmen":
+    import time
+
+    import pandas as pd
+    import plotly.express as px
+
+    from olist_segments import SEGMENTS, segment_name
+
+    st.subheader("📈 Analitik Segmen")
+    st.caption("Profil tiap cluster pada dataset, bisa difilter per state, kategori produk dan metode pembayaran.")
+
+    with st.spinner("Menyiapkan segment cube (sekali per versi dataset & model)..."):
+        cube = load_segment_cube(DATA_PATH, os.path.getmtime(DATA_PATH), MODEL_PATH,
+                                 model_version(MODEL_PATH, active_model_key()))
+
+    # Filter -> sel cube yang cocok dijumlahkan (tanpa groupby atas data mentah)
+    dimension_labels = {
+        "customer_state": "Customer State",
+        "product_category_name_english": "Product Category",
+        "payment_type": "Payment Type",
+    }
+    dimensions = [d for d in dimension_labels if d in cube.levels]
+    filters = {}
+    for col, dim in zip(st.columns(max(len(dimensions), 1)), dimensions):
+        with col:
+            filters[dim] = st.multiselect(dimension_labels[dim], cube.levels[dim], key=f"segment_filter_{dim}")
+
+    t0 = time.perf_counter()
+    with span("segments.query"):
+        profile = cube.group("cluster", filters)
+    elapsed = time.perf_counter() - t0
+
+    if profile.empty:
+        st.warning("Tidak ada customer yang cocok dengan filter.")
+        st.stop()
+
+    # 1. Ringkasan per cluster
+    for col, row in zip(st.columns(len(profile)), profile.itertuples(index=False)):
+        with col:
+            st.metric(f"Cluster {row.cluster}", f"{row.count:,}")
+            st.caption(f"{segment_name(row.cluster)} • {row.share:.1%} customer")
+
+    # 2. Profil feature (mean & median per cluster)
+    st.markdown("---")
+    st.subheader("Profil Feature per Cluster")
+    table = pd.DataFrame({"Feature": [title_case_col(f) for f in cube.features]})
+    for row in profile.to_dict("records"):
+        table[f"Cluster {row['cluster']} Mean"] = [row[f"mean_{f}"] for f in cube.features]
+        table[f"Cluster {row['cluster']} Median"] = [row[f"p50_{f}"] for f in cube.features]
+    pretty_table(table.round(2))
+
+    # 3. Komposisi cluster per dimensi
+    st.markdown("---")
+    if dimensions:
+        breakdown = st.selectbox("Rincian Cluster per", dimensions, format_func=dimension_labels.get)
+        with span("segments.breakdown.figure"):
+            counts = cube.crosstab(breakdown, "cluster", filters)
+            counts = counts.loc[counts.sum(axis=1).sort_values(ascending=False).index[:15]]
+            tmp = counts.reset_index(names=dimension_labels[breakdown]).melt(
+                id_vars=dimension_labels[breakdown], var_name="Cluster", value_name="Total Customers")
+            tmp["Cluster"] = [f"Cluster {c} - {segment_name(c)}" for c in tmp["Cluster"]]
+            colors = {f"Cluster {c} - {s['name']}": s["color"] for c, s in SEGMENTS.items()}
+            fig = px.bar(tmp, x=dimension_labels[breakdown], y="Total Customers", color="Cluster",
+                         color_discrete_map=colors,
+                         title=f"Komposisi Cluster per {dimension_labels[breakdown]} (Top 15)")
+            fig.update_layout(**plot_template())
+            fig.update_layout(legend_font_color="#FFFFFF", legend_title_font_color="#FFFFFF")
+        plotly_chart(fig)
+
+    st.caption(f"Query cube {elapsed * 1e3:,.1f} ms • {cube.n_cells:,} sel dari {cube.rows:,} baris dataset")
+
+    # 4. Posisi customer terhadap centroid (seluruh dataset, tanpa filter)
+    st.markdown("---")
+    st.subheader("Peta Cluster (PCA)")
+    with st.spinner("Menyiapkan peta cluster (sekali per versi dataset & model)..."):
+        cmap = load_cluster_map(DATA_PATH, os.path.getmtime(DATA_PATH), MODEL_PATH,
+                                model_version(MODEL_PATH, active_model_key()))
+    cluster_map_section(cmap, "segments", "Sebaran Customer terhadap Centroid")
 
 elif menu == "Prediksi Cluster":
+    import pandas as pd
+
+    from olist_scoring import FEATURES, result_columns, result_num_rows, validate_manual_input
+
     st.subheader("🎯 Prediksi Cluster")
     st.caption("Pilih manual input atau upload CSV untuk memprediksi cluster customer.")
     st.write("")
@@ -487,7 +1052,13 @@ elif menu == "Prediksi Cluster":
                 }])
                 
                 # 2. Melakukan Prediksi
-                cluster = pipeline.predict(X)[0]
+                try:
+                    pipeline = load_model(MODEL_PATH, active_model_key())
+                except Exception as e:
+                    st.error(f"Gagal memuat model. Error: {e}")
+                    st.stop()
+                with span("predict.manual"):
+                    cluster = pipeline.predict(X)[0]
                 
                 # 3. Menampilkan Hasil
                 st.markdown(f'''
@@ -507,65 +1078,7 @@ elif menu == "Prediksi Cluster":
                 # 4. Menambahkan keterangan di bawah hasil prediksi
                 st.write("")
                 
-                if cluster == 0:
-                    st.markdown(f"""
-                    <div style="background: rgba(255,255,255,0.05); padding: 20px; border-radius: 15px; border-left: 5px solid #4facfe;">
-                        <h4 style="margin-top:0; color:#4facfe;">📋 Segment: Satisfied & Low-Spend Buyers</h4>
-                        <p><b>Karakteristik:</b> Pelanggan dengan nilai transaksi kecil, harga produk rendah, penggunaan cicilan rendah, namun memiliki review score tinggi. Didominasi pembelian produk kategori kebutuhan rumah.</p>
-                        <p style="margin-bottom: 5px;"><b>Strategi Retention:</b></p>
-                        <ul style="margin-bottom:0;">
-                            <li>Loyalty points untuk pembelian berulang.</li>
-                            <li>Gratis ongkir dengan minimum spend rendah-menengah.</li>
-                            <li>Reminder campaign untuk repeat purchase.</li>
-                        </ul>
-                        <p style="margin-top: 20px; margin-bottom: 5px;"><b>Strategi Campaign:</b></p>
-                        <ul style="margin-bottom:0;">
-                            <li>Bundle produk kebutuhan rumah.</li>
-                            <li>Cross-selling produk pelengkap rumah tangga.</li>
-                            <li>Flash sale ringan untuk dorong impulse buying.</li>
-                        </ul>
-                    </div>
-                    """, unsafe_allow_html=True)
-
-                elif cluster == 1:
-                    st.markdown(f"""
-                    <div style="background: rgba(255,255,255,0.05); padding: 20px; border-radius: 15px; border-left: 5px solid #ff4b4b;">
-                        <h4 style="margin-top:0; color:#ff4b4b;">📋 Segment: High-Spend At-Risk Buyers</h4>
-                        <p><b>Karakteristik:</b> High spender dengan frekuensi rendah, review score rendah, dan dominasi kategori furniture kantor. Segmen bernilai tinggi namun berisiko churn.</p>
-                        <p style="margin-bottom: 5px;"><b>Strategi Retention:</b></p>
-                        <ul style="margin-bottom:0;">
-                            <li>Priority customer service.</li>
-                            <li>Proactive follow-up setelah pembelian besar.</li>
-                            <li>Service recovery untuk review rendah.</li>
-                        </ul>
-                        <p style="margin-top: 20px; margin-bottom: 5px;"><b>Strategi Campaign:</b></p>
-                        <ul style="margin-bottom:0;">
-                            <li>Penawaran eksklusif furniture kantor.</li>
-                            <li>Extended warranty / free installation.</li>
-                            <li>Voucher kompensasi untuk pengalaman negatif.</li>
-                        </ul>
-                    </div>
-                    """, unsafe_allow_html=True)
-
-                elif cluster == 2:
-                    st.markdown(f"""
-                    <div style="background: rgba(255,255,255,0.05); padding: 20px; border-radius: 15px; border-left: 5px solid #faca2e;">
-                        <h4 style="margin-top:0; color:#faca2e;">📋 Segment: Premium Installment Buyers</h4>
-                        <p><b>Karakteristik:</b> Pembeli produk premium dengan harga tinggi dan penggunaan cicilan tinggi. Frekuensi rendah, nilai transaksi besar, dan review score cukup tinggi namun bervariasi.</p>
-                        <p style="margin-bottom: 5px;"><b>Strategi Retention:</b></p>
-                        <ul style="margin-bottom:0;">
-                            <li>VIP customer program.</li>
-                            <li>Dedicated customer support.</li>
-                            <li>Reminder untuk upgrade/premium products.</li>
-                        </ul>
-                        <p style="margin-top: 20px; margin-bottom: 5px;"><b>Strategi Campaign:</b></p>
-                        <ul style="margin-bottom:0;">
-                            <li>Promo cicilan 0% / extended installment.</li>
-                            <li>Early access produk premium & gift edition.</li>
-                            <li>Personalized premium recommendations.</li>
-                        </ul>
-                    </div>
-                    """, unsafe_allow_html=True)
+                segment_card(cluster)
 
     with tab2:
         st.subheader("📤 Prediksi Cluster dari File CSV")
@@ -577,25 +1090,37 @@ elif menu == "Prediksi Cluster":
         uploaded = st.file_uploader("Upload CSV File", type=["csv"])
 
         # Inisialisasi Session State agar data tidak hilang saat slider digeser
-        if "df_hasil_prediksi" not in st.session_state:
-            st.session_state.df_hasil_prediksi = None
+        # Hasil prediksi disimpan di cache Parquet bersama (lintas sesi), session hanya menyimpan path-nya
+        if "hasil_prediksi_path" not in st.session_state:
+            st.session_state.hasil_prediksi_path = None
         if "last_uploaded_file" not in st.session_state:
             st.session_state.last_uploaded_file = None
+        if "prediction_job" not in st.session_state:
+            st.session_state.prediction_job = None
+
+        prediction_cache = get_prediction_cache()
 
         if uploaded is not None:
+            # Key cache = hash isi file + versi model, jadi file yang sama dari sesi lain langsung dipakai ulang
+            cache_key = prediction_cache.key(upload_digest(uploaded), model_version(MODEL_PATH, active_model_key()))
+
             # Jika user upload file baru, reset hasil prediksi lama
-            if st.session_state.last_uploaded_file != uploaded.name:
-                st.session_state.df_hasil_prediksi = None
-                st.session_state.last_uploaded_file = uploaded.name
+            if st.session_state.last_uploaded_file != cache_key:
+                st.session_state.hasil_prediksi_path = prediction_cache.lookup(cache_key)
+                st.session_state.last_uploaded_file = cache_key
+                st.session_state.prediction_job = None
 
+            # Hanya baca beberapa baris untuk preview, file lengkap dibaca per chunk saat prediksi
             try:
-                up_df = pd.read_csv(uploaded)
+                with span("upload.read_preview"):
+                    up_df = pd.read_csv(uploaded, nrows=5)
+                uploaded.seek(0)
             except Exception as e:
                 st.error(f"Gagal membaca file CSV. Error: {e}")
                 st.stop()
 
             st.subheader("🔍 Preview File Upload (5 Baris)")
-            st.write(f"Rows: **{up_df.shape[0]:,}** | Cols: **{up_df.shape[1]:,}**")
+            st.write(f"Cols: **{up_df.shape[1]:,}** | Size: **{uploaded.size / 1e6:,.1f} MB**")
             pretty_table(up_df, max_rows=5)
 
             # Validasi Kolom
@@ -606,25 +1131,41 @@ elif menu == "Prediksi Cluster":
                 # Tombol Run
                 run = st.button("Run Prediction", use_container_width=True)
 
-                if run:
-                    with st.spinner("Sedang memproses cluster..."):
-                        try:
-                            X_input = up_df[FEATURES].copy()
-                            preds = pipeline.predict(X_input)
-                            
-                            # Simpan hasil ke session state
-                            result_df = up_df.copy()
-                            result_df["cluster"] = preds
-                            st.session_state.df_hasil_prediksi = result_df
-                        except Exception as e:
-                            st.error(f"Gagal prediksi: {e}")
+                # Prediksi dijalankan sebagai job di proses worker, UI hanya polling statusnya
+                if run and st.session_state.prediction_job is None:
+                    out_path = prediction_cache.path_for(cache_key)
+                    if os.path.exists(out_path):
+                        st.session_state.hasil_prediksi_path = out_path
+                    else:
+                        st.session_state.hasil_prediksi_path = None
+                        reference = None
+                        if os.path.exists(DATA_PATH):
+                            reference = reference_profile_path(DATA_PATH, os.path.getmtime(DATA_PATH),
+                                                               model_version(MODEL_PATH, active_model_key()))
+                        with span("upload.submit_job"):
+                            st.session_state.prediction_job = get_job_manager().submit(
+                                uploaded.getbuffer(), MODEL_PATH, FEATURES, out_path, reference_profile=reference
+                            )
+
+                if st.session_state.prediction_job is not None:
+                    prediction_job_panel(st.session_state.prediction_job)
+
+                job_message = st.session_state.pop("prediction_job_message", None)
+                if job_message is not None:
+                    level, text = job_message
+                    st.warning(text) if level == "warning" else st.error(text)
+
+                # Hasil bisa sudah dibuang dari cache (LRU) oleh sesi lain
+                res_path = st.session_state.hasil_prediksi_path
+                if res_path is not None and not os.path.exists(res_path):
+                    res_path = st.session_state.hasil_prediksi_path = None
 
                 # Menampilkan hasil jika sudah ada di Session State
-                if st.session_state.df_hasil_prediksi is not None:
-                    res_df = st.session_state.df_hasil_prediksi
-                    
+                if res_path is not None:
                     st.markdown("---")
-                    st.success("Prediksi selesai ✅")
+                    st.success(f"Prediksi selesai ✅ ({result_num_rows(res_path):,} baris)")
+                    validation_section(res_path)
+                    drift_section(res_path)
                     
                     # Mapping Kolom
                     column_mapping = {
@@ -638,28 +1179,45 @@ elif menu == "Prediksi Cluster":
                         "product_category_name_english": "Product Category",
                         "payment_type": "Payment Method",
                         "customer_city": "Customer City",
-                        "cluster": "Cluster"
+                        "cluster": "Cluster",
+                        "cluster_distance": "Distance To Centroid",
+                        "cluster_margin": "Margin",
+                        "cluster_confidence": "Confidence"
                     }
 
                     # Filter kolom yang ada
-                    cols_to_select = [c for c in column_mapping.keys() if c in res_df.columns]
-                    final_view = res_df[cols_to_select].rename(columns=column_mapping).fillna("-")
+                    res_cols = result_columns(res_path)
+                    cols_to_select = [c for c in column_mapping.keys() if c in res_cols]
+
+                    customer_lookup_section(res_path, column_mapping)
+
+                    # Body expander tetap dieksekusi walau tertutup, jadi peta (scan seluruh hasil) dibangun
+                    # hanya setelah toggle dinyalakan
+                    if st.toggle("🗺️ Tampilkan Peta Cluster (PCA)", key="cluster_map_predict_csv"):
+                        with st.spinner("Menyiapkan peta cluster..."):
+                            cmap = load_result_cluster_map(res_path, os.path.getmtime(res_path), active_model_key())
+                        cluster_map_section(cmap, "predict_csv", "Sebaran Hasil Prediksi terhadap Centroid")
 
-                    # Slider
-                    num_show = st.slider("Pilih Jumlah Baris yang Ingin Ditampilkan", 5, 100, 10, step=5, key="slider_predict_csv")
-                    
                     st.subheader("📌 Hasil Prediksi")
-                    pretty_table(final_view, max_rows=num_show)
+                    row_filter = result_filter_section(res_path, key="predict_csv")
+                    paginated_result_table(res_path, cols_to_select, column_mapping, key="predict_csv",
+                                           row_filter=row_filter)
 
                     st.write("")
-                    csv_bytes = make_download_csv(final_view)
-                    st.download_button(
-                        "⬇️ Download Hasil CSV",
-                        data=csv_bytes,
-                        file_name="olist_cluster_results.csv",
-                        mime="text/csv",
-                        use_container_width=True
-                    )
+                    download_result_section(res_path, cols_to_select, column_mapping, row_filter)
         else:
             st.info("Silakan Upload File CSV untuk Mulai Prediksi.")
-            st.session_state.df_hasil_prediksi = None
\ No newline at end of file
+            st.session_state.hasil_prediksi_path = None
+
+        cache_stats = prediction_cache.stats()
+        st.caption(
+            f"Cache prediksi: {cache_stats['hits']:,} hit • {cache_stats['misses']:,} miss • "
+            f"{cache_stats['entries']} file ({cache_stats['bytes'] / 1e6:,.1f} MB)"
+        )
+
+# =========================
+# PROFILING
+# =========================
+finish_trace(trace)
+if ADMIN_PANEL:
+    profiling_panel(trace)
@@ -0,0 +1,64 @@
+"""Load-time dan peak RSS: CSV (jalur lama) vs Parquet per kebutuhan halaman.
+
+Tiap skenario dijalankan di proses baru supaya RSS tidak saling mempengaruhi
+(peak RSS dibaca dari /proc/self/status, jadi hanya untuk Linux).
+    python benchmarks/bench_data_load.py [path/ke/Olist_Dataset_Clustering.csv]
+"""
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from olist_scoring import FEATURES  # noqa: E402
+
+SCENARIOS = {
+    "csv full (read_csv)": "pd.read_csv(CSV)",
+    "parquet full": "read_columns(CSV)",
+    "parquet FEATURES": f"read_columns(CSV, {FEATURES!r})",
+    "parquet payment_type": "read_columns(CSV, ['payment_type'])",
+    "parquet monetary": "read_columns(CSV, ['monetary'])",
+}
+
+RUNNER = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+import pandas as pd
+import pyarrow.parquet  # import di luar pengukuran
+from olist_data import read_columns
+CSV = {csv!r}
+def peak_rss_kb():
+    # VmHWM direset saat exec, berbeda dengan ru_maxrss yang diwarisi dari proses induk
+    with open("/proc/self/status") as f:
+        return next(int(l.split()[1]) for l in f if l.startswith("VmHWM"))
+base = peak_rss_kb()
+t0 = time.perf_counter()
+out = {expr}
+elapsed = time.perf_counter() - t0
+peak = peak_rss_kb()
+print(json.dumps({{"seconds": elapsed, "rss_mb": (peak - base) / 1024, "frame_mb": out.memory_usage(deep=True).sum() / 1e6}}))
+"""
+
+
+def run(csv_path, expr):
+    code = RUNNER.format(root=ROOT, csv=csv_path, expr=expr)
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    csv_path = os.path.abspath(sys.argv[1] if len(sys.argv) > 1 else "Olist_Dataset_Clustering.csv")
+
+    from olist_data import ensure_parquet
+
+    ensure_parquet(csv_path)
+    print(f"{'scenario':<24} {'load':>10} {'peak RSS':>10} {'frame':>10}")
+    for name, expr in SCENARIOS.items():
+        r = run(csv_path, expr)
+        print(f"{name:<24} {r['seconds'] * 1e3:>8.1f}ms {r['rss_mb']:>8.1f}MB {r['frame_mb']:>8.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Overhead DriftMonitor pada scoring streaming: file Parquet sintetis, dengan vs tanpa monitor.
+
+Profil referensi dibangun dari sebagian data sintetis yang sama (tanpa butuh dataset asli).
+    python benchmarks/bench_drift.py --rows 2000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic_olist import synthetic_rfm  # noqa: E402
+from olist_drift import BinnedCounts, DriftMonitor, build_reference_profile  # noqa: E402
+from olist_model import load_model_artifact  # noqa: E402
+from olist_scoring import CHUNK_SIZE, FEATURES, ShardedScorer, predict_parquet_streaming  # noqa: E402
+
+MODEL_PATH = "rfm_kmeans_pipeline.pkl"
+
+
+def best_time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    model = load_model_artifact(args.model)
+    with tempfile.TemporaryDirectory() as tmp:
+        in_path = os.path.join(tmp, "input.parquet")
+        out_path = os.path.join(tmp, "scored.parquet")
+        pd.DataFrame(synthetic_rfm(args.rows), columns=FEATURES).to_parquet(in_path, index=False)
+
+        ref_csv = os.path.join(tmp, "reference.csv")
+        pd.DataFrame(synthetic_rfm(200_000, seed=1), columns=FEATURES).to_csv(ref_csv, index=False)
+        profile = build_reference_profile(ref_csv, model, FEATURES)
+
+        def score(with_monitor):
+            monitor = DriftMonitor(profile) if with_monitor else None
+            with ShardedScorer(model) as scorer:
+                predict_parquet_streaming(in_path, scorer, FEATURES, out_path, args.chunksize, monitor=monitor)
+
+        base = best_time(lambda: score(False), args.repeat)
+        monitored = best_time(lambda: score(True), args.repeat)
+
+    X = synthetic_rfm(args.chunksize)
+    labels, dist, _, _ = model.predict_with_scores(X)
+    monitor = DriftMonitor(profile)
+    update = best_time(lambda: monitor.update(X, labels, dist), args.repeat * 5)
+    hist = best_time(lambda: BinnedCounts(profile["histograms"]["monetary"]["cuts"]).update(X[:, 2]), args.repeat * 5)
+
+    print(f"rows: {args.rows:,}, chunk: {args.chunksize:,}")
+    print(f"scoring tanpa monitor : {base:.3f} s ({args.rows / base:,.0f} baris/detik)")
+    print(f"scoring dengan monitor: {monitored:.3f} s ({args.rows / monitored:,.0f} baris/detik)")
+    print(f"overhead              : {(monitored / base - 1):+.1%}")
+    print(f"DriftMonitor.update per chunk: {update * 1e3:.2f} ms (1 histogram: {hist * 1e3:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Bytes terkirim dan waktu render histogram: px.histogram (raw rows) vs bin di server.
+
+Waktu = hitung bin + bangun figure + serialisasi JSON (yang dikirim ke browser).
+    python benchmarks/bench_histogram.py [path/ke/Olist_Dataset_Clustering.csv]
+"""
+import os
+import sys
+import time
+
+import plotly.express as px
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from olist_charts import binned_histogram_figure  # noqa: E402
+from olist_data import SKEWED_FEATURES, histogram_bins, read_columns  # noqa: E402
+from olist_scoring import FEATURES  # noqa: E402
+
+
+def measure(build):
+    t0 = time.perf_counter()
+    payload = build().to_json()
+    return time.perf_counter() - t0, len(payload.encode("utf-8"))
+
+
+def main():
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else "Olist_Dataset_Clustering.csv"
+    df = read_columns(csv_path, FEATURES)
+    print(f"rows: {len(df):,}")
+    print(f"{'feature':<22} {'mode':<10} {'time':>10} {'bytes':>12}")
+    for f in FEATURES:
+        t, n = measure(lambda: px.histogram(df, x=f, nbins=40))
+        print(f"{f:<22} {'px raw':<10} {t * 1e3:>8.1f}ms {n:>12,}")
+        scales = ("linear", "log", "quantile") if f in SKEWED_FEATURES else ("linear",)
+        for scale in scales:
+            values = df[f].to_numpy()
+            t, n = measure(lambda: binned_histogram_figure(histogram_bins(values, scale=scale), title=f))
+            print(f"{f:<22} {scale:<10} {t * 1e3:>8.1f}ms {n:>12,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Throughput scoring paralel (ShardedScorer) dari 1 sampai N worker.
+
+Data: matriks RFM sintetis (seed tetap) dengan distribusi skewed mirip Olist.
+    python benchmarks/bench_parallel_scoring.py --rows 10000000 --max-workers 8
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from olist_model import load_model_artifact  # noqa: E402
+from olist_scoring import ShardedScorer  # noqa: E402
+from synthetic_olist import synthetic_rfm  # noqa: E402
+
+MODEL_PATH = "rfm_kmeans_pipeline.pkl"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shard-size", type=int, default=250_000)
+    parser.add_argument("--executor", choices=["thread", "process"], default="thread")
+    args = parser.parse_args()
+
+    model = load_model_artifact(args.model)
+    X = synthetic_rfm(args.rows)
+    expected = model.predict(X)
+    print(f"rows: {args.rows:,}  cpu_count: {os.cpu_count()}  executor: {args.executor}")
+    print(f"{'workers':>8} {'time':>10} {'rows/sec':>14} {'speedup':>8}")
+
+    base = None
+    workers = 1
+    while workers <= args.max_workers:
+        with ShardedScorer(model, workers=workers, shard_size=args.shard_size, executor=args.executor) as scorer:
+            scorer.predict(X[: args.shard_size * workers])  # warm-up pool
+            t0 = time.perf_counter()
+            labels = scorer.predict(X)
+            elapsed = time.perf_counter() - t0
+        assert np.array_equal(labels, expected), "label paralel berbeda dengan scoring serial"
+        base = base or elapsed
+        print(f"{workers:>8} {elapsed * 1e3:>8.0f}ms {args.rows / elapsed:>14,.0f} {base / elapsed:>7.2f}x")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
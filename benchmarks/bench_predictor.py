@@ -0,0 +1,61 @@
+"""Parity check + microbenchmark: CentroidPredictor vs pipeline.predict.
+
+Jalankan dari root repo:
+    python benchmarks/bench_predictor.py --max-rows 10000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from olist_model import CentroidPredictor, check_parity, parity_probe  # noqa: E402
+
+MODEL_PATH = "rfm_kmeans_pipeline.pkl"
+BATCH_SIZES = [1, 10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+
+
+def best_time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--max-rows", type=int, default=10_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pipeline = joblib.load(args.model)
+    pred64 = CentroidPredictor.from_pipeline(pipeline)
+    pred32 = pred64.with_dtype(np.float32)
+
+    # Parity: float64 harus identik, float32 dilaporkan
+    X_parity = parity_probe(pred64, n=200_000, seed=1)
+    parity64 = check_parity(pred64, pipeline, X_parity)
+    parity32 = check_parity(pred32, pipeline, X_parity)
+    print(f"parity float64: {parity64:.6f}  float32: {parity32:.6f}")
+    assert parity64 == 1.0, "CentroidPredictor (float64) tidak identik dengan pipeline.predict"
+
+    print(f"{'rows':>10} {'pipeline':>12} {'compiled64':>12} {'compiled32':>12} {'speedup64':>10}")
+    for n in [b for b in BATCH_SIZES if b <= args.max_rows]:
+        X = pd.DataFrame(parity_probe(pred64, n=n, seed=2), columns=pred64.features)
+        repeat = args.repeat if n <= 1_000_000 else 1
+        t_pipe = best_time(lambda: pipeline.predict(X), repeat)
+        t64 = best_time(lambda: pred64.predict(X), repeat)
+        t32 = best_time(lambda: pred32.predict(X), repeat)
+        print(f"{n:>10,} {t_pipe * 1e3:>10.3f}ms {t64 * 1e3:>10.3f}ms {t32 * 1e3:>10.3f}ms {t_pipe / t64:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Overhead instrumentasi olist_profiling per span: tanpa trace aktif, dengan trace, dan decorator.
+
+    python benchmarks/bench_profiling.py --calls 200000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import olist_profiling  # noqa: E402
+from olist_profiling import finish_trace, span, start_trace, timed  # noqa: E402
+
+
+def noop():
+    pass
+
+@timed
+def timed_noop():
+    pass
+
+
+def bench(fn, calls, repeat) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(calls)
+        best = min(best, time.perf_counter() - t0)
+    return best / calls
+
+
+def run_bare(calls):
+    for _ in range(calls):
+        noop()
+
+def run_span(calls):
+    for _ in range(calls):
+        with span("bench"):
+            noop()
+
+def run_traced(calls):
+    # Trace hanya menyimpan MAX_TRACE_SPANS span pertama, sisanya tetap masuk agregat
+    trace = start_trace("bench")
+    for _ in range(calls):
+        with span("bench"):
+            noop()
+    olist_profiling.LOG_PATH = olist_profiling.METRICS_PATH = None
+    finish_trace(trace)
+
+def run_timed(calls):
+    for _ in range(calls):
+        timed_noop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    bare = bench(run_bare, args.calls, args.repeat)
+    print(f"{'scenario':<22} {'per call':>10} {'overhead':>10}")
+    for name, fn in [("function call", run_bare), ("with span()", run_span),
+                     ("with span() + trace", run_traced), ("@timed", run_timed)]:
+        per_call = bench(fn, args.calls, args.repeat)
+        print(f"{name:<22} {per_call * 1e9:>8.0f}ns {(per_call - bare) * 1e9:>8.0f}ns")
+    print(f"to_prometheus(): {len(olist_profiling.METRICS.to_prometheus()):,} byte")
+
+
+if __name__ == "__main__":
+    main()
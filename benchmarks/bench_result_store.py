@@ -0,0 +1,117 @@
+"""Memori & latensi tabel hasil untuk banyak sesi: salinan DataFrame per sesi vs halaman Parquet vs result store.
+
+Tiap mode dijalankan di proses baru; memori privat (RssAnon) diukur setelah semua "sesi" memegang hasilnya
+dan merender halaman acak.
+    python benchmarks/bench_result_store.py --rows 1000000 --sessions 30
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+MODES = ("dataframe_per_session", "parquet_pages", "result_store")
+PAGE = 50
+
+
+def private_rss():
+    """RssAnon (byte) di Linux: memori privat proses, tanpa halaman file mmap yang bisa dibagi antar proses."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("RssAnon:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    from olist_profiling import memory_snapshot
+
+    return memory_snapshot()["rss"]
+
+
+def worker(mode, path, sessions, pages):
+    import numpy as np
+    import pandas as pd
+
+    from olist_scoring import read_result_rows, result_num_rows
+    from olist_store import ResultStore
+
+    rss0 = private_rss()
+    rng = np.random.default_rng(0)
+    total = result_num_rows(path)
+    starts = rng.integers(0, total - PAGE, pages)
+    held, t0 = [], time.perf_counter()
+    if mode == "dataframe_per_session":
+        # Perilaku lama: tiap sesi menyimpan DataFrame hasil sendiri di session_state
+        for _ in range(sessions):
+            held.append(pd.read_parquet(path).copy())
+        page = lambda s: held[0].iloc[s:s + PAGE].copy()  # noqa: E731
+        sort_page = lambda s: held[0].sort_values("monetary").iloc[s:s + PAGE]  # noqa: E731
+    elif mode == "parquet_pages":
+        page = lambda s: read_result_rows(path, s, s + PAGE)  # noqa: E731
+        sort_page = None
+    else:
+        store = ResultStore()
+        held = [store.acquire(path) for _ in range(sessions)]
+        page = lambda s: held[0].rows(s, s + PAGE)  # noqa: E731
+        sort_page = lambda s: held[0].rows(s, s + PAGE, sort="monetary")  # noqa: E731
+    open_seconds = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for s in starts:
+        page(int(s))
+    page_ms = (time.perf_counter() - t0) / pages * 1e3
+    sort_ms = None
+    if sort_page is not None:
+        t0 = time.perf_counter()
+        for s in starts:
+            sort_page(int(s))
+        sort_ms = (time.perf_counter() - t0) / pages * 1e3
+    return {"open_seconds": open_seconds, "page_ms": page_ms, "sorted_page_ms": sort_ms,
+            "rss_delta_mb": (private_rss() - rss0) / 1e6}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--sessions", type=int, default=30)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--worker", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args.worker[0], args.worker[1], args.sessions, args.pages)))
+        return
+
+    from synthetic_olist import synthetic_frame
+    from olist_model import load_model_artifact
+    from olist_scoring import FEATURES, predict_csv_streaming
+    from olist_store import ensure_arrow
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "input.csv")
+        out_path = os.path.join(tmp, "scored.parquet")
+        synthetic_frame(args.rows).to_csv(csv_path, index=False)
+        predict_csv_streaming(csv_path, load_model_artifact("rfm_kmeans_pipeline.pkl"), FEATURES, out_path,
+                              index=False)
+        # Companion Arrow dibuat sekali (seperti di dashboard), tidak ikut diukur per mode
+        ensure_arrow(out_path)
+
+        print(f"{args.rows:,} baris, {args.sessions} sesi, halaman {PAGE} baris")
+        print(f"{'mode':<24}{'buka':>10}{'halaman':>11}{'terurut':>11}{'privat Δ':>11}")
+        for mode in MODES:
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), "--sessions", str(args.sessions),
+                                  "--pages", str(args.pages), "--worker", mode, out_path],
+                                 capture_output=True, text=True, check=True)
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            sort_ms = "-" if r["sorted_page_ms"] is None else f"{r['sorted_page_ms']:.2f}ms"
+            print(f"{mode:<24}{r['open_seconds']:>9.2f}s{r['page_ms']:>9.2f}ms{sort_ms:>11}"
+                  f"{r['rss_delta_mb']:>9.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
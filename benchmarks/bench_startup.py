@@ -0,0 +1,89 @@
+"""Cold start Olist_app.py: waktu import + render pertama per halaman, dan modul berat yang ikut dimuat.
+
+Tiap pengukuran dijalankan di proses baru (cold). "bare" menjalankan script tanpa server
+(seperti import pertama oleh `streamlit run`), "first paint" memakai AppTest per halaman.
+Exit code 1 jika halaman Home memuat modul yang seharusnya lazy atau melebihi --max-home-ms.
+    python benchmarks/bench_startup.py [--repeat 3] [--max-home-ms 1500]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "Olist_app.py")
+
+PAGES = ["Home", "Data Preview & Statistik", "EDA", "Prediksi Cluster"]
+HEAVY_MODULES = ["pandas", "pyarrow", "plotly.express", "sklearn", "joblib"]
+# Modul yang tidak boleh dimuat saat membuka Home
+HOME_FORBIDDEN = ["pandas", "pyarrow", "plotly.express", "sklearn"]
+
+BARE_RUNNER = """
+import json, logging, runpy, sys, time
+logging.disable(logging.WARNING)
+t0 = time.perf_counter()
+runpy.run_path({app!r})
+elapsed = time.perf_counter() - t0
+print(json.dumps({{"seconds": elapsed, "modules": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+PAINT_RUNNER = """
+import json, logging, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+logging.disable(logging.WARNING)
+before = set(sys.modules)
+at = AppTest.from_file({app!r}, default_timeout=120)
+at.session_state["menu"] = {page!r}
+at.run()
+elapsed = time.perf_counter() - t0
+assert not at.exception, at.exception
+print(json.dumps({{"seconds": elapsed, "modules": [m for m in {heavy!r} if m in sys.modules and m not in before]}}))
+"""
+
+
+def run(code):
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True,
+                         cwd=ROOT, env={**os.environ, "PYTHONPATH": ROOT})
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def best_of(code, repeat):
+    runs = [run(code) for _ in range(repeat)]
+    return min(runs, key=lambda r: r["seconds"])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-home-ms", type=float, default=None)
+    parser.add_argument("--json", help="Simpan hasil ke file JSON")
+    args = parser.parse_args()
+
+    results = {"bare Home": best_of(BARE_RUNNER.format(app=APP, heavy=HEAVY_MODULES), args.repeat)}
+    for page in PAGES:
+        results[f"first paint {page}"] = best_of(
+            PAINT_RUNNER.format(app=APP, page=page, heavy=HEAVY_MODULES), args.repeat
+        )
+
+    print(f"{'scenario':<36} {'time':>10}  modules")
+    for name, r in results.items():
+        print(f"{name:<36} {r['seconds'] * 1e3:>8.0f}ms  {', '.join(r['modules']) or '-'}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    home = results["bare Home"]
+    failures = [m for m in HOME_FORBIDDEN if m in home["modules"]]
+    if failures:
+        print(f"REGRESSION: Home memuat {', '.join(failures)}")
+    if args.max_home_ms is not None and home["seconds"] * 1e3 > args.max_home_ms:
+        print(f"REGRESSION: Home {home['seconds'] * 1e3:.0f}ms > {args.max_home_ms:.0f}ms")
+        failures.append("time")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Biaya validate_frame per juta baris: data bersih (float64), dengan pelanggaran, dan kolom teks.
+
+    python benchmarks/bench_validation.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic_olist import synthetic_rfm  # noqa: E402
+from olist_scoring import FEATURES  # noqa: E402
+from olist_validation import validate_frame  # noqa: E402
+
+
+def make_frames(n, bad_ratio, seed=0) -> dict:
+    clean = pd.DataFrame(synthetic_rfm(n, seed), columns=FEATURES)
+
+    dirty = clean.copy()
+    rng = np.random.default_rng(seed + 1)
+    bad = rng.choice(n, int(n * bad_ratio), replace=False)
+    dirty.loc[bad[0::3], "monetary"] = -1.0
+    dirty.loc[bad[1::3], "review_score"] = 9.0
+    dirty.loc[bad[2::3], "price"] = np.nan
+
+    text = dirty.copy()
+    text["monetary"] = text["monetary"].astype(str).astype(object)
+    text.loc[bad[0::3], "monetary"] = "n/a"
+    return {"clean float64": clean, f"{bad_ratio:.1%} invalid": dirty, "text monetary": text}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--bad-ratio", type=float, default=0.01)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'scenario':<18} {'time':>10} {'per 1M':>10} {'valid':>10}")
+    for name, df in make_frames(args.rows, args.bad_ratio).items():
+        best = float("inf")
+        for _ in range(args.repeat):
+            # validate_frame mengubah kolom di tempat, jadi tiap ulangan memakai salinan baru
+            frame = df.copy()
+            t0 = time.perf_counter()
+            valid, _ = validate_frame(frame)
+            best = min(best, time.perf_counter() - t0)
+        print(f"{name:<18} {best * 1e3:>8.1f}ms {best * 1e3 * 1e6 / args.rows:>8.1f}ms {valid.sum():>10,}")
+
+
+if __name__ == "__main__":
+    main()
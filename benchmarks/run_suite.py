@@ -0,0 +1,464 @@
+"""Benchmark suite: waktu dan peak RSS kerja data per halaman dan tiap jalur scoring, tanpa browser.
+
+Dataset sintetis (synthetic_olist.py) dibuat sekali per (rows, seed) di .olist_cache/bench/.
+Tiap skenario dijalankan di proses baru dan direktori kerja sendiri (cache dingin), hasilnya
+disimpan sebagai JSON supaya bisa dibandingkan antar commit:
+    python benchmarks/run_suite.py --sizes 10k,1m
+    python benchmarks/run_suite.py --sizes 10k,1m,10m --only score --repeat 3
+    python benchmarks/run_suite.py --sizes 1m --compare benchmarks/results/<commit lama>.json
+Exit code 1 jika --compare menemukan skenario yang lebih lambat dari --threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+APP = os.path.join(ROOT, "Olist_app.py")
+MODEL_FILES = ["rfm_kmeans_pipeline.pkl", "rfm_kmeans_pipeline.npz"]
+# Nama file yang dibaca Olist_app.py (DATA_PATH / MODEL_PATH relatif terhadap cwd)
+DATA_NAME = "Olist_Dataset_Clustering.csv"
+MODEL_NAME = "rfm_kmeans_pipeline.pkl"
+DATA_DIR = os.path.join(ROOT, ".olist_cache", "bench")
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+DEFAULT_SIZES = "10k,1m"
+
+
+# =========================
+# SCENARIOS
+# =========================
+# Tiap skenario: setup(ctx) tidak diukur, run(ctx) diukur. ctx["csv"] / ctx["model"] ada di cwd proses worker.
+def _parquet(ctx):
+    from olist_data import ensure_parquet
+
+    ctx["parquet"] = ensure_parquet(ctx["csv"])
+
+def _matrix(ctx):
+    import numpy as np
+
+    from olist_data import read_columns
+    from olist_model import load_model_artifact
+    from olist_scoring import FEATURES
+
+    ctx["model_obj"] = load_model_artifact(ctx["model"])
+    ctx["X"] = read_columns(ctx["csv"], FEATURES).to_numpy(dtype=np.float64)
+
+def _model(ctx):
+    from olist_model import load_model_artifact
+
+    _parquet(ctx)
+    ctx["model_obj"] = load_model_artifact(ctx["model"])
+
+def _eda(ctx):
+    from olist_data import load_eda_aggregates
+    from olist_scoring import FEATURES
+
+    ctx["eda"] = load_eda_aggregates(ctx["csv"], FEATURES)
+
+def _scored(ctx):
+    from olist_scoring import FEATURES, predict_csv_streaming
+
+    _model(ctx)
+    ctx["out"] = os.path.abspath("scored.parquet")
+    predict_csv_streaming(ctx["csv"], ctx["model_obj"], FEATURES, ctx["out"])
+
+def _drift_monitor(ctx):
+    from olist_drift import DriftMonitor, build_reference_profile
+    from olist_scoring import FEATURES
+
+    _model(ctx)
+    ctx["monitor"] = DriftMonitor(build_reference_profile(ctx["csv"], ctx["model_obj"], FEATURES))
+
+def _segment_cube(ctx):
+    from olist_scoring import FEATURES
+    from olist_segments import load_segment_cube
+
+    _parquet(ctx)
+    ctx["cube"] = load_segment_cube(ctx["csv"], ctx["model"], FEATURES)
+
+def _raw_tables(ctx):
+    # Tabel mentah Olist sintetis dengan jumlah order = jumlah baris dataset skenario
+    import pyarrow.parquet as pq
+
+    from synthetic_olist import write_synthetic_raw_tables
+
+    _parquet(ctx)
+    ctx["orders"] = pq.ParquetFile(ctx["parquet"]).metadata.num_rows
+    ctx["raw"] = write_synthetic_raw_tables("raw", ctx["orders"])
+
+def _feature_state(ctx):
+    # State dari snapshot ~90% order; skenario memproses sisa order + review yang datang sesudahnya
+    import numpy as np
+
+    from olist_features import build_features
+    from synthetic_olist import RAW_DAYS, RAW_START, write_synthetic_raw_tables
+
+    _raw_tables(ctx)
+    until = RAW_START + np.timedelta64(int(RAW_DAYS * 0.9), "D")
+    build_features(write_synthetic_raw_tables("raw_snapshot", ctx["orders"], until=until), "features.parquet")
+
+def run_preview(ctx):
+    from olist_data import read_head
+
+    return read_head(ctx["csv"], 100).to_html(index=False)
+
+def run_describe(ctx):
+    from olist_scoring import FEATURES
+    from olist_stats import load_describe_state
+
+    return load_describe_state(ctx["csv"], FEATURES).describe()
+
+def run_eda_aggregates(ctx):
+    _eda(ctx)
+
+def run_eda_figures(ctx):
+    # Semua figure halaman EDA sampai JSON yang dikirim ke browser
+    import pandas as pd
+    import plotly.express as px
+
+    from olist_charts import binned_histogram_figure
+
+    size = 0
+    for name, counts in ctx["eda"]["counts"].items():
+        df = pd.DataFrame({"label": counts["labels"], "value": counts["values"]})
+        fig = px.pie(df, names="label", values="value") if name == "payment_type" else px.bar(df, x="label", y="value")
+        size += len(fig.to_json())
+    for feature, scales in ctx["eda"]["histograms"].items():
+        for hist in scales.values():
+            size += len(binned_histogram_figure(hist, title=feature).to_json())
+    return {"payload_bytes": size}
+
+def run_segment_cube(ctx):
+    from olist_scoring import FEATURES
+    from olist_segments import load_segment_cube
+
+    return {"cells": load_segment_cube(ctx["csv"], ctx["model"], FEATURES).n_cells}
+
+def run_segment_queries(ctx, n=50):
+    # Kombinasi filter acak (state x kategori x payment), profil per cluster + satu crosstab per query
+    import numpy as np
+
+    cube = ctx["cube"]
+    rng = np.random.default_rng(0)
+    for _ in range(n):
+        filters = {d: list(rng.choice(cube.levels[d], size=rng.integers(0, 4), replace=False))
+                   for d in cube.dimensions[1:]}
+        cube.group("cluster", filters)
+        cube.crosstab(cube.dimensions[1], "cluster", filters)
+    return {"queries": n}
+
+def run_cluster_map(ctx):
+    # Build penuh (tanpa cache) + ukuran yang dikirim ke browser: PNG raster dan sampel titik
+    import io
+
+    from PIL import Image
+
+    from olist_clustermap import build_cluster_map
+    from olist_scoring import FEATURES
+
+    cmap = build_cluster_map(ctx["parquet"], ctx["model_obj"], FEATURES)
+    buf = io.BytesIO()
+    Image.fromarray(cmap.density_rgba(["#4facfe", "#ff4b4b", "#faca2e"])).save(buf, format="PNG", optimize=True)
+    return {"png_bytes": buf.tell(), "sample_points": int(len(cmap.sample_cluster)),
+            "sample_bytes": int(cmap.sample_xy.nbytes + cmap.sample_values.nbytes)}
+
+def run_feature_build(ctx):
+    from olist_features import build_features
+
+    stats = build_features(ctx["raw"], "features.parquet", full=True)
+    return {"customers": stats["customers"]}
+
+def run_feature_incremental(ctx):
+    from olist_features import build_features
+
+    stats = build_features(ctx["raw"], "features.parquet")
+    return {"new_orders": stats["orders"], "customers": stats["customers"]}
+
+def run_model_refresh(ctx):
+    # Refresh mini-batch dari seluruh dataset + publish versi baru (ditulis di direktori kerja worker)
+    from olist_refresh import refresh_model
+
+    result = refresh_model(ctx["model"], ctx["csv"], max_shift_ratio=float("inf"))
+    return {"max_shift_ratio": max(result["shift_ratio"])}
+
+def run_predict(ctx):
+    ctx["model_obj"].predict(ctx["X"])
+
+def run_predict_with_scores(ctx):
+    from olist_scoring import predict_with_scores
+
+    predict_with_scores(ctx["model_obj"], ctx["X"])
+
+def run_sharded(ctx):
+    from olist_scoring import ShardedScorer
+
+    with ShardedScorer(ctx["model_obj"]) as scorer:
+        scorer.predict_with_scores(ctx["X"])
+        return {"workers": scorer.workers}
+
+def run_csv_streaming(ctx):
+    from olist_scoring import FEATURES, predict_csv_streaming
+
+    predict_csv_streaming(ctx["csv"], ctx["model_obj"], FEATURES, "out.parquet", monitor=ctx.get("monitor"))
+
+def run_parquet_streaming(ctx):
+    from olist_scoring import FEATURES, predict_parquet_streaming
+
+    predict_parquet_streaming(ctx["parquet"], ctx["model_obj"], FEATURES, "out.parquet")
+
+def run_export_csv(ctx):
+    from olist_scoring import export_result
+
+    return {"bytes": os.path.getsize(export_result(ctx["out"], "csv"))}
+
+def run_page(page):
+    def run(ctx):
+        # Render halaman lewat AppTest: cold (cache Streamlit kosong) lalu warm (rerun kedua)
+        import logging
+
+        from streamlit.testing.v1 import AppTest
+
+        logging.disable(logging.WARNING)
+        at = AppTest.from_file(APP, default_timeout=3600)
+        at.session_state["menu"] = page
+        at.run()
+        assert not at.exception, at.exception
+        t0 = time.perf_counter()
+        at.run()
+        return {"warm_seconds": time.perf_counter() - t0, "spans": top_spans(os.environ["OLIST_PROFILE_LOG"])}
+    return run
+
+def top_spans(log_path, n=8) -> dict:
+    """Span terberat dari trace rerun pertama (cold), dari log olist_profiling."""
+    with open(log_path, encoding="utf-8") as f:
+        trace = json.loads(f.readline())
+    totals = {}
+    for s in trace["spans"]:
+        if s["seconds"] is not None and s["depth"] == 0:
+            totals[s["name"]] = totals.get(s["name"], 0.0) + s["seconds"]
+    return dict(sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:n])
+
+SCENARIOS = {
+    "data.csv_to_parquet": (None, _parquet),
+    "data.preview": (_parquet, run_preview),
+    "data.describe": (_parquet, run_describe),
+    "data.eda_aggregates": (_parquet, run_eda_aggregates),
+    "data.eda_figures": (_eda, run_eda_figures),
+    "data.segment_cube": (_parquet, run_segment_cube),
+    "data.segment_queries": (_segment_cube, run_segment_queries),
+    "data.cluster_map": (_model, run_cluster_map),
+    "data.feature_build": (_raw_tables, run_feature_build),
+    "data.feature_incremental": (_feature_state, run_feature_incremental),
+    "score.predict": (_matrix, run_predict),
+    "score.predict_with_scores": (_matrix, run_predict_with_scores),
+    "score.sharded": (_matrix, run_sharded),
+    "score.csv_streaming": (_model, run_csv_streaming),
+    "score.csv_streaming_drift": (_drift_monitor, run_csv_streaming),
+    "score.parquet_streaming": (_model, run_parquet_streaming),
+    "score.export_csv": (_scored, run_export_csv),
+    "score.model_refresh": (None, run_model_refresh),
+    "page.data_preview": (_parquet, run_page("Data Preview & Statistik")),
+    "page.eda": (_parquet, run_page("EDA")),
+    "page.segments": (_parquet, run_page("Analitik Segmen")),
+}
+
+
+# =========================
+# WORKER (proses baru per skenario)
+# =========================
+def peak_rss():
+    """Peak RSS (byte): VmHWM di Linux (bisa di-reset), selain itu ru_maxrss proses."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    from olist_profiling import memory_snapshot
+
+    return memory_snapshot()["peak_rss"]
+
+def reset_peak_rss():
+    # Linux: "5" ke clear_refs me-reset VmHWM, jadi peak dari setup tidak menutupi peak skenario
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+def worker(name):
+    from olist_profiling import memory_snapshot
+
+    setup, run = SCENARIOS[name]
+    ctx = {"csv": DATA_NAME, "model": MODEL_NAME}
+    if setup is not None:
+        setup(ctx)
+    reset_peak_rss()
+    rss_before = memory_snapshot()["rss"]
+    t0 = time.perf_counter()
+    extra = run(ctx)
+    seconds = time.perf_counter() - t0
+    peak = peak_rss()
+    result = {"seconds": seconds, "peak_rss_mb": None, "peak_delta_mb": None}
+    if peak is not None:
+        result["peak_rss_mb"] = peak / 1e6
+        # Memori tambahan di atas RSS awal skenario (data hasil setup tidak dihitung)
+        result["peak_delta_mb"] = max(peak - (rss_before or 0), 0) / 1e6
+    if isinstance(extra, dict):
+        result.update(extra)
+    print(json.dumps(result))
+
+def link_or_copy(src, dst):
+    try:
+        os.symlink(src, dst)
+    except (OSError, NotImplementedError):
+        # Windows tanpa hak symlink
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copyfile(src, dst)
+
+def run_scenario(name, csv_path) -> dict:
+    workdir = tempfile.mkdtemp(prefix="olist_bench_")
+    try:
+        link_or_copy(os.path.abspath(csv_path), os.path.join(workdir, DATA_NAME))
+        for f in MODEL_FILES:
+            if os.path.exists(os.path.join(ROOT, f)):
+                link_or_copy(os.path.join(ROOT, f), os.path.join(workdir, f))
+        # Cache per skenario di workdir, supaya tiap skenario mulai dingin
+        env = {**os.environ, "PYTHONPATH": ROOT, "OLIST_PROFILE_LOG": os.path.join(workdir, "trace.jsonl"),
+               "OLIST_CACHE_DIR": os.path.join(workdir, ".olist_cache")}
+        env.pop("OLIST_METRICS_FILE", None)
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", name],
+                             cwd=workdir, env=env, capture_output=True, text=True)
+        if out.returncode != 0:
+            return {"error": (out.stderr.strip().splitlines() or ["?"])[-1]}
+        return json.loads(out.stdout.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# =========================
+# SUITE
+# =========================
+def dataset_for(rows, seed) -> str:
+    from synthetic_olist import write_synthetic_csv
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    path = os.path.join(DATA_DIR, f"olist_synthetic_{rows}_s{seed}.csv")
+    if not os.path.exists(path):
+        print(f"membuat dataset sintetis {rows:,} baris -> {path}", flush=True)
+        write_synthetic_csv(path, rows, seed)
+    return path
+
+def git_revision() -> dict:
+    def git(*args):
+        out = subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True)
+        return out.stdout.strip() if out.returncode == 0 else None
+
+    return {"commit": git("rev-parse", "--short", "HEAD"), "dirty": bool(git("status", "--porcelain", "-uno"))}
+
+def environment() -> dict:
+    import numpy
+    import pandas
+    import pyarrow
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+        "pyarrow": pyarrow.__version__,
+    }
+
+def select(only) -> list:
+    if not only:
+        return list(SCENARIOS)
+    prefixes = [p.strip() for p in only.split(",") if p.strip()]
+    return [name for name in SCENARIOS if any(name == p or name.startswith(p + ".") for p in prefixes)]
+
+def compare(results, baseline_path, threshold) -> list:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["rows"], r["scenario"]): r for r in json.load(f)["results"]}
+    regressions = []
+    print(f"\nvs {baseline_path}")
+    print(f"{'rows':>12} {'scenario':<28} {'before':>10} {'after':>10} {'ratio':>7}")
+    for r in results:
+        old = baseline.get((r["rows"], r["scenario"]))
+        if old is None or "seconds" not in old or "seconds" not in r:
+            continue
+        ratio = r["seconds"] / old["seconds"] if old["seconds"] > 0 else float("inf")
+        flag = "  REGRESSION" if ratio > threshold else ""
+        print(f"{r['rows']:>12,} {r['scenario']:<28} {old['seconds'] * 1e3:>8.0f}ms {r['seconds'] * 1e3:>8.0f}ms "
+              f"{ratio:>6.2f}x{flag}")
+        if flag:
+            regressions.append(r["scenario"])
+    return regressions
+
+
+def main():
+    from synthetic_olist import parse_rows
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Ukuran dataset, mis. 10k,1m,10m")
+    parser.add_argument("--only", help="Filter skenario, mis. data,score.predict,page")
+    parser.add_argument("--repeat", type=int, default=1, help="Ambil waktu terbaik dari N proses")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Path hasil (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="File JSON hasil run sebelumnya")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Rasio waktu yang dianggap regresi")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker)
+        return
+
+    names = select(args.only)
+    revision = git_revision()
+    results = []
+    datasets = {rows: dataset_for(rows, args.seed) for rows in [parse_rows(s) for s in args.sizes.split(",")]}
+    print(f"{'rows':>12} {'scenario':<28} {'time':>10} {'rows/s':>12} {'peak Δ':>10}")
+    for rows, csv_path in datasets.items():
+        for name in names:
+            runs = [run_scenario(name, csv_path) for _ in range(args.repeat)]
+            ok = [r for r in runs if "error" not in r]
+            best = min(ok, key=lambda r: r["seconds"]) if ok else runs[0]
+            results.append({"rows": rows, "scenario": name, **best})
+            if "error" in best:
+                print(f"{rows:>12,} {name:<28} ERROR {best['error']}")
+                continue
+            delta = "-" if best["peak_delta_mb"] is None else f"{best['peak_delta_mb']:,.0f}MB"
+            print(f"{rows:>12,} {name:<28} {best['seconds'] * 1e3:>8.0f}ms "
+                  f"{rows / best['seconds'] if best['seconds'] > 0 else 0:>12,.0f} {delta:>10}")
+
+    payload = {
+        "meta": {**revision, **environment(), "seed": args.seed, "repeat": args.repeat,
+                 "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z")},
+        "results": results,
+    }
+    json_path = args.json
+    if json_path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        suffix = "-dirty" if revision["dirty"] else ""
+        json_path = os.path.join(RESULTS_DIR, f"{revision['commit'] or 'nogit'}{suffix}.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    print(f"\nhasil -> {json_path}")
+
+    regressions = compare(results, args.compare, args.threshold) if args.compare else []
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
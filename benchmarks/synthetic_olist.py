@@ -0,0 +1,221 @@
+"""Generator dataset sintetis berbentuk Olist_Dataset_Clustering.csv (kolom, dtype dan distribusi mirip).
+
+Deterministik per (rows, seed) dan ditulis per chunk, jadi 10M baris tidak perlu muat di memori.
+    python benchmarks/synthetic_olist.py --rows 1000000 -o olist_1m.csv
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from olist_scoring import FEATURES  # noqa: E402
+
+COLUMNS = ["customer_unique_id"] + FEATURES + [
+    "product_category_name_english", "payment_type", "customer_state", "customer_city"
+]
+CHUNK_ROWS = 1_000_000
+
+# Proporsi kira-kira seperti data Olist asli
+PAYMENT_TYPES = {"credit_card": 0.74, "boleto": 0.19, "voucher": 0.055, "debit_card": 0.015}
+STATES = {
+    "SP": 0.42, "RJ": 0.13, "MG": 0.117, "RS": 0.055, "PR": 0.05, "SC": 0.036, "BA": 0.034, "DF": 0.021,
+    "ES": 0.02, "GO": 0.02, "PE": 0.017, "CE": 0.013, "PA": 0.01, "MT": 0.009, "MA": 0.007, "MS": 0.007,
+    "PB": 0.005, "PI": 0.005, "RN": 0.005, "AL": 0.004, "SE": 0.003, "TO": 0.003, "RO": 0.003, "AM": 0.0015,
+    "AC": 0.001, "AP": 0.0007, "RR": 0.0005,
+}
+CATEGORIES = [
+    "bed_bath_table", "health_beauty", "sports_leisure", "furniture_decor", "computers_accessories",
+    "housewares", "watches_gifts", "telephony", "garden_tools", "auto", "toys", "cool_stuff",
+    "perfumery", "baby", "electronics", "stationery", "fashion_bags_accessories", "pet_shop",
+    "office_furniture", "consoles_games", "luggage_accessories", "construction_tools_construction",
+    "home_appliances", "musical_instruments", "small_appliances", "home_construction", "books_general_interest",
+    "food", "furniture_living_room", "home_confort", "drinks", "audio", "market_place", "air_conditioning",
+    "kitchen_dining_laundry_garden_furniture", "industry_commerce_and_business", "fixed_telephony",
+    "art", "christmas_supplies", "fashion_shoes", "signaling_and_security", "computers", "cine_photo",
+    "furniture_bedroom", "music", "dvds_blu_ray", "party_supplies", "tablets_printing_image", "flowers",
+    "security_and_services",
+]
+TOP_CITIES = [
+    "sao paulo", "rio de janeiro", "belo horizonte", "brasilia", "curitiba", "campinas", "porto alegre",
+    "salvador", "guarulhos", "sao bernardo do campo", "niteroi", "santo andre", "osasco", "santos",
+    "goiania", "sao jose dos campos", "fortaleza", "sorocaba", "recife", "florianopolis",
+]
+# Ekor panjang kota (data asli ~4.000 kota); ikut menentukan apakah kolom jadi category di Parquet
+N_CITIES = 4000
+
+
+def zipf_weights(n, s=1.1) -> np.ndarray:
+    w = 1.0 / np.arange(1, n + 1) ** s
+    return w / w.sum()
+
+def choice(rng, values, weights, n) -> np.ndarray:
+    values = np.asarray(values, dtype=object)
+    weights = np.asarray(weights, dtype=np.float64)
+    return values[rng.choice(values.size, n, p=weights / weights.sum())]
+
+
+# =========================
+# FEATURES
+# =========================
+def synthetic_features(rng, n) -> dict:
+    """Kolom numerik: price/monetary lognormal (skewed), frequency dan review_score diskrit seperti Olist."""
+    frequency = rng.choice([1, 2, 3, 4], n, p=[0.97, 0.025, 0.004, 0.001])
+    price = np.round(rng.lognormal(4.3, 1.0, n), 2)
+    freight = np.round(rng.lognormal(2.9, 0.5, n), 2)
+    monetary = np.round(price * frequency + freight, 2)
+    # Cicilan naik dengan harga; 0–24 seperti data asli
+    installments = np.clip(np.round(rng.gamma(1.5, 1.0 + price / 120.0)), 0, 24).astype(np.int64)
+    return {
+        "recency": rng.integers(0, 730, n),
+        "frequency": frequency,
+        "monetary": monetary,
+        "payment_installments": installments,
+        "price": price,
+        "review_score": rng.choice([1, 2, 3, 4, 5], n, p=[0.11, 0.03, 0.08, 0.19, 0.59]),
+    }
+
+def synthetic_rfm(n, seed=0) -> np.ndarray:
+    """Matriks feature float64 (urutan FEATURES) tanpa kolom teks, untuk benchmark scoring."""
+    columns = synthetic_features(np.random.default_rng(seed), n)
+    return np.column_stack([columns[f] for f in FEATURES]).astype(np.float64)
+
+
+# =========================
+# FULL DATASET
+# =========================
+def synthetic_frame(n, seed=0, offset=0) -> pd.DataFrame:
+    rng = np.random.default_rng([seed, offset])
+    data = {"customer_unique_id": np.frombuffer(rng.bytes(16 * n).hex().encode(), dtype="S32").astype(str)}
+    data.update(synthetic_features(rng, n))
+
+    payment = choice(rng, list(PAYMENT_TYPES), list(PAYMENT_TYPES.values()), n)
+    # Boleto / debit tidak dicicil
+    data["payment_installments"] = np.where(np.isin(payment, ["boleto", "debit_card"]), 1,
+                                            data["payment_installments"])
+    data["product_category_name_english"] = choice(rng, CATEGORIES, zipf_weights(len(CATEGORIES), 0.9), n)
+    data["payment_type"] = payment
+    data["customer_state"] = choice(rng, list(STATES), list(STATES.values()), n)
+    cities = TOP_CITIES + [f"cidade {i:04d}" for i in range(N_CITIES - len(TOP_CITIES))]
+    data["customer_city"] = choice(rng, cities, zipf_weights(len(cities)), n)
+    return pd.DataFrame(data, columns=COLUMNS)
+
+# =========================
+# RAW TABLES (input olist_features)
+# =========================
+RAW_START = np.datetime64("2016-09-01T00:00:00")
+RAW_DAYS = 760
+ORDER_STATUSES = {"delivered": 0.97, "shipped": 0.011, "canceled": 0.006, "unavailable": 0.006, "invoiced": 0.007}
+N_PRODUCTS = 30_000
+
+def _hex_ids(values, salt) -> np.ndarray:
+    # Id 32 karakter hex deterministik dari bilangan bulat (mirip id Olist)
+    mixed = (np.asarray(values, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)) ^ np.uint64(salt)
+    return np.char.add(np.char.mod("%016x", mixed), np.char.mod("%016x", mixed ^ np.uint64(0xFFFFFFFFFFFFFFFF)))
+
+def synthetic_raw_tables(n_orders, seed=0, offset=0, start_order=0) -> dict:
+    """Tabel orders, order_items, payments, reviews, customers untuk order [start_order, start_order + n_orders).
+
+    Tiap order punya customer_id sendiri seperti Olist; ~3% customer_unique_id berbelanja lebih dari sekali.
+    """
+    rng = np.random.default_rng([seed, offset])
+    order_no = np.arange(start_order, start_order + n_orders)
+    order_id = _hex_ids(order_no, 1)
+    customer_id = _hex_ids(order_no, 2)
+    repeat = rng.random(n_orders) < 0.03
+    unique_no = np.where(repeat, rng.integers(0, start_order + n_orders, n_orders), order_no)
+    purchase = RAW_START + (rng.random(n_orders) * RAW_DAYS * 86_400).astype("timedelta64[s]")
+    status = choice(rng, list(ORDER_STATUSES), list(ORDER_STATUSES.values()), n_orders)
+    orders = pd.DataFrame({"order_id": order_id, "customer_id": customer_id, "order_status": status,
+                           "order_purchase_timestamp": purchase})
+
+    cities = TOP_CITIES + [f"cidade {i:04d}" for i in range(N_CITIES - len(TOP_CITIES))]
+    customers = pd.DataFrame({
+        "customer_id": customer_id, "customer_unique_id": _hex_ids(unique_no, 3),
+        "customer_zip_code_prefix": rng.integers(1000, 99999, n_orders),
+        "customer_city": np.asarray(cities, dtype=object)[np.minimum(rng.zipf(1.6, n_orders) - 1, len(cities) - 1)],
+        "customer_state": choice(rng, list(STATES), list(STATES.values()), n_orders),
+    })
+
+    n_items = rng.choice([1, 2, 3, 4], n_orders, p=[0.9, 0.07, 0.02, 0.01])
+    item_order = np.repeat(np.arange(n_orders), n_items)
+    price = np.round(rng.lognormal(4.3, 1.0, item_order.size), 2)
+    items = pd.DataFrame({
+        "order_id": order_id[item_order],
+        "order_item_id": np.arange(item_order.size) - np.repeat(np.cumsum(n_items) - n_items, n_items) + 1,
+        "product_id": _hex_ids(rng.choice(N_PRODUCTS, item_order.size, p=zipf_weights(N_PRODUCTS, 0.8)), 4),
+        "price": price,
+        "freight_value": np.round(rng.lognormal(2.9, 0.5, item_order.size), 2),
+    })
+    order_total = np.bincount(item_order, weights=price + items["freight_value"].to_numpy(), minlength=n_orders)
+
+    payment_type = choice(rng, list(PAYMENT_TYPES), list(PAYMENT_TYPES.values()), n_orders)
+    installments = np.where(np.isin(payment_type, ["boleto", "debit_card"]), 1,
+                            np.clip(np.round(rng.gamma(1.5, 1.0 + order_total / 120.0)), 1, 24)).astype(np.int64)
+    payments = pd.DataFrame({"order_id": order_id, "payment_sequential": 1, "payment_type": payment_type,
+                             "payment_installments": installments, "payment_value": np.round(order_total, 2)})
+
+    has_review = rng.random(n_orders) < 0.99
+    created = purchase + (rng.integers(3, 45, n_orders) * 86_400).astype("timedelta64[s]")
+    reviews = pd.DataFrame({
+        "review_id": _hex_ids(order_no, 5), "order_id": order_id,
+        "review_score": rng.choice([1, 2, 3, 4, 5], n_orders, p=[0.11, 0.03, 0.08, 0.19, 0.59]),
+        "review_creation_date": created.astype("datetime64[D]"),
+    })[has_review]
+    return {"orders": orders, "order_items": items, "payments": payments, "reviews": reviews, "customers": customers}
+
+def write_synthetic_raw_tables(out_dir, n_orders, seed=0, until=None, chunk_rows=CHUNK_ROWS) -> str:
+    """Tulis tabel mentah sintetis (CSV, nama file seperti dataset Kaggle) ke `out_dir`.
+
+    `until` (datetime64) = snapshot: hanya order yang dibeli dan review yang dibuat sebelum waktu itu.
+    """
+    from olist_features import RAW_TABLES
+
+    os.makedirs(out_dir, exist_ok=True)
+    for i, start in enumerate(range(0, n_orders, chunk_rows)):
+        tables = synthetic_raw_tables(min(chunk_rows, n_orders - start), seed, offset=i, start_order=start)
+        if until is not None:
+            tables["orders"] = tables["orders"][tables["orders"]["order_purchase_timestamp"] < until]
+            tables["reviews"] = tables["reviews"][tables["reviews"]["review_creation_date"] < until]
+        for name, df in tables.items():
+            df.to_csv(os.path.join(out_dir, RAW_TABLES[name] + ".csv"), index=False, header=(i == 0),
+                      mode="w" if i == 0 else "a")
+    products = pd.DataFrame({"product_id": _hex_ids(np.arange(N_PRODUCTS), 4),
+                             "product_category_name": choice(np.random.default_rng(seed), CATEGORIES,
+                                                             zipf_weights(len(CATEGORIES), 0.9), N_PRODUCTS)})
+    products.to_csv(os.path.join(out_dir, RAW_TABLES["products"] + ".csv"), index=False)
+    return out_dir
+
+def write_synthetic_csv(path, rows, seed=0, chunk_rows=CHUNK_ROWS) -> str:
+    """Tulis dataset sintetis ke `path` (atomik, per chunk). Chunk ke-i selalu sama untuk seed yang sama."""
+    tmp_path = f"{path}.{os.getpid()}.part"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        for i, start in enumerate(range(0, rows, chunk_rows)):
+            frame = synthetic_frame(min(chunk_rows, rows - start), seed, offset=i)
+            frame.to_csv(f, index=False, header=(i == 0))
+    os.replace(tmp_path, path)
+    return path
+
+def parse_rows(value) -> int:
+    """"10k" / "1m" / "10M" / "250000" -> jumlah baris."""
+    value = str(value).strip().lower().replace("_", "")
+    scale = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    return int(float(value[:-1] if scale > 1 else value) * scale)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", default="1m", help="Jumlah baris, mis. 10k, 1m, 10m")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", required=True)
+    args = parser.parse_args()
+    rows = parse_rows(args.rows)
+    write_synthetic_csv(args.output, rows, args.seed)
+    print(f"{rows:,} baris -> {args.output} ({os.path.getsize(args.output) / 1e6:,.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import numpy as np
+import plotly.graph_objects as go
+
+
+# =========================
+# PRE-BINNED HISTOGRAM
+# =========================
+def bin_labels(edges) -> list:
+    return [f"{a:,.0f}–{b:,.0f}" if b - a >= 1 else f"{a:,.2f}–{b:,.2f}" for a, b in zip(edges[:-1], edges[1:])]
+
+def binned_histogram_figure(hist: dict, title: str, color="#4facfe"):
+    """Bar trace dari edges/counts yang sudah dihitung di server (ukuran payload tetap)."""
+    edges = np.asarray(hist["edges"], dtype=np.float64)
+    counts = np.asarray(hist["counts"])
+    scale = hist.get("scale", "linear")
+
+    if scale == "linear":
+        bar = go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges), marker_color=color)
+    else:
+        # Bin log/quantile lebarnya tidak sama -> tampilkan sebagai kategori berurutan
+        y = counts / np.diff(edges) if scale == "quantile" else counts
+        bar = go.Bar(x=bin_labels(edges), y=y, marker_color=color, customdata=counts,
+                     hovertemplate="%{x}<br>Count: %{customdata:,}<extra></extra>")
+
+    fig = go.Figure(bar)
+    fig.update_layout(title=title, bargap=0 if scale == "linear" else 0.05)
+    return fig
+
+def histogram_y_title(hist: dict) -> str:
+    return "Density" if hist.get("scale") == "quantile" else "Count"
@@ -0,0 +1,234 @@
+import json
+import os
+
+import numpy as np
+import pyarrow.parquet as pq
+
+from olist_data import CACHE_DIR, ensure_parquet, file_fingerprint
+from olist_model import as_centroid_predictor, load_model_artifact, model_artifact_path
+
+# =========================
+# CLUSTER MAP
+# =========================
+# Proyeksi 2D (PCA di ruang RobustScaler, data + centroid) yang diagregasi di server: per cluster satu
+# raster densitas GRID x GRID dan sampel acak terstratifikasi maksimal POINTS_PER_CLUSTER titik.
+# Ukuran yang dikirim ke browser tetap (raster + k * POINTS_PER_CLUSTER titik) berapa pun jumlah barisnya.
+MAP_VERSION = 1
+GRID = 256
+POINTS_PER_CLUSTER = 2_000
+# Baris untuk fit PCA & jangkauan sumbu (diambil berjarak rata dari seluruh file)
+FIT_ROWS = 100_000
+# Fit PCA memakai nilai yang di-clip ke quantile ini per feature, supaya outlier monetary/price
+# tidak menentukan arah komponen; jangkauan sumbu memakai quantile yang sama pada hasil proyeksi
+CLIP_QUANTILES = (0.005, 0.995)
+BATCH_SIZE = 500_000
+
+
+def fit_projection(Z: np.ndarray, centroids: np.ndarray) -> tuple:
+    """(mean, components (2, d), explained ratio) dari PCA atas sampel Z + centroid (ruang scaler)."""
+    if len(Z):
+        lo, hi = np.quantile(Z, CLIP_QUANTILES, axis=0)
+        Z = np.clip(Z, lo, hi)
+    data = np.vstack([Z, centroids])
+    mean = data.mean(axis=0)
+    _, s, vt = np.linalg.svd(data - mean, full_matrices=False)
+    components = vt[:2]
+    # Tanda komponen dibuat deterministik (elemen terbesar positif) supaya orientasi plot stabil
+    components *= np.sign(components[np.arange(len(components)), np.abs(components).argmax(axis=1)])[:, None]
+    var = s ** 2
+    return mean, components, var[:2] / max(var.sum(), 1e-12)
+
+
+class ClusterMap:
+    """Agregat read-only: raster densitas per cluster, sampel titik per cluster dan posisi centroid (2D)."""
+
+    def __init__(self, features, center, scale, mean, components, explained, bounds, density,
+                 sample_xy, sample_cluster, sample_values, centroids_xy, counts, rows, outside, model_key=None):
+        self.features = list(features)
+        self.center = np.asarray(center, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.components = np.asarray(components, dtype=np.float64)
+        self.explained = np.asarray(explained, dtype=np.float64)
+        # (x0, x1, y0, y1) jangkauan raster
+        self.bounds = [float(b) for b in bounds]
+        self.density = density
+        self.sample_xy = sample_xy
+        self.sample_cluster = sample_cluster
+        self.sample_values = sample_values
+        self.centroids_xy = centroids_xy
+        self.counts = counts
+        self.rows = rows
+        self.outside = outside
+        # olist_model.model_key model yang dipakai membangun peta (geometri centroid/scaler)
+        self.model_key = model_key
+
+    @property
+    def n_clusters(self) -> int:
+        return int(self.density.shape[0])
+
+    @property
+    def complete(self) -> bool:
+        """True jika sampel memuat semua baris (data kecil -> tidak perlu raster)."""
+        return int(self.counts.sum()) == len(self.sample_cluster)
+
+    def project(self, X) -> np.ndarray:
+        Z = (np.asarray(X, dtype=np.float64) - self.center) / self.scale
+        return (Z - self.mean) @ self.components.T
+
+    def density_rgba(self, colors, gamma=0.5) -> np.ndarray:
+        """Gambar (GRID, GRID, 4) uint8, baris 0 = y terkecil: warna = campuran warna cluster menurut jumlah
+        titik di piksel, alpha = densitas total (skala log)."""
+        rgb = np.array([[int(c[i:i + 2], 16) for i in (1, 3, 5)] for c in colors], dtype=np.float64)
+        total = self.density.sum(axis=0).astype(np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mix = np.tensordot(self.density.astype(np.float64), rgb, axes=(0, 0)) / total[..., None]
+        level = np.log1p(total) / max(np.log1p(total.max()), 1e-12)
+        alpha = np.where(total > 0, 0.2 + 0.8 * level ** gamma, 0.0)
+        image = np.concatenate([np.nan_to_num(mix), alpha[..., None] * 255], axis=-1)
+        return np.clip(np.rint(image), 0, 255).astype(np.uint8)
+
+    # ---- persistence (npz + metadata JSON di dalamnya) ----
+    def save(self, path):
+        meta = {"version": MAP_VERSION, "features": self.features, "bounds": self.bounds,
+                "rows": self.rows, "outside": self.outside, "model": self.model_key}
+        arrays = {
+            "meta": np.array(json.dumps(meta)), "center": self.center, "scale": self.scale, "mean": self.mean,
+            "components": self.components, "explained": self.explained,
+            "density": self.density.astype(np.int32 if self.rows < 2 ** 31 else np.int64),
+            "sample_xy": self.sample_xy, "sample_cluster": self.sample_cluster,
+            "sample_values": self.sample_values, "centroids_xy": self.centroids_xy, "counts": self.counts,
+        }
+        tmp_path = f"{path}.{os.getpid()}.part"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path) -> "ClusterMap":
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            return cls(meta["features"], data["center"], data["scale"], data["mean"], data["components"],
+                       data["explained"], meta["bounds"], data["density"], data["sample_xy"],
+                       data["sample_cluster"], data["sample_values"], data["centroids_xy"], data["counts"],
+                       meta["rows"], meta["outside"], meta.get("model"))
+
+
+def _fit_rows(parquet_path, features, batch_size) -> np.ndarray:
+    # Sampel berjarak rata (setiap `step` baris) tanpa memuat seluruh file
+    pf = pq.ParquetFile(parquet_path)
+    step = max(1, -(-pf.metadata.num_rows // FIT_ROWS))
+    parts, offset = [], 0
+    for batch in pf.iter_batches(batch_size=batch_size, columns=list(features)):
+        start = (-offset) % step
+        X = np.column_stack([batch.column(f).to_numpy(zero_copy_only=False) for f in features]).astype(np.float64)
+        parts.append(X[start::step])
+        offset += batch.num_rows
+    X = np.concatenate(parts) if parts else np.empty((0, len(features)))
+    return X[np.isfinite(X).all(axis=1)]
+
+def build_cluster_map(parquet_path, model, features, label_column=None, batch_size=BATCH_SIZE,
+                      points_per_cluster=POINTS_PER_CLUSTER, grid=GRID, seed=0) -> ClusterMap:
+    """Dua pass atas Parquet: fit PCA dari sampel, lalu per batch proyeksi + bincount raster + sampel bottom-k.
+
+    Label diambil dari `label_column` (file hasil scoring) atau dari `model.predict` (dataset).
+    """
+    geometry = as_centroid_predictor(model)
+    features = list(features)
+    k = geometry.n_clusters
+    Z_fit = (_fit_rows(parquet_path, features, batch_size) - geometry.center) / geometry.scale
+    mean, components, explained = fit_projection(Z_fit, geometry.centroids)
+    centroids_xy = (geometry.centroids - mean) @ components.T
+
+    # Jangkauan raster: quantile proyeksi sampel. Centroid cluster kecil yang jauh (mis. outlier monetary)
+    # tidak ikut memperlebar, supaya resolusi raster tidak habis untuk ruang kosong
+    if len(Z_fit):
+        lo, hi = np.quantile((Z_fit - mean) @ components.T, CLIP_QUANTILES, axis=0)
+    else:
+        lo, hi = centroids_xy.min(axis=0), centroids_xy.max(axis=0)
+    pad = np.maximum((hi - lo) * 0.05, 1e-9)
+    lo, hi = lo - pad, hi + pad
+    del Z_fit
+
+    rng = np.random.default_rng(seed)
+    density = np.zeros(k * grid * grid, dtype=np.int64)
+    counts = np.zeros(k, dtype=np.int64)
+    # Sampel per cluster = `points_per_cluster` baris dengan prioritas acak terkecil (uniform tanpa pengembalian)
+    kept = [(np.empty(0), np.empty((0, 2)), np.empty((0, len(features)))) for _ in range(k)]
+    rows = outside = 0
+    columns = features + ([label_column] if label_column else [])
+    for batch in pq.ParquetFile(parquet_path).iter_batches(batch_size=batch_size, columns=columns):
+        X = np.column_stack([batch.column(f).to_numpy(zero_copy_only=False) for f in features]).astype(np.float64)
+        if label_column:
+            labels = batch.column(label_column).to_numpy(zero_copy_only=False).astype(np.float64)
+            ok = np.isfinite(X).all(axis=1) & np.isfinite(labels)
+            X, labels = X[ok], labels[ok].astype(np.int64)
+        else:
+            X = X[np.isfinite(X).all(axis=1)]
+            labels = np.asarray(model.predict(X), dtype=np.int64)
+        if not len(X):
+            continue
+        xy = ((X - geometry.center) / geometry.scale - mean) @ components.T
+        cell = np.floor((xy - lo) / (hi - lo) * grid).astype(np.int64)
+        inside = ((cell >= 0) & (cell < grid)).all(axis=1)
+        flat = (labels[inside] * grid + cell[inside, 1]) * grid + cell[inside, 0]
+        density += np.bincount(flat, minlength=density.size)
+        counts += np.bincount(labels, minlength=k)
+        rows += len(X)
+        outside += int((~inside).sum())
+
+        priority = rng.random(len(X))
+        for c in range(k):
+            sel = labels == c
+            if not sel.any():
+                continue
+            p = np.concatenate([kept[c][0], priority[sel]])
+            pts = np.concatenate([kept[c][1], xy[sel]])
+            vals = np.concatenate([kept[c][2], X[sel]])
+            if len(p) > points_per_cluster:
+                top = np.argpartition(p, points_per_cluster)[:points_per_cluster]
+                p, pts, vals = p[top], pts[top], vals[top]
+            kept[c] = (p, pts, vals)
+
+    return ClusterMap(
+        features, geometry.center, geometry.scale, mean, components, explained,
+        [lo[0], hi[0], lo[1], hi[1]], density.reshape(k, grid, grid),
+        np.concatenate([pts for _, pts, _ in kept]).astype(np.float32),
+        np.concatenate([np.full(len(p), c, dtype=np.int32) for c, (p, _, _) in enumerate(kept)]),
+        np.concatenate([vals for _, _, vals in kept]).astype(np.float32),
+        centroids_xy, counts, rows, outside,
+    )
+
+def cluster_map_path(csv_path, model_path) -> str:
+    key = f"{file_fingerprint(csv_path)}_{file_fingerprint(model_artifact_path(model_path))}"
+    return os.path.join(CACHE_DIR, f"cluster_map_v{MAP_VERSION}_{key}.npz")
+
+def load_cluster_map(csv_path, model_path, features) -> ClusterMap:
+    """Peta cluster untuk (dataset, model), dibangun sekali dan disimpan di CACHE_DIR."""
+    path = cluster_map_path(csv_path, model_path)
+    if os.path.exists(path):
+        cmap = ClusterMap.load(path)
+        if cmap.features == list(features):
+            return cmap
+    cmap = build_cluster_map(ensure_parquet(csv_path), load_model_artifact(model_path), features)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    cmap.save(path)
+    return cmap
+
+def result_cluster_map_path(path) -> str:
+    return path + ".clustermap.npz"
+
+def load_result_cluster_map(path, model, features, model_key=None) -> ClusterMap:
+    """Peta cluster untuk file hasil scoring (label dari kolom `cluster`), disimpan di samping file hasil.
+
+    Dibangun ulang jika `model_key` (olist_model.model_key) berbeda dari model yang dipakai saat disimpan.
+    """
+    out_path = result_cluster_map_path(path)
+    if os.path.exists(out_path) and os.path.getmtime(out_path) >= os.path.getmtime(path):
+        cmap = ClusterMap.load(out_path)
+        if cmap.features == list(features) and cmap.model_key == model_key:
+            return cmap
+    cmap = build_cluster_map(path, model, features, label_column="cluster")
+    cmap.model_key = model_key
+    cmap.save(out_path)
+    return cmap
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+# Di samping modul (bukan relatif cwd), supaya app, CLI scoring dan worker job memakai cache yang sama
+# dari direktori mana pun dijalankan; bisa dipindah lewat env OLIST_CACHE_DIR
+CACHE_DIR = os.environ.get("OLIST_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".olist_cache")
+
+# Kolom teks dengan jumlah nilai unik <= rasio ini disimpan sebagai categorical (dictionary-encoded)
+MAX_CATEGORY_RATIO = 0.5
+
+
+# =========================
+# CSV -> PARQUET
+# =========================
+def parquet_path_for(csv_path) -> str:
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+def optimize_dtypes(df: pd.DataFrame, max_category_ratio=MAX_CATEGORY_RATIO) -> pd.DataFrame:
+    for c in df.columns:
+        col = df[c]
+        if col.dtype == object:
+            if col.nunique(dropna=True) <= max_category_ratio * len(col):
+                df[c] = col.astype("category")
+        elif pd.api.types.is_integer_dtype(col):
+            df[c] = pd.to_numeric(col, downcast="integer")
+        elif pd.api.types.is_float_dtype(col):
+            # Float hanya diturunkan ke float32 jika tidak ada nilai yang berubah
+            col32 = col.astype(np.float32)
+            if np.array_equal(col32.to_numpy(np.float64), col.to_numpy(), equal_nan=True):
+                df[c] = col32
+    return df
+
+def convert_csv_to_parquet(csv_path, parquet_path=None) -> str:
+    parquet_path = parquet_path or parquet_path_for(csv_path)
+    df = optimize_dtypes(pd.read_csv(csv_path))
+    tmp_path = parquet_path + ".part"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, parquet_path)
+    return parquet_path
+
+def ensure_parquet(csv_path) -> str:
+    """Path Parquet untuk `csv_path`, dikonversi sekali jika belum ada atau lebih lama dari CSV."""
+    parquet_path = parquet_path_for(csv_path)
+    if not os.path.exists(parquet_path) or os.path.getmtime(parquet_path) < os.path.getmtime(csv_path):
+        convert_csv_to_parquet(csv_path, parquet_path)
+    return parquet_path
+
+
+# =========================
+# COLUMN LOADERS
+# =========================
+def dataset_columns(csv_path) -> list:
+    return pq.ParquetFile(ensure_parquet(csv_path)).schema_arrow.names
+
+def read_columns(csv_path, columns=None) -> pd.DataFrame:
+    columns = list(columns) if columns is not None else None
+    return pd.read_parquet(ensure_parquet(csv_path), columns=columns)
+
+def read_head(csv_path, n) -> pd.DataFrame:
+    pf = pq.ParquetFile(ensure_parquet(csv_path))
+    batch = next(pf.iter_batches(batch_size=n), None)
+    if batch is None:
+        return pf.schema_arrow.empty_table().to_pandas()
+    return batch.to_pandas()
+
+
+# =========================
+# EDA AGGREGATES
+# =========================
+HIST_BINS = 40
+HIST_SCALES = ("linear", "log", "quantile")
+# Feature yang sangat skewed juga disimpan dengan bin log dan quantile
+SKEWED_FEATURES = ("monetary", "price")
+# Naikkan jika struktur agregat berubah, supaya cache lama tidak dipakai
+EDA_CACHE_VERSION = 2
+# Kolom value_counts untuk halaman EDA -> jumlah kategori teratas (None = semua)
+EDA_COUNT_COLUMNS = {
+    "payment_type": None,
+    "customer_state": 5,
+    "product_category_name_english": 10,
+}
+
+_fingerprints = {}
+
+def file_fingerprint(path, block_size=1 << 20) -> str:
+    """Hash isi file, di-memo per (path, mtime, size) supaya tidak dihitung ulang tiap rerun."""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    if memo_key not in _fingerprints:
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                h.update(block)
+        _fingerprints[memo_key] = h.hexdigest()
+    return _fingerprints[memo_key]
+
+def histogram_edges(values: np.ndarray, bins=HIST_BINS, scale="linear") -> np.ndarray:
+    if values.size == 0:
+        return np.linspace(0.0, 1.0, bins + 1)
+    lo, hi = values.min(), values.max()
+    if scale == "log" and lo >= 0 and hi > lo:
+        # log1p supaya nilai 0 tetap masuk bin pertama
+        return np.expm1(np.linspace(np.log1p(lo), np.log1p(hi), bins + 1))
+    if scale == "quantile":
+        edges = np.unique(np.quantile(values, np.linspace(0.0, 1.0, bins + 1)))
+        if edges.size > 1:
+            return edges
+    return np.histogram_bin_edges(values, bins=bins)
+
+def histogram_bins(values, bins=HIST_BINS, scale="linear") -> dict:
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    counts, edges = np.histogram(values, bins=histogram_edges(values, bins, scale))
+    return {"scale": scale, "edges": edges.tolist(), "counts": counts.tolist()}
+
+def compute_eda_aggregates(csv_path, features) -> dict:
+    columns = dataset_columns(csv_path)
+    agg = {"counts": {}, "histograms": {}}
+    for col, top in EDA_COUNT_COLUMNS.items():
+        if col not in columns:
+            continue
+        vc = read_columns(csv_path, [col])[col].value_counts()
+        vc = vc[vc > 0]
+        if top is not None:
+            vc = vc.head(top)
+        agg["counts"][col] = {"labels": [str(x) for x in vc.index], "values": vc.tolist()}
+    for f in features:
+        if f not in columns:
+            continue
+        values = read_columns(csv_path, [f])[f].to_numpy()
+        scales = HIST_SCALES if f in SKEWED_FEATURES else ("linear",)
+        agg["histograms"][f] = {scale: histogram_bins(values, scale=scale) for scale in scales}
+    return agg
+
+def load_eda_aggregates(csv_path, features) -> dict:
+    """Agregat EDA (counts + histogram) per versi dataset, disimpan di CACHE_DIR dengan key hash isi CSV."""
+    cache_path = os.path.join(CACHE_DIR, f"eda_v{EDA_CACHE_VERSION}_{file_fingerprint(csv_path)}.json")
+    if os.path.exists(cache_path):
+        with open(cache_path, encoding="utf-8") as f:
+            agg = json.load(f)
+        if set(agg["histograms"]) >= {f for f in features if f in dataset_columns(csv_path)}:
+            return agg
+
+    agg = compute_eda_aggregates(csv_path, features)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = cache_path + ".part"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(agg, f)
+    os.replace(tmp_path, cache_path)
+    return agg
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Konversi dataset CSV ke Parquet (sekali)")
+    parser.add_argument("csv_path", nargs="?", default="Olist_Dataset_Clustering.csv")
+    args = parser.parse_args()
+
+    out_path = convert_csv_to_parquet(args.csv_path)
+    print(f"{args.csv_path}: {os.path.getsize(args.csv_path):,} bytes")
+    print(f"{out_path}: {os.path.getsize(out_path):,} bytes")
+    print(pd.read_parquet(out_path).dtypes.to_string())
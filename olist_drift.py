@@ -0,0 +1,169 @@
+import json
+import os
+
+import numpy as np
+
+from olist_data import CACHE_DIR, file_fingerprint, read_columns
+from olist_model import as_centroid_predictor, load_model_artifact, model_artifact_path
+
+# Jumlah bin referensi per feature (cut point = quantile data referensi)
+DRIFT_BINS = 10
+# Naikkan jika struktur profil berubah, supaya profil lama tidak dipakai
+PROFILE_VERSION = 1
+# Batas PSI yang umum dipakai: < 0.1 stabil, 0.1–0.25 bergeser, > 0.25 drift besar
+PSI_WARN = 0.1
+PSI_ALERT = 0.25
+# Baris dengan jarak ke centroid di atas quantile ini (di data referensi) dianggap out-of-distribution
+OOD_QUANTILE = 0.99
+DISTANCE = "centroid_distance"
+_EPS = 1e-4
+
+
+# =========================
+# STREAMING HISTOGRAM
+# =========================
+class BinnedCounts:
+    """Histogram dengan cut point tetap dari referensi; mergeable (cukup jumlahkan counts)."""
+
+    def __init__(self, cuts, counts=None):
+        self.cuts = np.asarray(cuts, dtype=np.float64)
+        self.counts = np.zeros(self.cuts.size + 1, dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+
+    def update(self, values: np.ndarray):
+        # Bin i = [cuts[i-1], cuts[i]); hitung #(values < cut) per cut lalu selisihkan.
+        # Untuk ~10 cut ini jauh lebih cepat daripada searchsorted + bincount.
+        below = [np.count_nonzero(values < c) for c in self.cuts]
+        self.counts += np.diff(below, prepend=0, append=values.size)
+
+    def merge(self, other: "BinnedCounts"):
+        self.counts += other.counts
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def proportions(self) -> np.ndarray:
+        return self.counts / max(self.total, 1)
+
+def reference_cuts(values: np.ndarray, bins=DRIFT_BINS) -> np.ndarray:
+    return np.unique(np.quantile(values, np.linspace(0.0, 1.0, bins + 1)[1:-1]))
+
+def psi(expected: np.ndarray, actual: np.ndarray) -> float:
+    e = np.maximum(expected, _EPS)
+    a = np.maximum(actual, _EPS)
+    return float(((a - e) * np.log(a / e)).sum())
+
+def binned_ks(expected: np.ndarray, actual: np.ndarray) -> float:
+    # KS dihitung pada batas bin referensi (aproksimasi, cukup untuk monitoring)
+    return float(np.abs(np.cumsum(expected) - np.cumsum(actual)).max())
+
+def drift_level(score) -> str:
+    if score >= PSI_ALERT:
+        return "drift"
+    if score >= PSI_WARN:
+        return "bergeser"
+    return "stabil"
+
+
+# =========================
+# REFERENCE PROFILE
+# =========================
+def build_reference_profile(csv_path, model, features, bins=DRIFT_BINS) -> dict:
+    predictor = as_centroid_predictor(model)
+    X = read_columns(csv_path, features).to_numpy(dtype=np.float64)
+    X = X[np.isfinite(X).all(axis=1)]
+    labels, dist, _, _ = predictor.predict_with_scores(X)
+
+    columns = {f: X[:, j] for j, f in enumerate(features)}
+    columns[DISTANCE] = dist
+    profile = {"version": PROFILE_VERSION, "features": list(features), "rows": int(len(X)), "histograms": {}}
+    for name, values in columns.items():
+        hist = BinnedCounts(reference_cuts(values, bins))
+        hist.update(values)
+        profile["histograms"][name] = {"cuts": hist.cuts.tolist(), "counts": hist.counts.tolist()}
+    profile["ood_threshold"] = float(np.quantile(dist, OOD_QUANTILE))
+    profile["cluster_share"] = (np.bincount(labels, minlength=predictor.n_clusters) / len(X)).tolist()
+    return profile
+
+def reference_profile_path(csv_path, model_path) -> str:
+    key = f"{file_fingerprint(csv_path)}_{file_fingerprint(model_artifact_path(model_path))}"
+    return os.path.join(CACHE_DIR, f"drift_profile_v{PROFILE_VERSION}_{key}.json")
+
+def ensure_reference_profile(csv_path, model_path, features) -> str:
+    """Path profil referensi untuk (dataset, model), dihitung sekali dan disimpan di CACHE_DIR."""
+    path = reference_profile_path(csv_path, model_path)
+    if not os.path.exists(path):
+        profile = build_reference_profile(csv_path, load_model_artifact(model_path), features)
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.part"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(profile, f)
+        os.replace(tmp_path, path)
+    return path
+
+def load_reference_profile(path) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# =========================
+# DRIFT MONITOR
+# =========================
+class DriftMonitor:
+    """Ringkasan streaming batch baru (satu pass, per chunk) untuk dibandingkan dengan profil referensi."""
+
+    def __init__(self, profile: dict):
+        self.profile = profile
+        self.features = profile["features"]
+        self.histograms = {name: BinnedCounts(h["cuts"]) for name, h in profile["histograms"].items()}
+        self.cluster_counts = np.zeros(len(profile["cluster_share"]), dtype=np.int64)
+        self.ood_rows = 0
+
+    def update(self, X: np.ndarray, labels: np.ndarray, dist: np.ndarray):
+        """`X` feature (urutan profile["features"]), `labels` dan `dist` dari predict_with_scores."""
+        # Per kolom dibaca dari salinan transpose yang contiguous (gratis jika X berurutan kolom)
+        columns = np.ascontiguousarray(X.T)
+        for j, f in enumerate(self.features):
+            self.histograms[f].update(columns[j])
+        self.histograms[DISTANCE].update(dist)
+        self.cluster_counts += np.bincount(labels, minlength=self.cluster_counts.size)
+        self.ood_rows += int((dist > self.profile["ood_threshold"]).sum())
+
+    def merge(self, other: "DriftMonitor"):
+        for name, hist in self.histograms.items():
+            hist.merge(other.histograms[name])
+        self.cluster_counts += other.cluster_counts
+        self.ood_rows += other.ood_rows
+
+    def report(self) -> dict:
+        rows = int(self.cluster_counts.sum())
+        scores = {}
+        for name, hist in self.histograms.items():
+            ref = np.asarray(self.profile["histograms"][name]["counts"], dtype=np.float64)
+            ref /= max(ref.sum(), 1)
+            cur = hist.proportions()
+            score = psi(ref, cur) if rows else 0.0
+            scores[name] = {"psi": score, "ks": binned_ks(ref, cur) if rows else 0.0, "level": drift_level(score)}
+        return {
+            "rows": rows,
+            "reference_rows": self.profile["rows"],
+            "scores": scores,
+            "ood_rows": self.ood_rows,
+            "ood_share": self.ood_rows / rows if rows else 0.0,
+            "expected_ood_share": 1.0 - OOD_QUANTILE,
+            "cluster_share": (self.cluster_counts / max(rows, 1)).tolist(),
+            "reference_cluster_share": self.profile["cluster_share"],
+        }
+
+def save_drift_report(report: dict, path):
+    tmp_path = path + ".part"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f)
+    os.replace(tmp_path, path)
+
+def load_drift_report(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
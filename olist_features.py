@@ -0,0 +1,556 @@
+import glob
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+
+from olist_data import CACHE_DIR
+from olist_index import ID_COLUMN, hash_ids
+from olist_scoring import FEATURES
+
+# Feature RFM per customer_unique_id langsung dari tabel mentah Olist (Kaggle), tanpa job pandas terpisah.
+# Tabel dibaca per chunk; yang disimpan di memori hanya akumulator per customer dan map order -> customer
+# (hash 64-bit, 16 byte per order). State disimpan di FEATURE_STATE_DIR, jadi run berikutnya hanya
+# memproses order dengan order_purchase_timestamp >= watermark (order yang sudah tercatat dilewati), plus
+# review baru (review_creation_date >= watermark review, review yang sudah dihitung dilewati) untuk order
+# lama. Customer lama yang order-nya berubah (item/pembayaran susulan, order jadi canceled) dihitung ulang
+# dari semua order-nya. Definisi feature:
+#   recency              hari dari pembelian terakhir sampai tanggal referensi (default: order terbaru)
+#   frequency            jumlah order (status selain EXCLUDED_STATUSES)
+#   monetary             total payment_value
+#   payment_installments cicilan terbanyak di semua pembayaran
+#   price                rata-rata harga item
+#   review_score         rata-rata review_score
+# plus kategori & payment_type terbanyak dan state/kota dari order terakhir (kolom opsional dataset).
+RAW_TABLES = {
+    "orders": "olist_orders_dataset",
+    "order_items": "olist_order_items_dataset",
+    "payments": "olist_order_payments_dataset",
+    "reviews": "olist_order_reviews_dataset",
+    "customers": "olist_customers_dataset",
+    "products": "olist_products_dataset",
+    "categories": "product_category_name_translation",
+}
+RAW_COLUMNS = {
+    "orders": ["order_id", "customer_id", "order_status", "order_purchase_timestamp"],
+    "order_items": ["order_id", "product_id", "price"],
+    "payments": ["order_id", "payment_type", "payment_installments", "payment_value"],
+    "reviews": ["review_id", "order_id", "review_score", "review_creation_date"],
+    "customers": ["customer_id", "customer_unique_id", "customer_city", "customer_state"],
+    "products": ["product_id", "product_category_name"],
+    "categories": ["product_category_name", "product_category_name_english"],
+}
+# Tanpa tabel produk / terjemahan, product_category_name_english dikosongkan
+OPTIONAL_TABLES = ("products", "categories")
+NUMERIC_COLUMNS = ("price", "payment_installments", "payment_value", "review_score")
+EXCLUDED_STATUSES = ("canceled", "unavailable")
+MODE_COLUMNS = ("product_category_name_english", "payment_type")
+FEATURE_COLUMNS = [ID_COLUMN] + FEATURES + list(MODE_COLUMNS) + ["customer_state", "customer_city"]
+# Akumulator numerik per customer; installments_max & last_purchase di-reduce dengan max, sisanya dijumlah
+# items & payments (jumlah baris) juga dipakai untuk mendeteksi item/pembayaran susulan untuk order lama
+SUM_COLUMNS = ("orders", "payment_value", "price_sum", "items", "payments", "review_sum", "reviews")
+ORDER_DTYPE = np.dtype([("hash", "<u8"), ("customer", "<i8")])
+STATE_VERSION = 3
+FEATURE_STATE_DIR = os.path.join(CACHE_DIR, "features")
+CHUNK_SIZE = 500_000
+NS_PER_DAY = 86_400 * 10 ** 9
+
+
+# =========================
+# RAW TABLES
+# =========================
+def raw_table_path(raw_dir, name):
+    for ext in (".parquet", ".csv", ".csv.gz"):
+        path = os.path.join(raw_dir, RAW_TABLES[name] + ext)
+        if os.path.exists(path):
+            return path
+    return None
+
+def _convert(column: pa.Array, name) -> pa.Array:
+    # Cast Arrow (C++) dulu; chunk dengan teks rusak dikonversi lewat pandas (nilai rusak -> NaN/NaT)
+    target = pa.float64() if name in NUMERIC_COLUMNS else pa.timestamp("ns")
+    if column.type == target:
+        return column
+    try:
+        return pc.cast(column, target)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        values = column.to_pandas()
+        if name in NUMERIC_COLUMNS:
+            return pa.array(pd.to_numeric(values, errors="coerce"), type=target)
+        return pa.array(pd.to_datetime(values.astype(str), format="ISO8601", errors="coerce"), type=target)
+
+def iter_raw_table(raw_dir, name, chunksize=CHUNK_SIZE):
+    """Chunk DataFrame berisi RAW_COLUMNS[name]; id & teks sebagai str, kolom numerik float (teks rusak -> NaN)."""
+    path = raw_table_path(raw_dir, name)
+    if path is None:
+        raise FileNotFoundError(os.path.join(raw_dir, RAW_TABLES[name] + ".csv"))
+    columns = RAW_COLUMNS[name]
+    if path.endswith(".parquet"):
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns)
+    else:
+        # Reader CSV Arrow (multithread, streaming per blok ~chunksize baris); semua kolom dibaca sebagai teks
+        # supaya id tidak pernah diinfer sebagai angka
+        batches = pv.open_csv(
+            path,
+            read_options=pv.ReadOptions(block_size=max(1 << 20, chunksize * 128)),
+            convert_options=pv.ConvertOptions(include_columns=columns,
+                                              column_types={c: pa.string() for c in columns}),
+        )
+    for batch in batches:
+        arrays = [
+            _convert(batch.column(c), c) if c in NUMERIC_COLUMNS or c.endswith(("_timestamp", "_date"))
+            else batch.column(c)
+            for c in columns
+        ]
+        yield pa.RecordBatch.from_arrays(arrays, names=columns).to_pandas()
+
+def product_categories(raw_dir, chunksize=CHUNK_SIZE):
+    """product_id -> kategori (bahasa Inggris jika ada terjemahan); None jika tabel produk tidak ada."""
+    if raw_table_path(raw_dir, "products") is None:
+        return None
+    # Tabel dimensi kecil (~33 ribu produk di data asli), cukup dimuat utuh
+    products = pd.concat(list(iter_raw_table(raw_dir, "products", chunksize)), ignore_index=True)
+    category = products.set_index("product_id")["product_category_name"]
+    if raw_table_path(raw_dir, "categories") is not None:
+        names = pd.concat(list(iter_raw_table(raw_dir, "categories", chunksize)), ignore_index=True)
+        english = names.drop_duplicates("product_category_name").set_index("product_category_name")
+        category = category.map(english["product_category_name_english"]).fillna(category)
+    return category[~category.index.duplicated()]
+
+
+# =========================
+# STATE
+# =========================
+def lookup_orders(order_map: np.ndarray, hashes: np.ndarray) -> np.ndarray:
+    """Kode customer per hash order (map terurut per hash), -1 jika order tidak ada di map."""
+    if not len(order_map) or not len(hashes):
+        return np.full(len(hashes), -1, dtype=np.int64)
+    pos = np.minimum(np.searchsorted(order_map["hash"], hashes), len(order_map) - 1)
+    return np.where(order_map["hash"][pos] == hashes, order_map["customer"][pos], -1)
+
+def review_keys(review_ids, order_ids) -> np.ndarray:
+    # review_id di data Olist tidak unik lintas order, jadi kuncinya pasangan (review_id, order_id)
+    return hash_ids((pd.Series(review_ids, dtype=object).astype(str) + "|"
+                     + pd.Series(order_ids, dtype=object).astype(str)).to_numpy())
+
+def counted_reviews(review_map: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Mask kunci review yang sudah pernah dihitung (review_map terurut)."""
+    if not len(review_map) or not len(keys):
+        return np.zeros(len(keys), dtype=bool)
+    pos = np.minimum(np.searchsorted(review_map, keys), len(review_map) - 1)
+    return review_map[pos] == keys
+
+class FeatureState:
+    """Akumulator per customer. Kode customer = posisi baris, tetap antar run (customer baru ditambah di akhir)."""
+
+    def __init__(self, customers: pd.DataFrame, modes: pd.DataFrame, orders: np.ndarray, reviews: np.ndarray,
+                 meta: dict):
+        self.customers = customers
+        self.modes = modes
+        self.orders = orders
+        # Kunci (uint64, terurut) semua review yang sudah masuk akumulator, lihat review_keys
+        self.reviews = reviews
+        self.meta = meta
+
+    @classmethod
+    def empty(cls) -> "FeatureState":
+        customers = pd.DataFrame({ID_COLUMN: pd.Series(dtype=object), "last_purchase": pd.Series(dtype=np.int64)})
+        for c in SUM_COLUMNS:
+            customers[c] = pd.Series(dtype=np.float64)
+        customers["installments_max"] = pd.Series(dtype=np.float64)
+        customers["customer_state"] = pd.Series(dtype=object)
+        customers["customer_city"] = pd.Series(dtype=object)
+        modes = pd.DataFrame({"customer": pd.Series(dtype=np.int64), "column": pd.Series(dtype=object),
+                              "value": pd.Series(dtype=object), "count": pd.Series(dtype=np.int64)})
+        meta = {"version": STATE_VERSION, "generation": 0, "order_watermark": None, "review_watermark": None}
+        return cls(customers, modes, np.empty(0, dtype=ORDER_DTYPE), np.empty(0, dtype=np.uint64), meta)
+
+    def __len__(self):
+        return len(self.customers)
+
+    @property
+    def order_watermark(self):
+        return None if self.meta["order_watermark"] is None else pd.Timestamp(self.meta["order_watermark"])
+
+    @property
+    def review_watermark(self):
+        return None if self.meta["review_watermark"] is None else pd.Timestamp(self.meta["review_watermark"])
+
+    # ---- persistence: file per generasi, state.json (ditulis terakhir) menunjuk generasi aktif ----
+    @staticmethod
+    def load_meta(state_dir=FEATURE_STATE_DIR):
+        try:
+            with open(os.path.join(state_dir, "state.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @classmethod
+    def load(cls, state_dir=FEATURE_STATE_DIR):
+        """State tersimpan, atau None jika belum ada / versinya lain."""
+        meta = cls.load_meta(state_dir)
+        if meta is None or meta.get("version") != STATE_VERSION:
+            return None
+        gen = meta["generation"]
+        customers = pd.read_parquet(os.path.join(state_dir, f"customers.{gen}.parquet"))
+        modes = pd.read_parquet(os.path.join(state_dir, f"modes.{gen}.parquet"))
+        orders = np.load(os.path.join(state_dir, f"orders.{gen}.npy"))
+        reviews = np.load(os.path.join(state_dir, f"reviews.{gen}.npy"))
+        return cls(customers, modes, orders, reviews, meta)
+
+    def save(self, state_dir=FEATURE_STATE_DIR):
+        os.makedirs(state_dir, exist_ok=True)
+        # Rebuild penuh tetap menaikkan generasi yang tersimpan supaya nama file tidak bertabrakan
+        current = FeatureState.load_meta(state_dir) or {}
+        gen = max(self.meta["generation"], current.get("generation", 0)) + 1
+        self.customers.to_parquet(os.path.join(state_dir, f"customers.{gen}.parquet"), index=False)
+        self.modes.to_parquet(os.path.join(state_dir, f"modes.{gen}.parquet"), index=False)
+        with open(os.path.join(state_dir, f"orders.{gen}.npy"), "wb") as f:
+            np.save(f, self.orders)
+        with open(os.path.join(state_dir, f"reviews.{gen}.npy"), "wb") as f:
+            np.save(f, self.reviews)
+        meta = dict(self.meta, generation=gen)
+        tmp_path = os.path.join(state_dir, f"state.json.{os.getpid()}.part")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(state_dir, "state.json"))
+        self.meta = meta
+        # Generasi lama (dan sisa run yang gagal) dibuang setelah pointer pindah
+        for path in glob.glob(os.path.join(glob.escape(state_dir), "*.*.*")):
+            parts = os.path.basename(path).split(".")
+            if parts[0] in ("customers", "modes", "orders", "reviews") and parts[1] != str(gen):
+                os.remove(path)
+
+
+# =========================
+# INCREMENTAL UPDATE
+# =========================
+def _new_orders(raw_dir, state, chunksize) -> tuple:
+    """(order baru, hash order tercatat yang statusnya kini masuk EXCLUDED_STATUSES)."""
+    # Order >= watermark yang belum tercatat di map (order dengan timestamp sama persis dengan watermark
+    # bisa datang di snapshot berikutnya)
+    watermark = state.order_watermark
+    parts, dropped = [], [np.empty(0, dtype=np.uint64)]
+    for chunk in iter_raw_table(raw_dir, "orders", chunksize):
+        ts = chunk["order_purchase_timestamp"]
+        excluded = chunk["order_status"].isin(EXCLUDED_STATUSES)
+        if len(state.orders) and excluded.any():
+            hashes = hash_ids(chunk["order_id"].to_numpy()[excluded.to_numpy()])
+            dropped.append(hashes[lookup_orders(state.orders, hashes) >= 0])
+        keep = ts.notna() & ~excluded & chunk["customer_id"].notna()
+        if watermark is not None:
+            keep &= ts >= watermark
+        chunk = chunk[keep]
+        hashes = hash_ids(chunk["order_id"].to_numpy())
+        known = lookup_orders(state.orders, hashes) >= 0
+        parts.append(pd.DataFrame({"hash": hashes[~known], "customer_id": chunk["customer_id"].to_numpy()[~known],
+                                   "ts": chunk["order_purchase_timestamp"].to_numpy("datetime64[ns]")[~known]}))
+    orders = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=["hash", "customer_id", "ts"])
+    return orders.drop_duplicates("hash"), np.unique(np.concatenate(dropped))
+
+def _mapped_orders(raw_dir, order_map, chunksize) -> pd.DataFrame:
+    # Baris order (hash, customer_id, ts) untuk order di `order_map`, tanpa filter watermark
+    parts = []
+    for chunk in iter_raw_table(raw_dir, "orders", chunksize):
+        hashes = hash_ids(chunk["order_id"].to_numpy())
+        keep = ((lookup_orders(order_map, hashes) >= 0) & chunk["order_purchase_timestamp"].notna().to_numpy()
+                & ~chunk["order_status"].isin(EXCLUDED_STATUSES).to_numpy() & chunk["customer_id"].notna().to_numpy())
+        parts.append(pd.DataFrame({"hash": hashes[keep], "customer_id": chunk["customer_id"].to_numpy()[keep],
+                                   "ts": chunk["order_purchase_timestamp"].to_numpy("datetime64[ns]")[keep]}))
+    orders = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=["hash", "customer_id", "ts"])
+    return orders.drop_duplicates("hash")
+
+def _order_customers(raw_dir, orders, chunksize) -> pd.DataFrame:
+    # customer_id (satu per order di Olist) -> customer_unique_id + lokasi, hanya untuk order baru
+    wanted = pd.Index(orders["customer_id"].unique())
+    parts = [pd.DataFrame(columns=RAW_COLUMNS["customers"])]
+    for chunk in iter_raw_table(raw_dir, "customers", chunksize):
+        parts.append(chunk[chunk["customer_id"].isin(wanted) & chunk["customer_unique_id"].notna()])
+    customers = pd.concat(parts, ignore_index=True).drop_duplicates("customer_id")
+    return orders.merge(customers, on="customer_id", how="inner")
+
+def _add_orders(joined, codes, values, last_purchase, location):
+    ts = joined["ts"].to_numpy("datetime64[ns]").astype(np.int64)
+    values["orders"] += np.bincount(codes, minlength=len(last_purchase))
+    # Lokasi dari order terbaru customer (hanya jika lebih baru dari yang sudah tercatat)
+    latest = pd.DataFrame({"customer": codes, "ts": ts, "state": joined["customer_state"].to_numpy(),
+                           "city": joined["customer_city"].to_numpy()}).sort_values("ts").drop_duplicates(
+                               "customer", keep="last")
+    newer = latest[latest["ts"].to_numpy() >= last_purchase[latest["customer"].to_numpy()]]
+    location[newer["customer"].to_numpy()] = newer[["state", "city"]].to_numpy(dtype=object)
+    np.maximum.at(last_purchase, codes, ts)
+
+def _add_items_payments(raw_dir, order_map, values, installments, mode_parts, categories, stats, chunksize,
+                        known=None):
+    """Item & pembayaran order di `order_map` masuk akumulator.
+
+    Jika `known` (map order tercatat) diberikan, kembalikan juga jumlah baris item & pembayaran per customer
+    untuk order di `known`, untuk dibandingkan dengan kolom items/payments yang tersimpan.
+    """
+    n = len(installments)
+    known_items, known_payments = np.zeros(n), np.zeros(n)
+    for chunk in iter_raw_table(raw_dir, "order_items", chunksize):
+        hashes = hash_ids(chunk["order_id"].to_numpy())
+        code = lookup_orders(order_map, hashes)
+        valid = chunk["price"].notna().to_numpy()
+        if known is not None:
+            old = lookup_orders(known, hashes)
+            known_items += np.bincount(old[(old >= 0) & valid], minlength=n)
+        ok = (code >= 0) & valid
+        code, chunk = code[ok], chunk[ok]
+        values["price_sum"] += np.bincount(code, weights=chunk["price"].to_numpy(), minlength=n)
+        values["items"] += np.bincount(code, minlength=n)
+        stats["items"] += len(code)
+        if categories is not None:
+            mode_parts.append(_mode_counts(code, chunk["product_id"].map(categories), MODE_COLUMNS[0]))
+    for chunk in iter_raw_table(raw_dir, "payments", chunksize):
+        hashes = hash_ids(chunk["order_id"].to_numpy())
+        code = lookup_orders(order_map, hashes)
+        if known is not None:
+            old = lookup_orders(known, hashes)
+            known_payments += np.bincount(old[old >= 0], minlength=n)
+        ok = code >= 0
+        code, chunk = code[ok], chunk[ok]
+        values["payment_value"] += np.bincount(code, weights=chunk["payment_value"].fillna(0.0).to_numpy(),
+                                               minlength=n)
+        values["payments"] += np.bincount(code, minlength=n)
+        np.fmax.at(installments, code, chunk["payment_installments"].to_numpy())
+        stats["payments"] += len(code)
+        mode_parts.append(_mode_counts(code, chunk["payment_type"], MODE_COLUMNS[1]))
+    return known_items, known_payments
+
+def update_feature_state(raw_dir, state=None, chunksize=CHUNK_SIZE) -> tuple:
+    """(state baru, statistik run). `state` None = bangun dari awal."""
+    state = FeatureState.empty() if state is None else state
+    stats = {"orders": 0, "skipped_orders": 0, "items": 0, "payments": 0, "reviews": 0, "new_customers": 0,
+             "dropped_orders": 0, "recomputed_customers": 0}
+
+    # 1. Order baru -> kode customer (customer baru ditambah di akhir)
+    orders, dropped = _new_orders(raw_dir, state, chunksize)
+    joined = _order_customers(raw_dir, orders, chunksize)
+    stats["skipped_orders"] = len(orders) - len(joined)
+    ids = pd.Index(state.customers[ID_COLUMN])
+    codes = ids.get_indexer(joined[ID_COLUMN])
+    fresh = pd.unique(joined[ID_COLUMN][codes < 0])
+    codes[codes < 0] = len(ids) + pd.Index(fresh).get_indexer(joined[ID_COLUMN][codes < 0])
+    n = len(ids) + len(fresh)
+    stats["orders"], stats["new_customers"] = len(joined), len(fresh)
+
+    old = state.customers
+
+    def extend(column, fill, dtype):
+        return np.concatenate([old[column].to_numpy(dtype), np.full(len(fresh), fill, dtype=dtype)])
+
+    values = {c: extend(c, 0.0, np.float64) for c in SUM_COLUMNS}
+    installments = extend("installments_max", np.nan, np.float64)
+    last_purchase = extend("last_purchase", np.iinfo(np.int64).min, np.int64)
+    location = np.column_stack([extend("customer_state", None, object), extend("customer_city", None, object)])
+
+    _add_orders(joined, codes, values, last_purchase, location)
+
+    new_map = np.empty(len(joined), dtype=ORDER_DTYPE)
+    new_map["hash"] = joined["hash"].to_numpy(np.uint64)
+    new_map["customer"] = codes
+    # argsort pada field hash jauh lebih cepat daripada sort(order=...) atas structured array
+    new_map = new_map[np.argsort(new_map["hash"])]
+    order_map = new_map
+    if len(state.orders):
+        order_map = np.concatenate([state.orders, new_map])
+        order_map = order_map[np.argsort(order_map["hash"], kind="stable")]
+
+    # 2. Item & pembayaran untuk order baru, sambil menghitung baris item/pembayaran order lama per customer
+    mode_parts = [state.modes]
+    categories = product_categories(raw_dir, chunksize)
+    known_items, known_payments = _add_items_payments(raw_dir, new_map, values, installments, mode_parts,
+                                                      categories, stats, chunksize, known=state.orders)
+
+    # 3. Review: semua review order baru + review yang dibuat sejak watermark untuk order lama.
+    # review_creation_date hanya tanggal: review lain di hari watermark bisa baru muncul di snapshot berikutnya,
+    # jadi pembandingnya >= dan review yang sudah dihitung dilewati lewat kuncinya
+    review_watermark = state.review_watermark
+    latest_review = review_watermark
+    review_parts = [state.reviews]
+    for chunk in iter_raw_table(raw_dir, "reviews", chunksize):
+        hashes = hash_ids(chunk["order_id"].to_numpy())
+        keys = review_keys(chunk["review_id"].to_numpy(), chunk["order_id"].to_numpy())
+        code = lookup_orders(new_map, hashes)
+        created = chunk["review_creation_date"]
+        if review_watermark is not None:
+            late = (code < 0) & (created >= review_watermark).to_numpy()
+            late[late] = ~counted_reviews(state.reviews, keys[late])
+            code[late] = lookup_orders(state.orders, hashes[late])
+        else:
+            code = lookup_orders(order_map, hashes)
+        ok = (code >= 0) & chunk["review_score"].notna().to_numpy()
+        review_parts.append(keys[ok])
+        values["review_sum"] += np.bincount(code[ok], weights=chunk["review_score"].to_numpy()[ok], minlength=n)
+        values["reviews"] += np.bincount(code[ok], minlength=n)
+        stats["reviews"] += int(ok.sum())
+        if created.notna().any() and (latest_review is None or created.max() > latest_review):
+            latest_review = created.max()
+
+    # 4. Customer lama yang order-nya berubah sejak dihitung: jumlah item/pembayaran order lama berbeda dari
+    # yang tercatat (baris susulan/terhapus), atau order-nya kini canceled. Akumulator customer tersebut
+    # dikosongkan lalu dihitung ulang dari semua order-nya (jumlah, max, lokasi & modus tidak bisa dikurangi)
+    changed = ((known_items[:len(old)] != old["items"].to_numpy(np.float64))
+               | (known_payments[:len(old)] != old["payments"].to_numpy(np.float64)))
+    touched = np.union1d(np.flatnonzero(changed), lookup_orders(state.orders, dropped))
+    if len(dropped):
+        order_map = order_map[~np.isin(order_map["hash"], dropped)]
+    if len(touched):
+        for c in SUM_COLUMNS:
+            values[c][touched] = 0.0
+        installments[touched] = np.nan
+        last_purchase[touched] = np.iinfo(np.int64).min
+        location[touched] = None
+        mode_parts = [m[~m["customer"].isin(touched)] for m in mode_parts]
+        redo_map = order_map[np.isin(order_map["customer"], touched)]
+        redo = _order_customers(raw_dir, _mapped_orders(raw_dir, redo_map, chunksize), chunksize)
+        _add_orders(redo, lookup_orders(redo_map, redo["hash"].to_numpy(np.uint64)), values, last_purchase,
+                    location)
+        _add_items_payments(raw_dir, redo_map, values, installments, mode_parts, categories,
+                            dict(items=0, payments=0), chunksize)
+        for chunk in iter_raw_table(raw_dir, "reviews", chunksize):
+            code = lookup_orders(redo_map, hash_ids(chunk["order_id"].to_numpy()))
+            ok = (code >= 0) & chunk["review_score"].notna().to_numpy()
+            review_parts.append(review_keys(chunk["review_id"].to_numpy()[ok], chunk["order_id"].to_numpy()[ok]))
+            values["review_sum"] += np.bincount(code[ok], weights=chunk["review_score"].to_numpy()[ok],
+                                                minlength=n)
+            values["reviews"] += np.bincount(code[ok], minlength=n)
+    stats["dropped_orders"], stats["recomputed_customers"] = len(dropped), len(touched)
+
+    customers = pd.DataFrame({ID_COLUMN: np.concatenate([old[ID_COLUMN].to_numpy(object), fresh.astype(object)]),
+                              "last_purchase": last_purchase, **values, "installments_max": installments,
+                              "customer_state": location[:, 0], "customer_city": location[:, 1]})
+    modes = pd.concat(mode_parts, ignore_index=True)
+    modes = modes.groupby(["customer", "column", "value"], as_index=False, sort=False)["count"].sum()
+
+    order_watermark = state.order_watermark
+    if len(joined):
+        newest = pd.Timestamp(joined["ts"].max())
+        order_watermark = newest if order_watermark is None else max(order_watermark, newest)
+    meta = dict(state.meta,
+                order_watermark=None if order_watermark is None else order_watermark.isoformat(),
+                review_watermark=None if latest_review is None else pd.Timestamp(latest_review).isoformat())
+    # np.unique juga mengurutkan; review customer yang dihitung ulang sudah ada di map lama
+    review_map = np.unique(np.concatenate(review_parts))
+    return FeatureState(customers, modes, order_map, review_map, meta), stats
+
+def _mode_counts(code, values: pd.Series, column) -> pd.DataFrame:
+    values = values.to_numpy(dtype=object)
+    ok = pd.notna(values)
+    df = pd.DataFrame({"customer": code[ok], "value": values[ok]})
+    df = df.groupby(["customer", "value"], as_index=False, sort=False).size().rename(columns={"size": "count"})
+    df.insert(1, "column", column)
+    return df
+
+
+# =========================
+# OUTPUT
+# =========================
+def feature_frame(state: FeatureState, as_of=None) -> pd.DataFrame:
+    """Satu baris per customer dengan FEATURE_COLUMNS; siap dipakai scoring (nilai kosong -> dikarantina)."""
+    c = state.customers
+    if as_of is None:
+        as_of = state.order_watermark
+    as_of = pd.Timestamp(as_of).value if as_of is not None else 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = pd.DataFrame({
+            ID_COLUMN: c[ID_COLUMN].to_numpy(dtype=object),
+            "recency": (as_of - c["last_purchase"].to_numpy(np.int64)) // NS_PER_DAY,
+            "frequency": c["orders"].to_numpy(np.int64),
+            "monetary": np.round(c["payment_value"].to_numpy(np.float64), 2),
+            "payment_installments": c["installments_max"].to_numpy(np.float64),
+            "price": np.round(c["price_sum"].to_numpy(np.float64) / c["items"].to_numpy(np.float64), 2),
+            "review_score": c["review_sum"].to_numpy(np.float64) / c["reviews"].to_numpy(np.float64),
+        })
+    # Nilai terbanyak per customer; seri dipecah menurut urutan alfabet supaya hasil deterministik
+    modes = state.modes.sort_values(["customer", "column", "count", "value"], ascending=[True, True, False, True])
+    modes = modes.drop_duplicates(["customer", "column"])
+    for column in MODE_COLUMNS:
+        m = modes[modes["column"] == column]
+        values = np.full(len(out), None, dtype=object)
+        values[m["customer"].to_numpy()] = m["value"].to_numpy(dtype=object)
+        out[column] = values
+    out["customer_state"] = c["customer_state"].to_numpy(dtype=object)
+    out["customer_city"] = c["customer_city"].to_numpy(dtype=object)
+    # Customer yang semua order-nya kini canceled tetap punya kode di state, tapi tidak ikut output
+    active = c["orders"].to_numpy() > 0
+    out = out[FEATURE_COLUMNS]
+    return out if active.all() else out[active].reset_index(drop=True)
+
+def write_features(df: pd.DataFrame, out_path) -> str:
+    """Tulis atomik ke .parquet / .csv / .csv.gz (format yang dibaca olist_scoring dan dashboard)."""
+    tmp_path = f"{out_path}.{os.getpid()}.part"
+    try:
+        if out_path.endswith(".parquet"):
+            pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp_path)
+        else:
+            df.to_csv(tmp_path, index=False, compression="gzip" if out_path.endswith(".gz") else None)
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return out_path
+
+def build_features(raw_dir, out_path, state_dir=FEATURE_STATE_DIR, full=False, as_of=None,
+                   chunksize=CHUNK_SIZE) -> dict:
+    """Perbarui state dari tabel mentah (inkremental kecuali `full`), lalu tulis feature semua customer."""
+    state = None if full else FeatureState.load(state_dir)
+    previous = None if state is None else state.meta["order_watermark"]
+    state, stats = update_feature_state(raw_dir, state, chunksize)
+    write_features(feature_frame(state, as_of), out_path)
+    # State disimpan setelah output berhasil ditulis; run yang gagal diulang dari watermark lama
+    state.save(state_dir)
+    stats.update(customers=len(state), previous_watermark=previous, watermark=state.meta["order_watermark"])
+    return stats
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Bangun feature RFM per customer dari tabel mentah Olist")
+    parser.add_argument("raw_dir", help="Folder berisi olist_orders_dataset.csv, olist_order_items_dataset.csv, ...")
+    parser.add_argument("-o", "--output", required=True, help="File feature .parquet, .csv atau .csv.gz")
+    parser.add_argument("--state", default=FEATURE_STATE_DIR, help="Folder state inkremental")
+    parser.add_argument("--full", action="store_true", help="Abaikan state dan bangun ulang dari semua order")
+    parser.add_argument("--as-of", default=None, help="Tanggal referensi recency (default: order terbaru)")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--score", metavar="OUTPUT", help="Langsung scoring hasilnya ke file ini (olist_scoring)")
+    parser.add_argument("--model", default=None, help="Model untuk --score (default: model dashboard)")
+    args = parser.parse_args(argv)
+
+    if not args.output.endswith((".parquet", ".csv", ".csv.gz")):
+        parser.error("Output harus berakhiran .parquet, .csv atau .csv.gz")
+    missing = [RAW_TABLES[t] for t in RAW_TABLES if t not in OPTIONAL_TABLES and raw_table_path(args.raw_dir, t) is None]
+    if missing:
+        parser.error(f"Tabel tidak ditemukan di {args.raw_dir}: {', '.join(missing)}")
+
+    start = time.perf_counter()
+    stats = build_features(args.raw_dir, args.output, args.state, args.full, args.as_of, args.chunksize)
+    print(f"{stats['orders']:,} order baru ({stats['items']:,} item, {stats['payments']:,} pembayaran, "
+          f"{stats['reviews']:,} review), {stats['new_customers']:,} customer baru; "
+          f"watermark {stats['previous_watermark'] or '-'} -> {stats['watermark'] or '-'}")
+    if stats["skipped_orders"]:
+        print(f"{stats['skipped_orders']:,} order tanpa data customer dilewati", file=sys.stderr)
+    if stats["recomputed_customers"]:
+        print(f"{stats['recomputed_customers']:,} customer dihitung ulang (item/pembayaran susulan, "
+              f"{stats['dropped_orders']:,} order lama kini canceled)")
+    print(f"{stats['customers']:,} customer -> {args.output} dalam {time.perf_counter() - start:.2f} s")
+
+    if args.score:
+        from olist_scoring import main as score_main
+
+        score_main([args.output, "-o", args.score] + (["--model", args.model] if args.model else []))
+
+
+if __name__ == "__main__":
+    main()
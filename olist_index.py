@@ -0,0 +1,179 @@
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+# Index customer_unique_id -> (feature, cluster, skor) di samping file hasil scoring:
+#   <base>.index.values.bin  float64 (rows, kolom), urutan baris file hasil (ditulis per chunk)
+#   <base>.index.keys.npy    (hash, row) terurut per hash -> binary search lewat memmap
+#   <base>.index.json        metadata; ditulis terakhir, jadi index dianggap ada hanya jika lengkap
+# Hash = siphash 64-bit pandas; peluang id yang tidak ada ikut cocok ~ rows / 2**64.
+INDEX_VERSION = 1
+ID_COLUMN = "customer_unique_id"
+HASH_KEY = "olist-customers1"
+KEY_DTYPE = np.dtype([("hash", "<u8"), ("row", "<i8")])
+
+
+def index_paths(path) -> dict:
+    # Urutan = urutan commit/pindah file (metadata terakhir)
+    return {
+        "values": path + ".index.values.bin",
+        "keys": path + ".index.keys.npy",
+        "meta": path + ".index.json",
+    }
+
+def hash_ids(ids) -> np.ndarray:
+    values = np.asarray(ids, dtype=object)
+    return pd.util.hash_array(values, hash_key=HASH_KEY, categorize=False)
+
+
+# =========================
+# BUILD
+# =========================
+class CustomerIndexWriter:
+    """Dibangun sambil scoring: tiap chunk menambah id + nilai, urutan hash dibuat sekali di commit()."""
+
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = list(columns)
+        self.rows = 0
+        self._hashes = []
+        out_dir = os.path.dirname(os.path.abspath(path))
+        fd, self._values_tmp = tempfile.mkstemp(suffix=".part", dir=out_dir)
+        self._values = os.fdopen(fd, "wb")
+        self._keys_tmp = None
+
+    def add(self, ids, values: np.ndarray):
+        """`ids` customer_unique_id per baris, `values` matriks (baris, len(columns)) dengan urutan baris file hasil."""
+        self._hashes.append(hash_ids(ids))
+        self._values.write(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+        self.rows += len(values)
+
+    def commit(self):
+        self._values.close()
+        hashes = np.concatenate(self._hashes) if self._hashes else np.empty(0, dtype=np.uint64)
+        self._hashes = []
+        order = np.argsort(hashes, kind="stable")
+        keys = np.empty(hashes.size, dtype=KEY_DTYPE)
+        keys["hash"] = hashes[order]
+        keys["row"] = order
+        del hashes, order
+        fd, self._keys_tmp = tempfile.mkstemp(suffix=".part", dir=os.path.dirname(os.path.abspath(self.path)))
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, keys)
+
+        paths = index_paths(self.path)
+        os.replace(self._values_tmp, paths["values"])
+        os.replace(self._keys_tmp, paths["keys"])
+        meta = {"version": INDEX_VERSION, "rows": self.rows, "columns": self.columns,
+                "id_column": ID_COLUMN, "hash_key": HASH_KEY}
+        tmp_path = paths["meta"] + ".part"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, paths["meta"])
+
+    def abort(self):
+        self._values.close()
+        for p in (self._values_tmp, self._keys_tmp):
+            if p and os.path.exists(p):
+                os.remove(p)
+
+def build_customer_index(result_path, columns, batch_size=200_000) -> bool:
+    """Bangun index dari file hasil yang sudah ada (mis. hasil lama di cache prediksi).
+
+    False jika file tidak punya kolom customer_unique_id.
+    """
+    pf = pq.ParquetFile(result_path)
+    names = pf.schema_arrow.names
+    if ID_COLUMN not in names:
+        return False
+    columns = [c for c in columns if c in names]
+    writer = CustomerIndexWriter(result_path, columns)
+    try:
+        for batch in pf.iter_batches(batch_size=batch_size, columns=[ID_COLUMN] + columns):
+            df = batch.to_pandas()
+            writer.add(df[ID_COLUMN], df[columns].to_numpy(dtype=np.float64))
+        writer.commit()
+    except BaseException:
+        writer.abort()
+        raise
+    return True
+
+
+# =========================
+# LOOKUP
+# =========================
+class CustomerIndex:
+    """Index read-only lewat memmap; tiap lookup = binary search + baca baris yang cocok saja."""
+
+    def __init__(self, path):
+        paths = index_paths(path)
+        with open(paths["meta"], encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.columns = self.meta["columns"]
+        self.keys = np.load(paths["keys"], mmap_mode="r")
+        self.values = None
+        if self.meta["rows"]:
+            self.values = np.memmap(paths["values"], dtype=np.float64, mode="r",
+                                    shape=(self.meta["rows"], len(self.columns)))
+
+    def __len__(self):
+        return self.meta["rows"]
+
+    def rows_for(self, customer_id) -> np.ndarray:
+        """Posisi baris (di file hasil) untuk satu customer; bisa lebih dari satu jika id muncul berulang."""
+        if not len(self):
+            return np.empty(0, dtype=np.int64)
+        h = hash_ids([str(customer_id).strip()])[0]
+        hashes = self.keys["hash"]
+        lo = np.searchsorted(hashes, h, side="left")
+        hi = np.searchsorted(hashes, h, side="right")
+        return np.sort(np.asarray(self.keys["row"][lo:hi]))
+
+    def lookup(self, customer_id) -> pd.DataFrame:
+        rows = self.rows_for(customer_id)
+        df = pd.DataFrame(self.values[rows] if rows.size else np.empty((0, len(self.columns))), columns=self.columns)
+        if "cluster" in df:
+            df["cluster"] = df["cluster"].astype(np.int32)
+        df.insert(0, ID_COLUMN, str(customer_id).strip())
+        df.insert(1, "row", rows)
+        return df
+
+def load_customer_index(path):
+    """CustomerIndex untuk file hasil `path`, atau None jika belum/tidak punya index."""
+    if not os.path.exists(index_paths(path)["meta"]):
+        return None
+    return CustomerIndex(path)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Cari segmen customer di file hasil scoring lewat index customer_unique_id")
+    parser.add_argument("result", help="File hasil scoring (.parquet/.csv) yang punya index di sampingnya")
+    parser.add_argument("customer_id", nargs="*")
+    parser.add_argument("--build", action="store_true", help="Bangun index dari file hasil .parquet yang sudah ada")
+    args = parser.parse_args(argv)
+
+    if args.build:
+        from olist_scoring import FEATURES, OUTPUT_COLUMNS
+
+        if not build_customer_index(args.result, FEATURES + list(OUTPUT_COLUMNS)):
+            parser.error(f"{args.result} tidak punya kolom {ID_COLUMN}")
+    index = load_customer_index(args.result)
+    if index is None:
+        parser.error(f"Index tidak ditemukan untuk {args.result} (jalankan dengan --build)")
+    for customer_id in args.customer_id:
+        found = index.lookup(customer_id)
+        if found.empty:
+            print(f"{customer_id}: tidak ditemukan", file=sys.stderr)
+        else:
+            print(found.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
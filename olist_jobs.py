@@ -0,0 +1,252 @@
+import collections
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+from olist_data import CACHE_DIR
+
+JOB_DIR = os.path.join(CACHE_DIR, "jobs")
+ACTIVE_STATES = ("queued", "running")
+# Folder job yang sudah selesai dihapus setelah JOB_RETENTION detik (file hasil tidak ikut dihapus)
+JOB_RETENTION = float(os.environ.get("OLIST_JOB_RETENTION", 24 * 3600))
+PRUNE_INTERVAL = 600
+
+
+class JobCancelled(Exception):
+    pass
+
+
+# =========================
+# JOB STORE (DISK)
+# =========================
+# Satu folder per job: job.json, status.json, input.csv (dihapus setelah selesai) dan file flag "cancel"
+def job_file(job_id, name, job_dir=JOB_DIR) -> str:
+    return os.path.join(job_dir, job_id, name)
+
+def read_status(job_id, job_dir=JOB_DIR) -> dict:
+    try:
+        with open(job_file(job_id, "status.json", job_dir), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"id": job_id, "state": "unknown"}
+
+def write_status(job_id, job_dir=JOB_DIR, **fields) -> dict:
+    status = read_status(job_id, job_dir)
+    status.update(fields)
+    path = job_file(job_id, "status.json", job_dir)
+    tmp_path = f"{path}.{os.getpid()}.part"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(status, f)
+    os.replace(tmp_path, path)
+    return status
+
+def process_start_time(pid):
+    """Waktu start proses (clock tick sejak boot, dari /proc); None bila tidak tersedia (non-Linux)."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # Nama proses (field 2) bisa berisi spasi, jadi field dihitung setelah ")" terakhir
+            return int(f.read().rsplit(")", 1)[1].split()[19])
+    except (OSError, IndexError, ValueError):
+        return None
+
+def pid_alive(pid, start_time=None) -> bool:
+    """True bila proses `pid` masih hidup dan (kalau start_time diketahui) bukan pid lama yang dipakai ulang."""
+    if not pid:
+        return False
+    if os.name == "nt":
+        # os.kill(pid, 0) di Windows mengirim CTRL_C_EVENT, jadi cek lewat handle proses
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+        kernel32.CloseHandle(handle)
+        return code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    current = process_start_time(pid)
+    return start_time is None or current is None or current == start_time
+
+def job_is_orphan(status) -> bool:
+    """Job aktif yang pemiliknya sudah mati: worker untuk job running, proses manager untuk job queued."""
+    if status["state"] == "running":
+        return not pid_alive(status.get("pid"), status.get("pid_start"))
+    if status["state"] == "queued":
+        return not pid_alive(status.get("owner_pid"), status.get("owner_start"))
+    return False
+
+def prune_jobs(job_dir=JOB_DIR, retention=JOB_RETENTION, now=None) -> list:
+    """Hapus folder job non-aktif yang selesai lebih dari `retention` detik lalu; kembalikan id yang dihapus."""
+    now = time.time() if now is None else now
+    removed = []
+    for job_id in os.listdir(job_dir):
+        path = os.path.join(job_dir, job_id)
+        status = read_status(job_id, job_dir)
+        if status["state"] in ACTIVE_STATES:
+            continue
+        # Folder tanpa status valid (submit terputus) memakai mtime folder
+        finished = status.get("finished") or os.path.getmtime(path)
+        if now - finished > retention:
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(job_id)
+    return removed
+
+
+# =========================
+# WORKER
+# =========================
+def run_prediction_job(job_id, job_dir, model_path, features, out_path, chunksize, reference_profile=None,
+                       scoring_workers=1):
+    # Dijalankan di proses worker (python olist_jobs.py <job_dir> <job_id>)
+    from olist_drift import DriftMonitor, load_reference_profile
+    from olist_model import load_model_artifact
+    from olist_scoring import ShardedScorer, predict_csv_streaming
+
+    input_path = job_file(job_id, "input.csv", job_dir)
+    cancel_flag = job_file(job_id, "cancel", job_dir)
+
+    def progress(rows, bytes_done, bytes_total, elapsed):
+        write_status(job_id, job_dir, rows_done=rows, bytes_done=bytes_done, elapsed=elapsed)
+        if os.path.exists(cancel_flag):
+            raise JobCancelled()
+
+    try:
+        if os.path.exists(cancel_flag):
+            raise JobCancelled()
+        write_status(job_id, job_dir, state="running", started=time.time(),
+                     pid=os.getpid(), pid_start=process_start_time(os.getpid()))
+        model = load_model_artifact(model_path)
+        monitor = None
+        if reference_profile is not None:
+            monitor = DriftMonitor(load_reference_profile(reference_profile))
+        with ShardedScorer(model, workers=scoring_workers) as scorer:
+            rows = predict_csv_streaming(input_path, scorer, features, out_path,
+                                         chunksize=chunksize, progress=progress, monitor=monitor)
+    except JobCancelled:
+        write_status(job_id, job_dir, state="cancelled", finished=time.time())
+    except Exception as e:
+        write_status(job_id, job_dir, state="failed", error=str(e), finished=time.time())
+    else:
+        write_status(job_id, job_dir, state="done", rows_done=rows, result_path=out_path, finished=time.time())
+    finally:
+        if os.path.exists(input_path):
+            os.remove(input_path)
+
+
+# =========================
+# JOB MANAGER
+# =========================
+def default_job_workers() -> int:
+    return int(os.environ.get("OLIST_JOB_WORKERS", max(1, (os.cpu_count() or 1) - 1)))
+
+def scoring_workers_per_job(max_workers) -> int:
+    # Total thread scoring semua job paralel dibatasi sekitar jumlah CPU (bukan cpu * max_workers)
+    return max(1, (os.cpu_count() or 1) // max(1, max_workers))
+
+class JobManager:
+    """Antrian job prediksi; tiap job jalan di proses Python terpisah, maksimal `max_workers` sekaligus.
+
+    Status & progress ditulis worker ke job store di disk, jadi UI cukup membaca status.json.
+    Proses baru (bukan multiprocessing) dipakai supaya worker tidak ikut mengimpor script Streamlit.
+    """
+
+    def __init__(self, max_workers=None, job_dir=JOB_DIR, poll_interval=0.5):
+        self.job_dir = os.path.abspath(job_dir)
+        self.max_workers = max_workers or default_job_workers()
+        self.poll_interval = poll_interval
+        os.makedirs(self.job_dir, exist_ok=True)
+        self._queue = collections.deque()
+        self._procs = {}
+        self._lock = threading.Lock()
+        self._mark_orphans()
+        prune_jobs(self.job_dir)
+        self._last_prune = time.time()
+        threading.Thread(target=self._watch, name="olist-job-dispatcher", daemon=True).start()
+
+    def _mark_orphans(self):
+        # Job dir bisa dipakai bersama beberapa proses (app lain, CLI); hanya job yang worker/manager-nya
+        # sudah mati yang tidak akan pernah selesai
+        for job_id in os.listdir(self.job_dir):
+            if job_is_orphan(read_status(job_id, self.job_dir)):
+                write_status(job_id, self.job_dir, state="failed", error="Server restart", finished=time.time())
+
+    def _watch(self):
+        while True:
+            with self._lock:
+                self._dispatch()
+                if time.time() - self._last_prune > PRUNE_INTERVAL:
+                    prune_jobs(self.job_dir)
+                    self._last_prune = time.time()
+            time.sleep(self.poll_interval)
+
+    def _dispatch(self):
+        for job_id, proc in list(self._procs.items()):
+            if proc.poll() is None:
+                continue
+            del self._procs[job_id]
+            # Worker mati di tengah jalan (mis. kehabisan memori) tidak sempat menulis status
+            if read_status(job_id, self.job_dir)["state"] in ACTIVE_STATES:
+                write_status(job_id, self.job_dir, state="failed",
+                             error=f"Worker berhenti (exit code {proc.returncode})", finished=time.time())
+        while self._queue and len(self._procs) < self.max_workers:
+            job_id = self._queue.popleft()
+            # Paralelisme sudah dari shard scorer; BLAS di worker dibatasi satu thread per shard
+            env = dict(os.environ, OMP_NUM_THREADS="1", OPENBLAS_NUM_THREADS="1", MKL_NUM_THREADS="1")
+            self._procs[job_id] = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), self.job_dir, job_id],
+                stdin=subprocess.DEVNULL, env=env,
+            )
+
+    def submit(self, data, model_path, features, out_path, chunksize=None, reference_profile=None) -> str:
+        from olist_scoring import CHUNK_SIZE
+
+        job_id = uuid.uuid4().hex[:12]
+        os.makedirs(os.path.join(self.job_dir, job_id))
+        with open(job_file(job_id, "input.csv", self.job_dir), "wb") as f:
+            f.write(data)
+        spec = {
+            "model_path": os.path.abspath(model_path),
+            "features": list(features),
+            "out_path": os.path.abspath(out_path),
+            "chunksize": chunksize or CHUNK_SIZE,
+            "reference_profile": reference_profile and os.path.abspath(reference_profile),
+            "scoring_workers": scoring_workers_per_job(self.max_workers),
+        }
+        with open(job_file(job_id, "job.json", self.job_dir), "w", encoding="utf-8") as f:
+            json.dump(spec, f)
+        write_status(job_id, self.job_dir, id=job_id, state="queued", submitted=time.time(),
+                     owner_pid=os.getpid(), owner_start=process_start_time(os.getpid()),
+                     rows_done=0, bytes_done=0, bytes_total=len(data), out_path=spec["out_path"])
+        with self._lock:
+            self._queue.append(job_id)
+            self._dispatch()
+        return job_id
+
+    def status(self, job_id) -> dict:
+        return read_status(job_id, self.job_dir)
+
+    def cancel(self, job_id):
+        open(job_file(job_id, "cancel", self.job_dir), "w").close()
+        with self._lock:
+            if job_id in self._queue:
+                # Job belum sempat jalan: worker tidak akan membersihkan input-nya
+                self._queue.remove(job_id)
+                os.remove(job_file(job_id, "input.csv", self.job_dir))
+                write_status(job_id, self.job_dir, state="cancelled", finished=time.time())
+
+
+if __name__ == "__main__":
+    job_dir, job_id = sys.argv[1:3]
+    with open(job_file(job_id, "job.json", job_dir), encoding="utf-8") as f:
+        run_prediction_job(job_id, job_dir, **json.load(f))
@@ -0,0 +1,373 @@
+import json
+import os
+import time
+
+import numpy as np
+
+
+# =========================
+# COMPILED PREDICTOR
+# =========================
+class CentroidPredictor:
+    """Nearest-centroid predictor yang dikompilasi dari pipeline RobustScaler + KMeans.
+
+    Scaler dilipat ke dalam centroid, sehingga prediksi cukup satu perkalian
+    matriks NumPy tanpa validasi input dan threadpool milik sklearn.
+    """
+
+    def __init__(self, center, scale, centroids, features, dtype=np.float64, sklearn_version=None, counts=None,
+                 source=None):
+        center = np.asarray(center, dtype=np.float64)
+        scale = np.asarray(scale, dtype=np.float64)
+        centroids = np.asarray(centroids, dtype=np.float64)
+
+        self.center = center
+        self.scale = scale
+        self.centroids = centroids
+        self.features = list(features)
+        self.dtype = np.dtype(dtype)
+        self.sklearn_version = sklearn_version
+        # Jumlah baris yang membentuk tiap centroid (bobot awal refresh inkremental), None jika tidak diketahui
+        self.counts = None if counts is None else np.asarray(counts, dtype=np.float64)
+        # Fingerprint isi .pkl asal (lihat pickle_fingerprint), untuk mendeteksi artifact slim yang basi
+        self.source = source or None
+
+        # ||(x - c) / s - m||^2 = ||x / s - q||^2 dengan q = c / s + m
+        inv_scale = 1.0 / scale
+        q = center * inv_scale + centroids
+        # argmin_k ||x / s - q_k||^2 = argmin_k (x @ M + ||q_k||^2), M = -2 q.T / s
+        self._M = (-2.0 * q.T * inv_scale[:, None]).astype(self.dtype)
+        self._q_sq = (q ** 2).sum(axis=1).astype(self.dtype)
+        self._inv_scale_sq = (inv_scale ** 2).astype(self.dtype)
+
+    @classmethod
+    def from_pipeline(cls, pipeline, dtype=np.float64):
+        scaler = pipeline.steps[0][1]
+        kmeans = pipeline.steps[-1][1]
+        features = getattr(pipeline, "feature_names_in_", None)
+        if features is None:
+            features = [f"x{i}" for i in range(kmeans.cluster_centers_.shape[1])]
+        labels = getattr(kmeans, "labels_", None)
+        counts = None if labels is None else np.bincount(labels, minlength=kmeans.cluster_centers_.shape[0])
+        return cls(
+            scaler.center_, scaler.scale_, kmeans.cluster_centers_, features,
+            dtype=dtype, sklearn_version=getattr(kmeans, "_sklearn_version", None), counts=counts,
+        )
+
+    def with_dtype(self, dtype):
+        return CentroidPredictor(
+            self.center, self.scale, self.centroids, self.features,
+            dtype=dtype, sklearn_version=self.sklearn_version, counts=self.counts, source=self.source,
+        )
+
+    @property
+    def n_clusters(self) -> int:
+        return self.centroids.shape[0]
+
+    def as_array(self, X) -> np.ndarray:
+        if hasattr(X, "columns"):
+            if list(X.columns) != self.features:
+                X = X[self.features]
+            X = X.to_numpy(dtype=self.dtype, copy=False)
+        else:
+            X = np.asarray(X, dtype=self.dtype)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        return X
+
+    def predict(self, X) -> np.ndarray:
+        # ||x / s||^2 sama untuk semua centroid, jadi tidak perlu dihitung
+        d = self.as_array(X) @ self._M
+        d += self._q_sq
+        return d.argmin(axis=1)
+
+    def predict_with_scores(self, X) -> tuple:
+        """(labels, distance, margin, confidence) dari perkalian matriks yang sama dengan predict."""
+        X = self.as_array(X)
+        d = X @ self._M
+        d += self._q_sq
+        # ||x / s - q||^2 = ||x / s||^2 + (x @ M + ||q||^2) -> jarak kuadrat ke semua centroid
+        d += (np.square(X) @ self._inv_scale_sq)[:, None]
+        return nearest_scores(np.maximum(d, 0.0, out=d))
+
+
+# =========================
+# CLUSTER SCORES
+# =========================
+def nearest_scores(sq_dist: np.ndarray) -> tuple:
+    """Label + skor per baris dari matriks jarak kuadrat (n, k) di ruang scaler.
+
+    distance   : jarak ke centroid cluster yang dipilih
+    margin     : jarak ke centroid terdekat kedua dikurangi `distance` (makin besar makin yakin)
+    confidence : soft assignment fuzzy c-means (m=2), 1 / sum_j (d / d_j)^2, antara 1/k dan 1
+    `sq_dist` dipakai sebagai buffer kerja dan isinya berubah.
+    """
+    n, k = sq_dist.shape
+    rows = np.arange(n)
+    labels = sq_dist.argmin(axis=1)
+    # Indexing & np.minimum per kolom jauh lebih cepat daripada reduce axis=1 untuk k kecil
+    d1 = sq_dist[rows, labels]
+    sq_dist[rows, labels] = np.inf
+    second = np.full(n, np.inf)
+    ratio = np.ones(n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for j in range(k):
+            col = sq_dist[:, j]
+            np.minimum(second, col, out=second)
+            ratio += d1 / col
+    distance = np.sqrt(d1)
+    margin = np.sqrt(second) - distance
+    return labels, distance, margin, 1.0 / ratio
+
+
+# =========================
+# PARITY CHECK
+# =========================
+def parity_probe(predictor: CentroidPredictor, n=2000, seed=0) -> np.ndarray:
+    # Titik acak di sekitar tiap centroid (dalam ruang fitur asli)
+    rng = np.random.default_rng(seed)
+    k, d = predictor.centroids.shape
+    z = predictor.centroids[rng.integers(0, k, n)] + rng.normal(0.0, 1.0, (n, d))
+    return z * predictor.scale + predictor.center
+
+def check_parity(predictor: CentroidPredictor, pipeline, X=None) -> float:
+    """Persentase label yang sama antara predictor dan `pipeline.predict`."""
+    import pandas as pd
+
+    if X is None:
+        X = parity_probe(predictor)
+    X = pd.DataFrame(np.asarray(X), columns=predictor.features)
+    return float((predictor.predict(X) == pipeline.predict(X)).mean())
+
+def compile_pipeline(pipeline, dtype=np.float64):
+    """Kembalikan CentroidPredictor jika labelnya identik dengan pipeline, jika tidak pipeline asli."""
+    try:
+        predictor = CentroidPredictor.from_pipeline(pipeline, dtype=dtype)
+        if check_parity(predictor, pipeline) == 1.0:
+            return predictor
+    except (AttributeError, IndexError, ValueError):
+        pass
+    return pipeline
+
+def as_centroid_predictor(model) -> CentroidPredictor:
+    """Geometri (center/scale/centroid, n_clusters) model; pipeline sklearn yang tidak lolos parity
+    (fallback compile_pipeline) dikonversi hanya untuk dibaca parameternya, prediksinya tetap dari pipeline."""
+    return model if isinstance(model, CentroidPredictor) else CentroidPredictor.from_pipeline(model)
+
+
+# =========================
+# SLIM ARTIFACT
+# =========================
+# Artifact inference-only: hanya parameter scaler, centroid, urutan fitur, versi sklearn dan jumlah
+# baris per cluster. labels_ hasil training (bagian terbesar dari .pkl) tidak ikut disimpan.
+# Fingerprint .pkl asal ikut disimpan: setelah retrain, artifact slim lama tidak lagi dipakai.
+SLIM_EXTENSIONS = (".npz", ".json")
+_fingerprints = {}
+
+def _stat_key(path) -> tuple:
+    stat = os.stat(path)
+    return path, stat.st_mtime_ns, stat.st_size
+
+def pickle_fingerprint(path) -> str:
+    """Hash isi .pkl (memo per mtime/size), sehingga checkout/copy yang hanya mengubah mtime tetap cocok."""
+    import hashlib
+
+    key = _stat_key(path)
+    if key not in _fingerprints:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        _fingerprints[key] = digest.hexdigest()
+    return _fingerprints[key]
+
+def read_slim_source(path):
+    """Fingerprint .pkl asal yang tercatat di artifact slim, None untuk artifact lama (tanpa fingerprint)."""
+    key = ("source",) + _stat_key(path)
+    if key not in _fingerprints:
+        if path.endswith(".json"):
+            with open(path, encoding="utf-8") as f:
+                source = json.load(f).get("source")
+        else:
+            with np.load(path, allow_pickle=False) as data:
+                source = str(data["source"]) if "source" in data.files else None
+        _fingerprints[key] = source or None
+    return _fingerprints[key]
+
+def slim_is_current(slim_path, path) -> bool:
+    """True jika artifact slim berasal dari .pkl `path` yang sekarang (atau .pkl-nya tidak ada)."""
+    if not os.path.exists(path):
+        return True
+    try:
+        source = read_slim_source(slim_path)
+    except (OSError, ValueError, KeyError):
+        return False
+    if source is None:
+        # Artifact lama: hanya bisa dibandingkan lewat mtime (sama = ragu -> anggap basi)
+        return os.stat(slim_path).st_mtime_ns > os.stat(path).st_mtime_ns
+    return source == pickle_fingerprint(path)
+
+def slim_model_paths(path) -> list:
+    base, _ = os.path.splitext(path)
+    return [base + ext for ext in SLIM_EXTENSIONS]
+
+def cached_slim_path(path) -> str:
+    """Artifact slim hasil kompilasi runtime di cache dir, dinamai per fingerprint .pkl (tidak pernah basi)."""
+    from olist_data import CACHE_DIR
+
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(CACHE_DIR, "models", f"{stem}.{pickle_fingerprint(path)}.npz")
+
+def save_slim_model(predictor: CentroidPredictor, path_or_file, fmt="npz"):
+    if fmt == "json":
+        payload = {
+            "center": predictor.center.tolist(),
+            "scale": predictor.scale.tolist(),
+            "centroids": predictor.centroids.tolist(),
+            "features": predictor.features,
+            "sklearn_version": predictor.sklearn_version,
+            "source": predictor.source,
+        }
+        if predictor.counts is not None:
+            payload["counts"] = predictor.counts.tolist()
+        if isinstance(path_or_file, (str, os.PathLike)):
+            with open(path_or_file, "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+        else:
+            path_or_file.write(json.dumps(payload).encode("utf-8"))
+    else:
+        extra = {} if predictor.counts is None else {"counts": predictor.counts}
+        # savez tanpa kompresi: member .npy disimpan apa adanya di dalam zip
+        np.savez(
+            path_or_file,
+            center=predictor.center,
+            scale=predictor.scale,
+            centroids=predictor.centroids,
+            features=np.array(predictor.features),
+            sklearn_version=np.array(predictor.sklearn_version or ""),
+            source=np.array(predictor.source or ""),
+            **extra,
+        )
+
+def export_slim_model(pipeline, path, source=None):
+    predictor = CentroidPredictor.from_pipeline(pipeline)
+    predictor.source = source
+    save_slim_model(predictor, path, "json" if path.endswith(".json") else "npz")
+    return predictor
+
+def load_slim_model(path, dtype=np.float64) -> CentroidPredictor:
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            payload = json.load(f)
+    else:
+        with np.load(path, allow_pickle=False) as data:
+            payload = {k: data[k] for k in data.files}
+        payload["features"] = payload["features"].tolist()
+        payload["sklearn_version"] = str(payload["sklearn_version"]) or None
+        if "source" in payload:
+            payload["source"] = str(payload["source"])
+    return CentroidPredictor(
+        payload["center"], payload["scale"], payload["centroids"], payload["features"],
+        dtype=dtype, sklearn_version=payload["sklearn_version"], counts=payload.get("counts"),
+        source=payload.get("source"),
+    )
+
+# Versi hasil refresh (olist_refresh.py) ditunjuk oleh <base>.current.json; diganti atomik saat publish
+def model_pointer_path(path) -> str:
+    return os.path.splitext(path)[0] + ".current.json"
+
+def read_model_pointer(path):
+    """Isi pointer versi aktif, atau None jika belum pernah di-refresh / artifact-nya hilang."""
+    try:
+        with open(model_pointer_path(path), encoding="utf-8") as f:
+            pointer = json.load(f)
+    except (OSError, ValueError):
+        return None
+    artifact = os.path.join(os.path.dirname(os.path.abspath(path)), pointer.get("artifact", ""))
+    return pointer if os.path.isfile(artifact) else None
+
+def model_artifact_path(path) -> str:
+    """File yang benar-benar dimuat untuk `path`: versi aktif dari pointer, artifact slim, salinan slim
+    di cache dir, atau .pkl itu sendiri.
+
+    Versi/artifact slim yang berasal dari .pkl lain (model sudah di-retrain) dilewati.
+    """
+    pointer = read_model_pointer(path)
+    if pointer is not None:
+        artifact = os.path.join(os.path.dirname(path), pointer["artifact"])
+        if slim_is_current(artifact, path):
+            return artifact
+    for slim_path in slim_model_paths(path):
+        if os.path.exists(slim_path) and slim_is_current(slim_path, path):
+            return slim_path
+    if os.path.exists(path) and os.path.exists(cached_slim_path(path)):
+        return cached_slim_path(path)
+    return path
+
+def model_key(path) -> str:
+    """Identitas murah (tanpa membaca isi file) untuk key cache: berubah saat versi baru dipublikasikan."""
+    artifact_path = model_artifact_path(path)
+    stat = os.stat(artifact_path)
+    return f"{os.path.basename(artifact_path)}:{stat.st_mtime_ns}:{stat.st_size}"
+
+def load_model_artifact(path):
+    """Pakai artifact slim (.npz/.json) di samping `path` jika ada, jika tidak unpickle pipeline.
+
+    Pipeline yang lolos parity disimpan sebagai artifact slim di cache dir supaya load berikutnya cepat lagi.
+    File di samping `path` tidak pernah ditulis saat runtime; artifact yang basi diperbarui lewat
+    `python olist_model.py`.
+    """
+    artifact_path = model_artifact_path(path)
+    if artifact_path != path:
+        return load_slim_model(artifact_path)
+
+    import joblib
+
+    model = compile_pipeline(joblib.load(path))
+    if isinstance(model, CentroidPredictor):
+        model.source = pickle_fingerprint(path)
+        slim_path = cached_slim_path(path)
+        tmp_path = f"{slim_path}.{os.getpid()}.part"
+        try:
+            os.makedirs(os.path.dirname(slim_path), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                save_slim_model(model, f)
+            os.replace(tmp_path, slim_path)
+        except OSError:
+            # Cache dir read-only: tetap jalan dari pickle
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return model
+
+
+def cold_load_seconds(code) -> float:
+    import subprocess
+    import sys
+
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], check=True)
+    return time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import joblib
+
+    parser = argparse.ArgumentParser(description="Export artifact model inference-only dari pipeline .pkl")
+    parser.add_argument("--model", default="rfm_kmeans_pipeline.pkl")
+    parser.add_argument("--format", choices=["npz", "json"], default="npz")
+    args = parser.parse_args()
+
+    out_path = os.path.splitext(args.model)[0] + "." + args.format
+    pipeline = joblib.load(args.model)
+    predictor = export_slim_model(pipeline, out_path, source=pickle_fingerprint(args.model))
+    parity = check_parity(load_slim_model(out_path), pipeline)
+
+    # Cold start diukur di proses baru, termasuk import sklearn yang dibutuhkan unpickle
+    t_pkl = cold_load_seconds(f"import joblib; joblib.load({args.model!r})")
+    t_slim = cold_load_seconds(f"import olist_model; olist_model.load_slim_model({out_path!r})")
+
+    print(f"{args.model}: {os.path.getsize(args.model):,} bytes, cold load {t_pkl * 1e3:.0f} ms")
+    print(f"{out_path}: {os.path.getsize(out_path):,} bytes, cold load {t_slim * 1e3:.0f} ms")
+    print(f"parity vs pipeline: {parity:.6f}")
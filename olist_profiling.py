@@ -0,0 +1,335 @@
+import bisect
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+# Instrumentasi ringan untuk dashboard: span waktu, hit/miss cache Streamlit dan snapshot memori.
+# Tidak bergantung pada Streamlit, jadi bisa dipakai juga dari CLI / worker.
+#   OLIST_PROFILE=0            matikan semua span (no-op)
+#   OLIST_PROFILE_LOG=path     tambahkan satu baris JSON per rerun ke file ini
+#   OLIST_METRICS_FILE=path    tulis metrik format teks Prometheus (textfile collector) tiap rerun
+ENABLED = os.environ.get("OLIST_PROFILE", "1") != "0"
+LOG_PATH = os.environ.get("OLIST_PROFILE_LOG")
+METRICS_PATH = os.environ.get("OLIST_METRICS_FILE")
+
+# Batas bucket histogram durasi span (detik), sama untuk semua span
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Jumlah span yang disimpan per trace rerun (span berikutnya tetap masuk agregat)
+MAX_TRACE_SPANS = 500
+
+
+# =========================
+# MEMORY
+# =========================
+def memory_snapshot() -> dict:
+    """RSS saat ini dan peak RSS proses (byte); None jika tidak bisa dibaca di platform ini."""
+    rss = peak = None
+    try:
+        import psutil
+
+        info = psutil.Process().memory_info()
+        rss = info.rss
+        peak = getattr(info, "peak_wset", None)
+    except ImportError:
+        try:
+            with open("/proc/self/statm") as f:
+                rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, AttributeError):
+            pass
+    if peak is None:
+        try:
+            import resource
+
+            # ru_maxrss dalam KB di Linux, byte di macOS
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            peak = peak if sys.platform == "darwin" else peak * 1024
+        except ImportError:
+            pass
+    return {"rss": rss, "peak_rss": peak}
+
+
+# =========================
+# METRICS REGISTRY
+# =========================
+class SpanStats:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+
+class Metrics:
+    """Agregat per proses (dipakai bersama semua sesi Streamlit, thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans = {}
+        self.cache = {}
+        self.reruns = {}
+
+    def observe(self, name, seconds):
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                stats = self.spans[name] = SpanStats()
+            stats.observe(seconds)
+
+    def cache_event(self, name, event):
+        with self._lock:
+            counters = self.cache.setdefault(name, {"calls": 0, "misses": 0})
+            counters[event] += 1
+
+    def rerun(self, label, seconds):
+        with self._lock:
+            counters = self.reruns.setdefault(label, [0, 0.0])
+            counters[0] += 1
+            counters[1] += seconds
+
+    def cache_stats(self) -> dict:
+        """name -> {"hits", "misses"}; hit = panggilan yang tidak sampai mengeksekusi fungsi."""
+        with self._lock:
+            return {name: {"hits": c["calls"] - c["misses"], "misses": c["misses"]} for name, c in self.cache.items()}
+
+    def span_stats(self) -> dict:
+        with self._lock:
+            return {name: {"count": s.count, "total": s.total, "max": s.max} for name, s in self.spans.items()}
+
+    def to_prometheus(self, prefix="olist") -> str:
+        lines = []
+
+        def metric(name, kind, help_text):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+
+        with self._lock:
+            metric("span_seconds", "histogram", "Durasi span instrumentasi dashboard.")
+            for name, s in sorted(self.spans.items()):
+                label = _label(name)
+                cumulative = 0
+                for le, n in zip(BUCKETS + (float("inf"),), s.buckets):
+                    cumulative += n
+                    bound = "+Inf" if le == float("inf") else repr(le)
+                    lines.append(f'{prefix}_span_seconds_bucket{{span="{label}",le="{bound}"}} {cumulative}')
+                lines.append(f'{prefix}_span_seconds_sum{{span="{label}"}} {s.total:.6f}')
+                lines.append(f'{prefix}_span_seconds_count{{span="{label}"}} {s.count}')
+            metric("span_seconds_max", "gauge", "Durasi span terlama sejak proses mulai.")
+            for name, s in sorted(self.spans.items()):
+                lines.append(f'{prefix}_span_seconds_max{{span="{_label(name)}"}} {s.max:.6f}')
+            metric("cache_requests_total", "counter", "Panggilan fungsi st.cache_data / st.cache_resource.")
+            for name, c in sorted(self.cache.items()):
+                lines.append(f'{prefix}_cache_requests_total{{function="{_label(name)}",result="hit"}} '
+                             f'{c["calls"] - c["misses"]}')
+                lines.append(f'{prefix}_cache_requests_total{{function="{_label(name)}",result="miss"}} {c["misses"]}')
+            metric("reruns_total", "counter", "Jumlah rerun script per halaman.")
+            for label, (count, _) in sorted(self.reruns.items()):
+                lines.append(f'{prefix}_reruns_total{{page="{_label(label)}"}} {count}')
+            metric("rerun_seconds_total", "counter", "Total durasi rerun script per halaman.")
+            for label, (_, total) in sorted(self.reruns.items()):
+                lines.append(f'{prefix}_rerun_seconds_total{{page="{_label(label)}"}} {total:.6f}')
+
+        memory = memory_snapshot()
+        for key, help_text in (("rss", "Resident memory proses."), ("peak_rss", "Peak resident memory proses.")):
+            if memory[key] is not None:
+                metric(f"process_{key}_bytes", "gauge", help_text)
+                lines.append(f"{prefix}_process_{key}_bytes {memory[key]}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self.spans.clear()
+            self.cache.clear()
+            self.reruns.clear()
+
+def _label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+METRICS = Metrics()
+
+
+# =========================
+# SPANS & TRACE
+# =========================
+class Trace:
+    """Span satu rerun (urutan mulai, dengan kedalaman nesting) plus snapshot memori awal/akhir."""
+
+    def __init__(self, label):
+        self.label = label
+        self.started = time.time()
+        self.t0 = time.perf_counter()
+        self.memory_start = memory_snapshot()
+        self.memory_end = None
+        self.seconds = None
+        self.interrupted = False
+        self.spans = []
+        self.depth = 0
+
+    @property
+    def finished(self) -> bool:
+        return self.seconds is not None
+
+    def to_dict(self) -> dict:
+        return {
+            "page": self.label,
+            "started": self.started,
+            "seconds": self.seconds,
+            "interrupted": self.interrupted,
+            "memory_start": self.memory_start,
+            "memory_end": self.memory_end,
+            "spans": [{"name": n, "depth": d, "start": s, "seconds": t} for n, d, s, t in self.spans],
+        }
+
+class _Local(threading.local):
+    # Default di level class: getattr tanpa default jauh lebih murah di hot path
+    trace = None
+
+_local = _Local()
+
+def current_trace():
+    return _local.trace
+
+class span:
+    """`with span("nama"):` atau `@span("nama")`. Durasi masuk agregat proses dan trace rerun yang aktif."""
+
+    __slots__ = ("name", "_t0", "_trace", "_index")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        if not ENABLED:
+            return self
+        trace = self._trace = current_trace()
+        self._index = None
+        if trace is not None and not trace.finished and len(trace.spans) < MAX_TRACE_SPANS:
+            self._index = len(trace.spans)
+            trace.spans.append((self.name, trace.depth, 0.0, None))
+            trace.depth += 1
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if not ENABLED:
+            return False
+        seconds = time.perf_counter() - self._t0
+        METRICS.observe(self.name, seconds)
+        trace = self._trace
+        if self._index is not None:
+            trace.depth -= 1
+            trace.spans[self._index] = (self.name, trace.depth, self._t0 - trace.t0, seconds)
+        return False
+
+    def __call__(self, fn):
+        name = self.name
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+def timed(fn):
+    """Decorator span dengan nama fungsi."""
+    return span(fn.__name__)(fn)
+
+def observe(name, seconds):
+    """Catat durasi yang diukur di tempat lain (mis. job di proses worker)."""
+    if ENABLED:
+        METRICS.observe(name, seconds)
+
+def start_trace(label, state=None) -> Trace:
+    """Mulai trace rerun di thread ini. `state` (mis. st.session_state) menyimpan trace yang sedang
+    terbuka: rerun yang berhenti lewat st.stop()/st.rerun() ditutup saat rerun berikutnya dimulai."""
+    if state is not None:
+        previous = state.get("_profiling_trace")
+        if previous is not None and not previous.finished:
+            finish_trace(previous, interrupted=True)
+    trace = Trace(label)
+    _local.trace = trace
+    if state is not None:
+        state["_profiling_trace"] = trace
+    return trace
+
+def finish_trace(trace=None, interrupted=False):
+    trace = trace or current_trace()
+    if trace is None or trace.finished:
+        return trace
+    if interrupted:
+        # Akhir rerun tidak teramati; pakai akhir span terakhir sebagai perkiraan
+        ends = [s + t for _, _, s, t in trace.spans if t is not None]
+        trace.seconds = max(ends, default=0.0)
+    else:
+        trace.seconds = time.perf_counter() - trace.t0
+    trace.interrupted = interrupted
+    trace.memory_end = memory_snapshot()
+    if _local.trace is trace:
+        _local.trace = None
+    if ENABLED:
+        METRICS.rerun(trace.label, trace.seconds)
+        export(trace)
+    return trace
+
+
+# =========================
+# STREAMLIT CACHE
+# =========================
+def instrumented_cache(cache_decorator, name=None):
+    """Bungkus st.cache_data / st.cache_resource dengan counter hit/miss dan span.
+
+        @instrumented_cache(st.cache_data)
+        def load_stats(path, mtime): ...
+
+    Setiap panggilan dihitung di luar cache, eksekusi fungsi (miss) dihitung di dalamnya.
+    """
+    def decorate(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def compute(*args, **kwargs):
+            METRICS.cache_event(label, "misses")
+            with span(f"{label} (miss)"):
+                return fn(*args, **kwargs)
+
+        cached = cache_decorator(compute)
+
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            METRICS.cache_event(label, "calls")
+            with span(label):
+                return cached(*args, **kwargs)
+
+        call.clear = cached.clear
+        return call
+    return decorate
+
+
+# =========================
+# EXPORT
+# =========================
+_export_lock = threading.Lock()
+
+def export(trace: Trace):
+    """Tulis trace ke log JSON (append) dan metrik Prometheus (replace atomik), jika dikonfigurasi."""
+    if not (LOG_PATH or METRICS_PATH):
+        return
+    with _export_lock:
+        if LOG_PATH:
+            with open(LOG_PATH, "a", encoding="utf-8") as f:
+                f.write(json.dumps(trace.to_dict()) + "\n")
+        if METRICS_PATH:
+            tmp_path = f"{METRICS_PATH}.{os.getpid()}.part"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(METRICS.to_prometheus())
+            os.replace(tmp_path, METRICS_PATH)
@@ -0,0 +1,281 @@
+import glob
+import itertools
+import json
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from olist_model import (CentroidPredictor, load_model_artifact, model_artifact_path, model_pointer_path,
+                         read_model_pointer, save_slim_model)
+from olist_validation import FEATURE_SCHEMA, validate_frame
+
+# Refresh inkremental centroid K-Means dari data baru, tanpa refit penuh:
+#   - scaler (RobustScaler) dibekukan, jadi ruang jarak tetap sama dengan model yang sedang dipakai
+#   - centroid di-update per mini-batch mulai dari centroid sekarang; learning rate per centroid
+#     = n_batch / jumlah baris yang pernah masuk ke centroid itu (counts disimpan di artifact)
+#   - centroid baru dicocokkan ke centroid lama supaya ID cluster (dan teks strategi 0/1/2) tetap benar
+#   - versi baru = <base>.v<N>.npz, lalu pointer <base>.current.json diganti atomik. model_artifact_path()
+#     mengikuti pointer, jadi sesi Streamlit, worker job dan CLI scoring pindah versi tanpa restart.
+BATCH_SIZE = 10_000
+CHUNK_SIZE = 200_000
+# Bobot awal per centroid jika artifact tidak punya counts dan labels_ training tidak tersedia
+PRIOR_WEIGHT = 10_000
+# Refresh ditolak jika centroid bergeser lebih dari fraksi ini dari jarak antar-centroid terdekat
+MAX_SHIFT_RATIO = 0.5
+KEEP_VERSIONS = 5
+
+
+# =========================
+# MINI-BATCH UPDATE
+# =========================
+def minibatch_update(centroids: np.ndarray, counts: np.ndarray, Z: np.ndarray) -> np.ndarray:
+    """Satu langkah mini-batch K-Means di ruang scaler (in-place); mengembalikan label batch.
+
+    Tiap centroid bergerak ke rata-rata berjalan semua baris yang pernah di-assign kepadanya.
+    """
+    k = centroids.shape[0]
+    sq_dist = (Z ** 2).sum(axis=1)[:, None] - 2.0 * Z @ centroids.T + (centroids ** 2).sum(axis=1)
+    labels = sq_dist.argmin(axis=1)
+    n = np.bincount(labels, minlength=k).astype(np.float64)
+    sums = np.stack([np.bincount(labels, weights=Z[:, j], minlength=k) for j in range(Z.shape[1])], axis=1)
+    counts += n
+    moved = n > 0
+    centroids[moved] += (sums[moved] - n[moved, None] * centroids[moved]) / counts[moved, None]
+    return labels
+
+def match_centroids(old: np.ndarray, new: np.ndarray) -> np.ndarray:
+    """Permutasi `perm` dengan new[perm[i]] = pasangan centroid lama i (total jarak minimum)."""
+    cost = np.sqrt(((old[:, None, :] - new[None, :, :]) ** 2).sum(axis=2))
+    k = cost.shape[0]
+    if k <= 8:
+        best = min(itertools.permutations(range(k)), key=lambda p: cost[np.arange(k), list(p)].sum())
+        return np.asarray(best)
+    from scipy.optimize import linear_sum_assignment
+
+    return linear_sum_assignment(cost)[1]
+
+def initial_counts(model_path, predictor: CentroidPredictor, prior_weight=PRIOR_WEIGHT) -> tuple:
+    """(counts, sumber). Urutan: counts di artifact, labels_ training di .pkl, lalu `prior_weight`."""
+    k = predictor.n_clusters
+    if predictor.counts is not None:
+        return predictor.counts.copy(), "artifact"
+    if model_path.endswith(".pkl") and os.path.exists(model_path):
+        try:
+            import joblib
+
+            labels = getattr(joblib.load(model_path).steps[-1][1], "labels_", None)
+            if labels is not None:
+                return np.bincount(labels, minlength=k).astype(np.float64), "labels_"
+        except (ImportError, AttributeError, IndexError):
+            pass
+    return np.full(k, float(prior_weight)), "prior"
+
+
+# =========================
+# STREAMING INPUT
+# =========================
+def iter_feature_chunks(path, features, chunksize=CHUNK_SIZE):
+    """Matriks feature float64 per chunk dari CSV/Parquet; baris yang melanggar skema dibuang."""
+    schema_rules = {f: FEATURE_SCHEMA[f] for f in features if f in FEATURE_SCHEMA}
+    if path.endswith(".parquet"):
+        frames = (b.to_pandas() for b in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=features))
+    else:
+        frames = pd.read_csv(path, usecols=features, chunksize=chunksize)
+    for df in frames:
+        valid, _ = validate_frame(df, schema_rules)
+        yield df.loc[valid, features].to_numpy(dtype=np.float64), int((~valid).sum())
+
+def refresh_centroids(predictor: CentroidPredictor, counts, chunks, batch_size=BATCH_SIZE) -> dict:
+    """Update centroid `predictor` dengan data dari `chunks` (iterable of (X, rows_dibuang)).
+
+    Mengembalikan predictor baru (centroid sudah dicocokkan ke ID lama) plus ringkasan perubahan.
+    """
+    centroids = predictor.centroids.copy()
+    counts = np.asarray(counts, dtype=np.float64).copy()
+    inv_scale = 1.0 / predictor.scale
+    rows = dropped = 0
+    assigned = np.zeros(predictor.n_clusters, dtype=np.int64)
+    for X, bad in chunks:
+        dropped += bad
+        Z = (X - predictor.center) * inv_scale
+        for start in range(0, len(Z), batch_size):
+            labels = minibatch_update(centroids, counts, Z[start:start + batch_size])
+            assigned += np.bincount(labels, minlength=predictor.n_clusters)
+        rows += len(Z)
+
+    perm = match_centroids(predictor.centroids, centroids)
+    centroids, counts = centroids[perm], counts[perm]
+    # assigned dihitung dengan ID sebelum pencocokan
+    assigned = assigned[perm]
+    shift = np.sqrt(((centroids - predictor.centroids) ** 2).sum(axis=1))
+    gaps = np.sqrt(((predictor.centroids[:, None] - predictor.centroids[None]) ** 2).sum(axis=2))
+    np.fill_diagonal(gaps, np.inf)
+    refreshed = CentroidPredictor(predictor.center, predictor.scale, centroids, predictor.features,
+                                  dtype=predictor.dtype, sklearn_version=predictor.sklearn_version, counts=counts,
+                                  source=predictor.source)
+    return {
+        "predictor": refreshed,
+        "rows": rows,
+        "dropped": dropped,
+        "assigned": assigned.tolist(),
+        "permutation": perm.tolist(),
+        "shift": shift.tolist(),
+        # Pergeseran relatif terhadap jarak ke centroid tetangga terdekat (skala bebas satuan)
+        "shift_ratio": (shift / gaps.min(axis=1)).tolist(),
+    }
+
+
+# =========================
+# VERSIONED PUBLISH
+# =========================
+def model_versions(model_path) -> list:
+    """[(nomor versi, path artifact)] terurut, untuk semua versi hasil refresh di samping `model_path`."""
+    base = os.path.splitext(model_path)[0]
+    pattern = re.compile(re.escape(os.path.basename(base)) + r"\.v(\d+)\.npz$")
+    found = []
+    for p in glob.glob(glob.escape(base) + ".v*.npz"):
+        m = pattern.search(os.path.basename(p))
+        if m:
+            found.append((int(m.group(1)), p))
+    return sorted(found)
+
+def write_pointer(model_path, pointer: dict):
+    path = model_pointer_path(model_path)
+    tmp_path = f"{path}.{os.getpid()}.part"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(pointer, f, indent=2)
+    os.replace(tmp_path, path)
+
+def publish_model(predictor: CentroidPredictor, model_path, info=None, keep=KEEP_VERSIONS) -> dict:
+    """Tulis `predictor` sebagai versi baru lalu arahkan pointer ke sana (satu os.replace).
+
+    Sesi yang sudah memegang versi lama tetap memakainya sampai rerun berikutnya.
+    """
+    base = os.path.splitext(model_path)[0]
+    version = max([v for v, _ in model_versions(model_path)], default=0) + 1
+    while True:
+        artifact = f"{base}.v{version}.npz"
+        try:
+            # "xb": dua refresh bersamaan tidak pernah menulis nomor versi yang sama
+            with open(artifact, "xb") as f:
+                save_slim_model(predictor, f)
+            break
+        except FileExistsError:
+            version += 1
+    previous = read_model_pointer(model_path)
+    pointer = {
+        "version": version,
+        "artifact": os.path.basename(artifact),
+        "parent": os.path.basename(model_artifact_path(model_path)),
+        "created": time.time(),
+        **(info or {}),
+    }
+    write_pointer(model_path, pointer)
+    prune_versions(model_path, keep, active=version, parent=(previous or {}).get("version"))
+    return pointer
+
+def prune_versions(model_path, keep=KEEP_VERSIONS, active=None, parent=None):
+    # Versi aktif dan induknya (untuk rollback) tidak pernah dihapus
+    versions = model_versions(model_path)
+    for version, path in versions[:max(len(versions) - keep, 0)]:
+        if version not in (active, parent):
+            os.remove(path)
+
+def rollback_model(model_path, version=None) -> dict:
+    """Arahkan pointer ke `version` (default: versi di bawah versi aktif; di bawah v1 = artifact awal)."""
+    current = read_model_pointer(model_path)
+    available = dict(model_versions(model_path))
+    if version is None:
+        if current is None:
+            raise ValueError("Belum ada versi hasil refresh yang aktif")
+        older = [v for v in available if v < current["version"]]
+        if not older:
+            os.remove(model_pointer_path(model_path))
+            return {"artifact": os.path.basename(model_artifact_path(model_path))}
+        version = max(older)
+    if version not in available:
+        raise ValueError(f"Versi {version} tidak ditemukan")
+    pointer = {"version": version, "artifact": os.path.basename(available[version]),
+               "replaced": os.path.basename(model_artifact_path(model_path)), "created": time.time(), "rollback": True}
+    write_pointer(model_path, pointer)
+    return pointer
+
+
+# =========================
+# REFRESH
+# =========================
+def refresh_model(model_path, data_path, batch_size=BATCH_SIZE, chunksize=CHUNK_SIZE, prior_weight=PRIOR_WEIGHT,
+                  max_shift_ratio=MAX_SHIFT_RATIO, dry_run=False, keep=KEEP_VERSIONS) -> dict:
+    """Refresh model aktif dengan `data_path` lalu publikasikan versi baru (kecuali dry_run / ditolak)."""
+    predictor = load_model_artifact(model_path)
+    if not isinstance(predictor, CentroidPredictor):
+        raise ValueError("Refresh inkremental butuh model RobustScaler + KMeans (CentroidPredictor)")
+    counts, counts_source = initial_counts(model_path, predictor, prior_weight)
+    t0 = time.perf_counter()
+    result = refresh_centroids(predictor, counts, iter_feature_chunks(data_path, predictor.features, chunksize),
+                               batch_size)
+    result["seconds"] = time.perf_counter() - t0
+    result["counts_source"] = counts_source
+    result["base_artifact"] = os.path.basename(model_artifact_path(model_path))
+    result["rejected"] = max(result["shift_ratio"]) > max_shift_ratio
+    result["pointer"] = None
+    if result["rows"] and not result["rejected"] and not dry_run:
+        info = {key: result[key] for key in ("rows", "dropped", "permutation", "shift")}
+        info["data"] = os.path.basename(data_path)
+        result["pointer"] = publish_model(result["predictor"], model_path, info, keep)
+    return result
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Refresh inkremental centroid model dari data baru (tanpa refit penuh)")
+    parser.add_argument("data", nargs="?", help="CSV / Parquet data baru dengan kolom feature")
+    parser.add_argument("--model", default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                        "rfm_kmeans_pipeline.pkl"))
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--prior-weight", type=float, default=PRIOR_WEIGHT,
+                        help="Bobot awal per centroid jika jumlah baris training tidak diketahui")
+    parser.add_argument("--max-shift", type=float, default=MAX_SHIFT_RATIO,
+                        help="Tolak jika centroid bergeser > fraksi ini dari jarak ke centroid tetangga")
+    parser.add_argument("--keep", type=int, default=KEEP_VERSIONS, help="Jumlah versi yang disimpan")
+    parser.add_argument("--dry-run", action="store_true", help="Hitung dan tampilkan saja, jangan publikasikan")
+    parser.add_argument("--rollback", nargs="?", const=-1, type=int, metavar="VERSION",
+                        help="Kembali ke versi sebelumnya (atau VERSION) tanpa refresh")
+    args = parser.parse_args(argv)
+
+    if args.rollback is not None:
+        try:
+            pointer = rollback_model(args.model, None if args.rollback < 0 else args.rollback)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"aktif: {pointer['artifact']}")
+        return 0
+    if not args.data:
+        parser.error("data wajib diisi (kecuali --rollback)")
+
+    result = refresh_model(args.model, args.data, args.batch_size, args.chunksize, args.prior_weight,
+                           args.max_shift, args.dry_run, args.keep)
+    print(f"{result['rows']:,} baris ({result['dropped']:,} dibuang) dalam {result['seconds']:.2f} s, "
+          f"bobot awal dari {result['counts_source']}")
+    for k, (shift, ratio, n) in enumerate(zip(result["shift"], result["shift_ratio"], result["assigned"])):
+        print(f"  cluster {k}: geser {shift:.4f} ({ratio:.1%} jarak tetangga), {n:,} baris baru")
+    if result["permutation"] != sorted(result["permutation"]):
+        print(f"  centroid dicocokkan ulang ke ID lama: {result['permutation']}")
+    if result["rejected"]:
+        print(f"Ditolak: pergeseran melebihi --max-shift {args.max_shift:.0%}; model aktif tidak berubah",
+              file=sys.stderr)
+        return 1
+    if result["pointer"] is not None:
+        print(f"{result['base_artifact']} -> {result['pointer']['artifact']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,675 @@
+import glob
+import gzip
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from olist_data import CACHE_DIR
+from olist_model import nearest_scores
+from olist_drift import DriftMonitor, ensure_reference_profile, load_drift_report, load_reference_profile, save_drift_report
+from olist_index import ID_COLUMN, CustomerIndexWriter, index_paths
+from olist_validation import (
+    FEATURE_SCHEMA,
+    ValidationReport,
+    load_validation_report,
+    validate_frame,
+    validate_values,
+    violation_labels,
+)
+
+FEATURES = [
+    "recency",
+    "frequency",
+    "monetary",
+    "payment_installments",
+    "price",
+    "review_score"
+]
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rfm_kmeans_pipeline.pkl")
+# Dataset training, dipakai sebagai profil referensi untuk monitoring drift
+DEFAULT_REFERENCE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Olist_Dataset_Clustering.csv")
+
+# Jumlah baris per chunk saat membaca file upload
+CHUNK_SIZE = 100_000
+# Jumlah baris per shard saat scoring paralel
+SHARD_SIZE = 25_000
+PREDICTION_CACHE_DIR = os.path.join(CACHE_DIR, "predictions")
+# Skor per baris yang ditulis bersama label (lihat olist_model.nearest_scores)
+SCORE_COLUMNS = ("cluster_distance", "cluster_margin", "cluster_confidence")
+OUTPUT_COLUMNS = ("cluster",) + SCORE_COLUMNS
+# Metadata file hasil: feature yang semua nilainya bulat, diekspor kembali sebagai integer
+INTEGER_FEATURES_KEY = "olist:integer_features"
+
+
+# =========================
+# VALIDATION
+# =========================
+# Aturan nilai ada di FEATURE_SCHEMA (olist_validation), sama untuk input manual dan upload batch
+def validate_manual_input(recency, frequency, monetary, payment_installments, price, review_score):
+    return validate_values({
+        "recency": recency,
+        "frequency": frequency,
+        "monetary": monetary,
+        "payment_installments": payment_installments,
+        "price": price,
+        "review_score": review_score,
+    })
+
+
+# =========================
+# RESULT FILE (SPILL)
+# =========================
+# Companion diberi nama dari path lengkap (out.csv -> out.csv.validation.json), supaya out.csv dan
+# out.parquet di direktori yang sama tidak saling menimpa / menghapus companion
+def quarantine_path(path) -> str:
+    return path + ".quarantine.parquet"
+
+def validation_report_path(path) -> str:
+    return path + ".validation.json"
+
+def drift_report_path(path) -> str:
+    return path + ".drift.json"
+
+def result_companions(path) -> list:
+    # File export, baris karantina, laporan validasi/drift, index customer, companion Arrow (olist_store)
+    # dan peta cluster (olist_clustermap): semuanya "<path>.*", ikut dihapus/dihitung
+    return glob.glob(glob.escape(path) + ".*")
+
+def discard_result(path):
+    if not path:
+        return
+    for p in [path] + result_companions(path):
+        if os.path.exists(p):
+            os.remove(p)
+
+def result_schema(columns, features) -> pa.Schema:
+    # Feature selalu float64, kolom lain string, supaya schema tiap chunk sama
+    fields = [
+        pa.field(c, pa.float64() if c in features else pa.string())
+        for c in columns if c not in OUTPUT_COLUMNS
+    ]
+    fields.append(pa.field("cluster", pa.int32()))
+    fields.extend(pa.field(c, pa.float64()) for c in SCORE_COLUMNS)
+    return pa.schema(fields)
+
+def integer_features(path) -> list:
+    """Feature yang semua nilainya bulat di file hasil (disimpan float64 supaya schema tiap chunk sama)."""
+    metadata = pq.ParquetFile(path).metadata.metadata or {}
+    value = metadata.get(INTEGER_FEATURES_KEY.encode())
+    return json.loads(value) if value else []
+
+def quarantine_schema(schema: pa.Schema) -> pa.Schema:
+    # Baris yang gagal validasi: kolom input + nomor baris asli (0-based) + rule yang dilanggar.
+    # Feature disimpan sebagai teks asli (mis. "abc"), bukan hasil konversi ke float64 yang menjadi NaN
+    fields = [f.with_type(pa.string()) for f in schema if f.name not in OUTPUT_COLUMNS]
+    return pa.schema(fields + [pa.field("_row", pa.int64()), pa.field("_errors", pa.string())])
+
+def result_columns(path) -> list:
+    return pq.ParquetFile(path).schema_arrow.names
+
+def result_num_rows(path) -> int:
+    return pq.ParquetFile(path).metadata.num_rows
+
+def read_result_head(path, n, columns=None) -> pd.DataFrame:
+    pf = pq.ParquetFile(path)
+    batch = next(pf.iter_batches(batch_size=n, columns=columns), None) if n > 0 else None
+    if batch is None:
+        schema = pf.schema_arrow
+        if columns is not None:
+            schema = pa.schema([schema.field(c) for c in columns])
+        return schema.empty_table().to_pandas()
+    return batch.to_pandas()
+
+def read_result_rows(path, start, stop, columns=None) -> pd.DataFrame:
+    """Baris [start, stop) dari file hasil; hanya row group yang mencakup rentang itu yang dibaca."""
+    pf = pq.ParquetFile(path)
+    groups, first, offset = [], None, 0
+    for i in range(pf.metadata.num_row_groups):
+        n = pf.metadata.row_group(i).num_rows
+        if offset < stop and offset + n > start:
+            groups.append(i)
+            first = offset if first is None else first
+        offset += n
+    if not groups:
+        return read_result_head(path, 0, columns=columns)
+    table = pf.read_row_groups(groups, columns=columns)
+    return table.slice(start - first, stop - start).to_pandas()
+
+def result_column_range(path, column) -> tuple:
+    """(min, max) kolom dari statistik row group Parquet, tanpa membaca datanya."""
+    pf = pq.ParquetFile(path)
+    idx = pf.schema_arrow.get_field_index(column)
+    lo, hi = None, None
+    for i in range(pf.metadata.num_row_groups):
+        stats = pf.metadata.row_group(i).column(idx).statistics
+        if stats is None or not stats.has_min_max:
+            continue
+        lo = stats.min if lo is None else min(lo, stats.min)
+        hi = stats.max if hi is None else max(hi, stats.max)
+    return lo, hi
+
+# Filter skor per baris: (clusters, min_confidence, max_distance), None = tanpa filter. Filter diterapkan
+# sebagai mask Arrow di atas file hasil yang sama (tabel, halaman, export), tidak ada salinan per filter.
+FILTER_COLUMNS = ("cluster", "cluster_confidence", "cluster_distance")
+
+def result_filter(clusters=None, min_confidence=None, max_distance=None):
+    """Spesifikasi filter (hashable, dipakai sebagai key cache), None jika tidak ada filter aktif."""
+    if clusters is None and min_confidence is None and max_distance is None:
+        return None
+    clusters = None if clusters is None else tuple(sorted(int(c) for c in clusters))
+    return clusters, min_confidence, max_distance
+
+def result_filter_mask(data, row_filter):
+    """Mask bool Arrow untuk Table/RecordBatch `data` (wajib memuat FILTER_COLUMNS yang dipakai)."""
+    clusters, min_confidence, max_distance = row_filter
+    mask = pa.array(np.ones(data.num_rows, dtype=bool))
+    if clusters is not None:
+        mask = pc.and_(mask, pc.is_in(data.column("cluster"), pa.array(list(clusters), pa.int32())))
+    if min_confidence is not None:
+        mask = pc.and_(mask, pc.greater_equal(data.column("cluster_confidence"), min_confidence))
+    if max_distance is not None:
+        mask = pc.and_(mask, pc.less_equal(data.column("cluster_distance"), max_distance))
+    return mask
+
+def _iter_result_batches(path, columns, row_filter=None, batch_size=CHUNK_SIZE):
+    # Batch `columns` dari file hasil, hanya baris yang lolos `row_filter`
+    read = list(columns) if row_filter is None else list(dict.fromkeys(list(columns) + list(FILTER_COLUMNS)))
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size, columns=read):
+        if row_filter is not None:
+            batch = batch.filter(result_filter_mask(batch, row_filter)).select(list(columns))
+        yield batch
+
+EXPORT_FORMATS = {
+    "csv": ".csv",
+    "csv.gz": ".csv.gz",
+    "parquet": ".parquet",
+}
+
+def write_result_as(path, out_path, fmt="csv", columns=None, rename=None, na_rep="-", row_filter=None):
+    """Salin file hasil (opsional hanya baris yang lolos `row_filter`) ke `out_path` dalam format `fmt`,
+    per chunk supaya memori tetap."""
+    columns = list(columns) if columns is not None else result_columns(path)
+    rename = rename or {}
+    # Feature bulat (mis. frequency) ditulis sebagai integer, bukan 595.0
+    integers = [c for c in integer_features(path) if c in columns]
+    tmp_path = out_path + ".part"
+    try:
+        if fmt == "parquet":
+            schema = pq.ParquetFile(path).schema_arrow
+            schema = pa.schema([
+                schema.field(c).with_name(rename.get(c, c)).with_type(pa.int64()) if c in integers
+                else schema.field(c).with_name(rename.get(c, c))
+                for c in columns
+            ])
+            with pq.ParquetWriter(tmp_path, schema) as writer:
+                for batch in _iter_result_batches(path, columns, row_filter):
+                    writer.write_table(pa.Table.from_batches([batch]).rename_columns(schema.names).cast(schema))
+        else:
+            opener = gzip.open if fmt == "csv.gz" else open
+            with opener(tmp_path, "wt", encoding="utf-8", newline="") as f:
+                pd.DataFrame(columns=[rename.get(c, c) for c in columns]).to_csv(f, index=False)
+                for batch in _iter_result_batches(path, columns, row_filter):
+                    chunk = batch.to_pandas()
+                    if integers:
+                        chunk[integers] = chunk[integers].astype(np.int64)
+                    chunk.to_csv(f, index=False, header=False, na_rep=na_rep)
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        discard_result(tmp_path)
+        raise
+    return out_path
+
+def export_result(path, fmt="csv", columns=None, rename=None, row_filter=None) -> str:
+    """File download untuk dashboard, dibuat sekali per (hasil, format, kolom, filter) saat diminta."""
+    columns = list(columns) if columns is not None else result_columns(path)
+    rename = rename or {}
+    spec = json.dumps([columns, [rename.get(c, c) for c in columns], row_filter])
+    key = hashlib.blake2b(spec.encode(), digest_size=6).hexdigest()
+    out_path = f"{path}.export-{key}{EXPORT_FORMATS[fmt]}"
+    if not os.path.exists(out_path):
+        write_result_as(path, out_path, fmt, columns, rename, row_filter=row_filter)
+    return out_path
+
+def iter_result_chunks(path, columns=None, chunksize=CHUNK_SIZE):
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+        yield batch.to_pandas()
+
+
+# =========================
+# PARALLEL SCORING
+# =========================
+def default_workers() -> int:
+    return int(os.environ.get("OLIST_SCORING_WORKERS", os.cpu_count() or 1))
+
+_worker_model = None
+
+def _init_worker(model):
+    global _worker_model
+    _worker_model = model
+
+def predict_with_scores(model, X) -> tuple:
+    """(labels, distance, margin, confidence) untuk CentroidPredictor maupun pipeline sklearn."""
+    if hasattr(model, "predict_with_scores"):
+        return model.predict_with_scores(X)
+    # Pipeline sklearn: transform sudah memberi jarak ke semua centroid di ruang scaler
+    return nearest_scores(np.square(model.transform(X)))
+
+def _predict_shard(X) -> np.ndarray:
+    return np.asarray(_worker_model.predict(X), dtype=np.int32)
+
+def _score_shard(X) -> tuple:
+    return predict_with_scores(_worker_model, X)
+
+class ShardedScorer:
+    """Bungkus model dengan `predict` yang memecah input jadi shard dan menjalankannya di pool.
+
+    Label disusun ulang sesuai urutan baris. executor="thread" cocok untuk CentroidPredictor
+    (NumPy melepas GIL), "process" untuk pipeline sklearn.
+    """
+
+    def __init__(self, model, workers=None, shard_size=SHARD_SIZE, executor="thread"):
+        self.model = model
+        self.workers = workers or default_workers()
+        self.shard_size = shard_size
+        self.executor = executor
+        self._pool = None
+        if self.workers > 1:
+            if executor == "process":
+                self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(model,))
+            else:
+                self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="olist-score")
+
+    def _predict_one(self, X) -> np.ndarray:
+        return np.asarray(self.model.predict(X), dtype=np.int32)
+
+    def _score_one(self, X) -> tuple:
+        return predict_with_scores(self.model, X)
+
+    def _split(self, X) -> tuple:
+        # Konversi ke ndarray sekali di thread utama, shard cukup berupa view
+        if hasattr(self.model, "as_array"):
+            X = self.model.as_array(X)
+        starts = range(0, len(X), self.shard_size)
+        if hasattr(X, "iloc"):
+            return starts, [X.iloc[s:s + self.shard_size] for s in starts]
+        return starts, [X[s:s + self.shard_size] for s in starts]
+
+    def predict(self, X) -> np.ndarray:
+        n = len(X)
+        if self._pool is None or n <= self.shard_size:
+            return self._predict_one(X)
+        starts, shards = self._split(X)
+        fn = _predict_shard if self.executor == "process" else self._predict_one
+
+        labels = np.empty(n, dtype=np.int32)
+        for s, preds in zip(starts, self._pool.map(fn, shards)):
+            labels[s:s + len(preds)] = preds
+        return labels
+
+    def predict_with_scores(self, X) -> tuple:
+        """Seperti predict, plus distance/margin/confidence per baris (lihat nearest_scores)."""
+        if self._pool is None or len(X) <= self.shard_size:
+            return self._score_one(X)
+        _, shards = self._split(X)
+        fn = _score_shard if self.executor == "process" else self._score_one
+        parts = list(self._pool.map(fn, shards))
+        return tuple(np.concatenate(cols) for cols in zip(*parts))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# =========================
+# STREAMING PREDICTION
+# =========================
+def read_csv_header(fh) -> list:
+    pos = fh.tell()
+    columns = list(pd.read_csv(fh, nrows=0).columns)
+    fh.seek(pos)
+    return columns
+
+def _is_integral(values) -> bool:
+    # Nilai valid selalu finite; batas 2**53 = bilangan bulat yang masih tepat di float64
+    return bool((values == np.rint(values)).all() and (np.abs(values) <= 2 ** 53).all())
+
+def _write_scored(chunks, model, features, schema, out_path, position, progress, monitor=None, index=True) -> int:
+    # Nama .part unik supaya dua sesi yang menulis hasil yang sama tidak bentrok
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    fd, tmp_path = tempfile.mkstemp(suffix=".part", dir=out_dir)
+    os.close(fd)
+    writer = pq.ParquetWriter(tmp_path, schema)
+    q_schema = quarantine_schema(schema)
+    q_tmp_path, q_writer = None, None
+    report = ValidationReport()
+    schema_rules = {f: FEATURE_SCHEMA[f] for f in features if f in FEATURE_SCHEMA}
+    # Index customer_unique_id -> feature & skor, posisi baris = posisi di file hasil
+    index_columns = list(features) + list(OUTPUT_COLUMNS)
+    index = CustomerIndexWriter(out_path, index_columns) if index and ID_COLUMN in schema.names else None
+    # Feature yang sejauh ini hanya berisi bilangan bulat (lihat integer_features)
+    integral = {f: True for f in features}
+    rows = 0
+    start = time.perf_counter()
+    try:
+        for chunk in chunks:
+            chunk = chunk.drop(columns=list(OUTPUT_COLUMNS), errors="ignore")
+            # validate_frame mengganti kolom feature dengan float64; kolom aslinya disimpan untuk karantina
+            raw = {f: chunk[f] for f in schema_rules}
+            # Baris yang melanggar skema tidak di-scoring, tapi disimpan ke file karantina
+            valid, violations = validate_frame(chunk, schema_rules)
+            report.add(valid, violations)
+            if violations:
+                bad = chunk[~valid].copy()
+                for f, values in raw.items():
+                    values = values[~valid]
+                    bad[f] = values.astype(str).where(values.notna(), None)
+                bad["_row"] = np.flatnonzero(~valid) + rows
+                bad["_errors"] = violation_labels(violations, len(chunk))[~valid]
+                if q_writer is None:
+                    fd, q_tmp_path = tempfile.mkstemp(suffix=".part", dir=out_dir)
+                    os.close(fd)
+                    q_writer = pq.ParquetWriter(q_tmp_path, q_schema)
+                q_writer.write_table(pa.Table.from_pandas(bad, schema=q_schema, preserve_index=False))
+                chunk = chunk[valid]
+            if len(chunk):
+                # Label & skor dari satu perhitungan jarak yang sama
+                labels, *scores = predict_with_scores(model, chunk[features])
+                if monitor is not None:
+                    monitor.update(chunk[features].to_numpy(dtype=np.float64), labels, scores[0])
+                chunk["cluster"] = np.asarray(labels, dtype=np.int32)
+                for name, values in zip(SCORE_COLUMNS, scores):
+                    chunk[name] = values
+                for f in features:
+                    integral[f] = integral[f] and _is_integral(chunk[f].to_numpy(dtype=np.float64))
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+                if index is not None:
+                    index.add(chunk[ID_COLUMN], chunk[index_columns].to_numpy(dtype=np.float64))
+            rows += len(valid)
+            if progress is not None:
+                progress(rows, *position(rows), time.perf_counter() - start)
+        writer.add_key_value_metadata({INTEGER_FEATURES_KEY: json.dumps([f for f in features if integral[f]])})
+        writer.close()
+        if q_writer is not None:
+            q_writer.close()
+    except BaseException:
+        writer.close()
+        if q_writer is not None:
+            q_writer.close()
+        discard_result(tmp_path)
+        discard_result(q_tmp_path)
+        if index is not None:
+            index.abort()
+        raise
+
+    # Companion ditulis sebelum file hasil, jadi hasil yang sudah ada selalu punya laporannya
+    if q_tmp_path is not None:
+        os.replace(q_tmp_path, quarantine_path(out_path))
+    elif os.path.exists(quarantine_path(out_path)):
+        os.remove(quarantine_path(out_path))
+    report.save(validation_report_path(out_path))
+    if monitor is not None:
+        save_drift_report(monitor.report(), drift_report_path(out_path))
+    if index is not None:
+        index.commit()
+    elif os.path.exists(index_paths(out_path)["meta"]):
+        for p in index_paths(out_path).values():
+            os.remove(p)
+    os.replace(tmp_path, out_path)
+    return rows
+
+def _check_columns(columns, features):
+    missing = [c for c in features if c not in columns]
+    if missing:
+        raise ValueError(f"File tidak memiliki kolom: {', '.join(missing)}")
+
+def predict_csv_streaming(source, model, features, out_path, chunksize=CHUNK_SIZE, progress=None, monitor=None,
+                          index=True) -> int:
+    """Baca CSV per chunk, prediksi cluster, lalu tulis hasilnya ke file Parquet.
+
+    `source` boleh path atau file-like (mis. UploadedFile). `progress` dipanggil
+    setelah tiap chunk dengan (rows_done, bytes_done, bytes_total, elapsed).
+    `monitor` (DriftMonitor, opsional) diberi feature, label & jarak ke centroid tiap chunk yang valid.
+    `index` membangun index customer_unique_id di samping file hasil (lihat olist_index).
+    Mengembalikan jumlah baris yang diproses.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as fh:
+            return predict_csv_streaming(fh, model, features, out_path, chunksize, progress, monitor, index)
+
+    fh = source
+    fh.seek(0, os.SEEK_END)
+    bytes_total = fh.tell()
+    fh.seek(0)
+
+    columns = read_csv_header(fh)
+    _check_columns(columns, features)
+    # Tipe kolom feature dibiarkan diinfer, nilai teks ditangani validate_frame
+    dtypes = {c: str for c in columns if c not in features}
+    chunks = pd.read_csv(fh, dtype=dtypes, chunksize=chunksize)
+    return _write_scored(chunks, model, features, result_schema(columns, features), out_path,
+                         lambda rows: (fh.tell(), bytes_total), progress, monitor, index)
+
+def predict_parquet_streaming(path, model, features, out_path, chunksize=CHUNK_SIZE, progress=None, monitor=None,
+                              index=True) -> int:
+    """Sama seperti predict_csv_streaming untuk input Parquet; progress dalam satuan baris."""
+    pf = pq.ParquetFile(path)
+    columns = pf.schema_arrow.names
+    _check_columns(columns, features)
+    schema = result_schema(columns, features)
+    total = pf.metadata.num_rows
+
+    def chunks():
+        for batch in pf.iter_batches(batch_size=chunksize):
+            arrays = [
+                pc.cast(batch.column(i), pa.string()) if c not in features and c not in OUTPUT_COLUMNS else batch.column(i)
+                for i, c in enumerate(batch.schema.names)
+            ]
+            yield pa.RecordBatch.from_arrays(arrays, names=batch.schema.names).to_pandas()
+
+    return _write_scored(chunks(), model, features, schema, out_path, lambda rows: (rows, total), progress, monitor,
+                         index)
+
+def predict_file_streaming(path, model, features, out_path, chunksize=CHUNK_SIZE, progress=None, monitor=None,
+                           index=True) -> int:
+    if path.endswith(".parquet"):
+        return predict_parquet_streaming(path, model, features, out_path, chunksize, progress, monitor, index)
+    return predict_csv_streaming(path, model, features, out_path, chunksize, progress, monitor, index)
+
+
+# =========================
+# PREDICTION CACHE
+# =========================
+def content_digest(data) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+class PredictionCache:
+    """Cache hasil prediksi lintas sesi di disk, key = hash isi upload + versi model.
+
+    Dibatasi jumlah entry dan total ukuran; entry yang paling lama tidak dipakai dibuang dulu (LRU via mtime).
+    """
+
+    def __init__(self, directory=PREDICTION_CACHE_DIR, max_entries=20, max_bytes=2 * 1024 ** 3):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(upload_digest, model_version) -> str:
+        return f"{upload_digest}_{model_version}"
+
+    def path_for(self, key) -> str:
+        return os.path.join(self.directory, f"{key}.parquet")
+
+    def lookup(self, key):
+        path = self.path_for(key)
+        hit = os.path.exists(path)
+        if hit:
+            os.utime(path)
+        self._record("hits" if hit else "misses")
+        return path if hit else None
+
+    def _entries(self) -> list:
+        entries = []
+        for path in glob.glob(os.path.join(glob.escape(self.directory), "*.parquet")):
+            # Lewati companion (mis. <hasil>.quarantine.parquet), yang dihitung bersama file hasilnya
+            if "." in os.path.basename(path)[: -len(".parquet")]:
+                continue
+            try:
+                size = sum(os.path.getsize(p) for p in [path] + self._files(path)[1:])
+                entries.append((os.path.getmtime(path), size, path))
+            except FileNotFoundError:
+                continue
+        return sorted(entries)
+
+    @staticmethod
+    def _files(path) -> list:
+        # Nama file cache = hash unik tanpa titik, jadi "<hash>.*" mencakup companion "<hash>.parquet.*" dan
+        # companion gaya lama ("<hash>.arrow" dst.)
+        return [path] + sorted(set(glob.glob(glob.escape(os.path.splitext(path)[0]) + ".*")) - {path})
+
+    def evict(self, keep=None):
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if len(entries) <= self.max_entries and total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                for p in self._files(path):
+                    if os.path.exists(p):
+                        os.remove(p)
+                entries = [e for e in entries if e[2] != path]
+                total -= size
+
+    def _stats_path(self) -> str:
+        return os.path.join(self.directory, "stats.json")
+
+    def _read_counters(self) -> dict:
+        try:
+            with open(self._stats_path(), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {"hits": 0, "misses": 0}
+
+    def _record(self, counter):
+        with self._lock:
+            counters = self._read_counters()
+            counters[counter] = counters.get(counter, 0) + 1
+            tmp_path = self._stats_path() + f".{threading.get_ident()}.part"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(counters, f)
+            os.replace(tmp_path, self._stats_path())
+
+    def stats(self) -> dict:
+        entries = self._entries()
+        counters = self._read_counters()
+        return {
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+        }
+
+
+# =========================
+# CLI
+# =========================
+def peak_rss_mb() -> float:
+    import resource
+
+    # ru_maxrss dalam KB di Linux, byte di macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+def main(argv=None):
+    import argparse
+
+    from olist_model import load_model_artifact
+
+    parser = argparse.ArgumentParser(description="Scoring cluster customer Olist dari file CSV/Parquet (tanpa Streamlit)")
+    parser.add_argument("input", help="File input .csv atau .parquet dengan kolom FEATURES")
+    parser.add_argument("-o", "--output", required=True, help="File output .parquet, .csv atau .csv.gz")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="Default: env OLIST_SCORING_WORKERS / cpu_count")
+    parser.add_argument("--reference", default=DEFAULT_REFERENCE_PATH,
+                        help="Dataset referensi untuk cek drift (profil dihitung sekali per dataset & model)")
+    parser.add_argument("--no-drift", action="store_true", help="Lewati monitoring drift")
+    parser.add_argument("--no-index", action="store_true", help="Jangan bangun index customer_unique_id")
+    parser.add_argument("-q", "--quiet", action="store_true")
+    args = parser.parse_args(argv)
+
+    def report(rows, done, total, elapsed):
+        if not args.quiet:
+            rate = rows / elapsed if elapsed > 0 else 0
+            print(f"\r{rows:,} baris ({done / total:.0%}) • {rate:,.0f} baris/detik", end="", file=sys.stderr)
+
+    out_fmt = next((f for f, ext in sorted(EXPORT_FORMATS.items(), key=lambda x: -len(x[1]))
+                    if args.output.endswith(ext)), None)
+    if out_fmt is None:
+        parser.error("Output harus berakhiran .parquet, .csv atau .csv.gz")
+
+    start = time.perf_counter()
+    # Hasil selalu ditulis ke Parquet dulu; CSV dibuat dari situ secara streaming
+    scored_path = args.output if out_fmt == "parquet" else args.output + ".scored.parquet"
+    model = load_model_artifact(args.model)
+    monitor = None
+    if not args.no_drift and os.path.exists(args.reference):
+        monitor = DriftMonitor(load_reference_profile(ensure_reference_profile(args.reference, args.model, FEATURES)))
+    with ShardedScorer(model, workers=args.workers) as scorer:
+        rows = predict_file_streaming(args.input, scorer, FEATURES, scored_path, args.chunksize, report, monitor,
+                                      index=not args.no_index)
+    if scored_path != args.output:
+        try:
+            write_result_as(scored_path, args.output, out_fmt, na_rep="")
+            moves = [(companion(scored_path), companion(args.output))
+                     for companion in (quarantine_path, validation_report_path, drift_report_path)]
+            moves += zip(index_paths(scored_path).values(), index_paths(args.output).values())
+            for src, dst in moves:
+                if os.path.exists(src):
+                    os.replace(src, dst)
+        finally:
+            discard_result(scored_path)
+    elapsed = time.perf_counter() - start
+
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"{rows:,} baris -> {args.output} dalam {elapsed:.2f} s "
+          f"({rows / elapsed if elapsed > 0 else 0:,.0f} baris/detik, peak RSS {peak_rss_mb():,.0f} MB)")
+
+    validation = load_validation_report(validation_report_path(args.output))
+    if validation is not None and validation.quarantined_rows:
+        print(f"{validation.quarantined_rows:,} baris gagal validasi -> {quarantine_path(args.output)}")
+        print(validation.summary().drop(columns="sample_rows").to_string(index=False))
+
+    drift = load_drift_report(drift_report_path(args.output))
+    if drift is not None:
+        print(f"Drift vs referensi ({drift['reference_rows']:,} baris): "
+              f"{drift['ood_share']:.1%} baris out-of-distribution (referensi {drift['expected_ood_share']:.0%})")
+        for name, score in drift["scores"].items():
+            print(f"  {name:<22} PSI {score['psi']:.3f}  KS {score['ks']:.3f}  {score['level']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from olist_data import CACHE_DIR, ensure_parquet, file_fingerprint, read_columns
+from olist_model import as_centroid_predictor, load_model_artifact, model_artifact_path
+
+# =========================
+# SEGMENT PROFILES
+# =========================
+# Arti tiap cluster model K-Means (dipakai halaman Prediksi Cluster, lookup customer dan Analitik Segmen)
+SEGMENTS = {
+    0: {
+        "name": "Satisfied & Low-Spend Buyers",
+        "color": "#4facfe",
+        "characteristics": "Pelanggan dengan nilai transaksi kecil, harga produk rendah, penggunaan cicilan rendah, "
+                           "namun memiliki review score tinggi. Didominasi pembelian produk kategori kebutuhan rumah.",
+        "retention": [
+            "Loyalty points untuk pembelian berulang.",
+            "Gratis ongkir dengan minimum spend rendah-menengah.",
+            "Reminder campaign untuk repeat purchase.",
+        ],
+        "campaign": [
+            "Bundle produk kebutuhan rumah.",
+            "Cross-selling produk pelengkap rumah tangga.",
+            "Flash sale ringan untuk dorong impulse buying.",
+        ],
+    },
+    1: {
+        "name": "High-Spend At-Risk Buyers",
+        "color": "#ff4b4b",
+        "characteristics": "High spender dengan frekuensi rendah, review score rendah, dan dominasi kategori furniture "
+                           "kantor. Segmen bernilai tinggi namun berisiko churn.",
+        "retention": [
+            "Priority customer service.",
+            "Proactive follow-up setelah pembelian besar.",
+            "Service recovery untuk review rendah.",
+        ],
+        "campaign": [
+            "Penawaran eksklusif furniture kantor.",
+            "Extended warranty / free installation.",
+            "Voucher kompensasi untuk pengalaman negatif.",
+        ],
+    },
+    2: {
+        "name": "Premium Installment Buyers",
+        "color": "#faca2e",
+        "characteristics": "Pembeli produk premium dengan harga tinggi dan penggunaan cicilan tinggi. Frekuensi rendah, "
+                           "nilai transaksi besar, dan review score cukup tinggi namun bervariasi.",
+        "retention": [
+            "VIP customer program.",
+            "Dedicated customer support.",
+            "Reminder untuk upgrade/premium products.",
+        ],
+        "campaign": [
+            "Promo cicilan 0% / extended installment.",
+            "Early access produk premium & gift edition.",
+            "Personalized premium recommendations.",
+        ],
+    },
+}
+
+def segment_name(cluster) -> str:
+    return SEGMENTS.get(int(cluster), {}).get("name", f"Cluster {cluster}")
+
+
+# =========================
+# SEGMENT CUBE
+# =========================
+# Sel cube = kombinasi (cluster, state, category, payment) yang muncul di data. Per sel disimpan:
+# jumlah baris, jumlah nilai per feature, dan histogram per feature dengan cut point global yang sama
+# untuk semua sel -> sketch quantile yang mergeable (cukup dijumlahkan), jadi filter apa pun dijawab
+# dengan menjumlahkan sel yang cocok, tanpa groupby ulang atas data mentah.
+CUBE_VERSION = 1
+CUBE_DIMENSIONS = ("cluster", "customer_state", "product_category_name_english", "payment_type")
+# Jumlah bin histogram per feature; feature dengan nilai unik <= SKETCH_BINS disimpan per nilai (quantile exact)
+SKETCH_BINS = 64
+TAIL_BINS = 16
+MISSING_LABEL = "(kosong)"
+BATCH_SIZE = 500_000
+
+
+def sketch_cuts(values: np.ndarray, bins=SKETCH_BINS) -> tuple:
+    """(cuts, discrete). Bin i = [cuts[i-1], cuts[i]); feature diskrit memakai nilai uniknya sebagai cut."""
+    values = values[np.isfinite(values)]
+    uniq = np.unique(values)
+    if uniq.size <= bins:
+        return uniq, True
+    cuts = np.quantile(values, np.linspace(0.0, 1.0, bins + 1)[1:-1])
+    # Ekor kanan feature skewed (monetary, price) terlalu lebar untuk satu bin quantile -> tambah cut geometris
+    top, hi = cuts[-1], values.max()
+    if top > 0 and hi > 2 * top:
+        cuts = np.concatenate([cuts, np.geomspace(top, hi, TAIL_BINS + 1)[1:-1]])
+    return np.unique(cuts), False
+
+def histogram_quantiles(hist: np.ndarray, cuts, lo, hi, discrete, qs) -> np.ndarray:
+    """Quantile dari histogram (baris = grup, kolom = bin); interpolasi linear di dalam bin kontinu."""
+    hist = np.atleast_2d(hist).astype(np.float64)
+    total = hist.sum(axis=1, keepdims=True)
+    cum = np.cumsum(hist, axis=1)
+    edges = np.concatenate([[lo], cuts, [hi]])
+    out = np.full((hist.shape[0], len(qs)), np.nan)
+    for j, q in enumerate(qs):
+        target = q * total
+        idx = np.minimum((cum < target).sum(axis=1), hist.shape[1] - 1)
+        rows = np.arange(hist.shape[0])
+        if discrete:
+            # Bin i (i >= 1) hanya berisi nilai cuts[i-1]
+            value = np.asarray(cuts)[np.clip(idx - 1, 0, len(cuts) - 1)]
+        else:
+            inside = hist[rows, idx]
+            before = cum[rows, idx] - inside
+            with np.errstate(invalid="ignore", divide="ignore"):
+                frac = np.where(inside > 0, (target[:, 0] - before) / inside, 0.0)
+            value = edges[idx] + np.clip(frac, 0.0, 1.0) * (edges[idx + 1] - edges[idx])
+        out[:, j] = np.where(total[:, 0] > 0, value, np.nan)
+    return out
+
+
+class SegmentCube:
+    """Cube agregat read-only. `codes[d]` = kode level dimensi d per sel, `levels[d]` = label level."""
+
+    def __init__(self, dimensions, levels, codes, counts, features, sums, hists, cuts, discrete, bounds, rows):
+        self.dimensions = list(dimensions)
+        self.levels = levels
+        self.codes = codes
+        self.counts = counts
+        self.features = list(features)
+        self.sums = sums
+        # float64 supaya agregasi per grup langsung lewat BLAS
+        self.hists = [np.asarray(h, dtype=np.float64) for h in hists]
+        self.cuts = cuts
+        self.discrete = discrete
+        self.bounds = bounds
+        self.rows = rows
+
+    @property
+    def n_cells(self) -> int:
+        return int(self.counts.size)
+
+    def mask(self, filters=None) -> np.ndarray:
+        """Sel yang cocok dengan filter {dimensi: [label, ...]}; None / list kosong = semua."""
+        mask = np.ones(self.n_cells, dtype=bool)
+        for dim, values in (filters or {}).items():
+            if not values:
+                continue
+            index = {label: i for i, label in enumerate(self.levels[dim])}
+            wanted = [index[v] for v in values if v in index]
+            mask &= np.isin(self.codes[dim], wanted)
+        return mask
+
+    def group(self, by, filters=None, qs=(0.5,)) -> pd.DataFrame:
+        """Satu baris per level `by`: count, share, mean dan quantile tiap feature (dari sel yang lolos filter)."""
+        mask = self.mask(filters)
+        n_levels = len(self.levels[by])
+        # Matriks penjumlahan (level x sel): satu perkalian matriks per feature, tanpa menyalin sel yang lolos filter
+        weights = np.zeros((n_levels, self.n_cells))
+        weights[self.codes[by][mask], np.flatnonzero(mask)] = 1.0
+        counts = weights @ self.counts
+        present = counts > 0
+        weights = weights[present]
+        out = pd.DataFrame({by: np.asarray(self.levels[by], dtype=object)[present], "count": counts[present]})
+        out["count"] = out["count"].astype(np.int64)
+        out["share"] = out["count"] / max(out["count"].sum(), 1)
+        for j, f in enumerate(self.features):
+            out[f"mean_{f}"] = (weights @ self.sums[j]) / counts[present]
+            quantiles = histogram_quantiles(weights @ self.hists[j], self.cuts[j], *self.bounds[j], self.discrete[j], qs)
+            for k, q in enumerate(qs):
+                out[f"p{q * 100:g}_{f}"] = quantiles[:, k]
+        return out
+
+    def crosstab(self, rows, columns, filters=None) -> pd.DataFrame:
+        """Jumlah baris per (level `rows`, level `columns`)."""
+        mask = self.mask(filters)
+        n_cols = len(self.levels[columns])
+        flat = self.codes[rows][mask].astype(np.int64) * n_cols + self.codes[columns][mask]
+        table = np.bincount(flat, weights=self.counts[mask], minlength=len(self.levels[rows]) * n_cols)
+        table = pd.DataFrame(table.reshape(-1, n_cols).astype(np.int64),
+                             index=self.levels[rows], columns=self.levels[columns])
+        return table.loc[table.sum(axis=1) > 0, table.sum(axis=0) > 0]
+
+    # ---- persistence (npz + metadata JSON di dalamnya) ----
+    def save(self, path):
+        meta = {
+            "version": CUBE_VERSION, "dimensions": self.dimensions, "levels": self.levels,
+            "features": self.features, "discrete": self.discrete, "bounds": self.bounds, "rows": self.rows,
+        }
+        arrays = {"counts": self.counts, "meta": np.array(json.dumps(meta))}
+        for d in self.dimensions:
+            arrays[f"codes_{d}"] = self.codes[d]
+        for j in range(len(self.features)):
+            arrays[f"sums_{j}"] = self.sums[j]
+            arrays[f"hist_{j}"] = self.hists[j].astype(np.int32 if self.rows < 2 ** 31 else np.int64)
+            arrays[f"cuts_{j}"] = self.cuts[j]
+        tmp_path = f"{path}.{os.getpid()}.part"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path) -> "SegmentCube":
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            dims, n = meta["dimensions"], len(meta["features"])
+            return cls(dims, meta["levels"], {d: data[f"codes_{d}"] for d in dims}, data["counts"],
+                       meta["features"], [data[f"sums_{j}"] for j in range(n)], [data[f"hist_{j}"] for j in range(n)],
+                       [data[f"cuts_{j}"] for j in range(n)], meta["discrete"], meta["bounds"], meta["rows"])
+
+
+def _level_codes(values: pd.Series, levels) -> np.ndarray:
+    # Level terakhir = MISSING_LABEL (nilai kosong / tidak dikenal)
+    codes = pd.Categorical(values.astype(object), categories=levels[:-1]).codes.astype(np.int64)
+    codes[codes < 0] = len(levels) - 1
+    return codes
+
+def build_segment_cube(csv_path, model, features, batch_size=BATCH_SIZE) -> SegmentCube:
+    """Dua pass atas Parquet dataset: cut point per feature, lalu satu pass per batch (predict + bincount)."""
+    parquet_path = ensure_parquet(csv_path)
+    names = pq.ParquetFile(parquet_path).schema_arrow.names
+    dims = [d for d in CUBE_DIMENSIONS[1:] if d in names]
+    # Pipeline sklearn (fallback parity) tidak punya n_clusters; jumlah centroid diambil dari geometrinya
+    n_clusters = as_centroid_predictor(model).n_clusters
+
+    levels = {"cluster": [str(c) for c in range(n_clusters)]}
+    for d in dims:
+        values = read_columns(csv_path, [d])[d].dropna().astype(str).unique()
+        levels[d] = sorted(values) + [MISSING_LABEL]
+    cuts, discrete, bounds = [], [], []
+    for f in features:
+        values = read_columns(csv_path, [f])[f].to_numpy(dtype=np.float64)
+        c, is_discrete = sketch_cuts(values)
+        finite = values[np.isfinite(values)]
+        cuts.append(c)
+        discrete.append(is_discrete)
+        bounds.append([float(finite.min()), float(finite.max())] if finite.size else [0.0, 0.0])
+
+    shape = [n_clusters] + [len(levels[d]) for d in dims]
+    n_cells = int(np.prod(shape))
+    counts = np.zeros(n_cells, dtype=np.int64)
+    sums = [np.zeros(n_cells) for _ in features]
+    hists = [np.zeros(n_cells * (len(c) + 1), dtype=np.int64) for c in cuts]
+    rows = 0
+    for batch in pq.ParquetFile(parquet_path).iter_batches(batch_size=batch_size, columns=list(features) + dims):
+        df = batch.to_pandas()
+        X = df[list(features)].to_numpy(dtype=np.float64)
+        ok = np.isfinite(X).all(axis=1)
+        X = X[ok]
+        cell = np.asarray(model.predict(X), dtype=np.int64)
+        for d, size in zip(dims, shape[1:]):
+            cell = cell * size + _level_codes(df[d][ok], levels[d])
+        counts += np.bincount(cell, minlength=n_cells)
+        for j, c in enumerate(cuts):
+            sums[j] += np.bincount(cell, weights=X[:, j], minlength=n_cells)
+            nb = len(c) + 1
+            hists[j] += np.bincount(cell * nb + np.searchsorted(c, X[:, j], side="right"), minlength=n_cells * nb)
+        rows += int(ok.sum())
+
+    # Simpan hanya sel yang terisi
+    filled = np.flatnonzero(counts)
+    coords = np.unravel_index(filled, shape)
+    codes = {dim: coords[i].astype(np.int32) for i, dim in enumerate(["cluster"] + dims)}
+    return SegmentCube(
+        ["cluster"] + dims, levels, codes, counts[filled], features,
+        [s[filled] for s in sums],
+        [h.reshape(n_cells, -1)[filled] for h in hists],
+        cuts, discrete, bounds, rows,
+    )
+
+def segment_cube_path(csv_path, model_path) -> str:
+    key = f"{file_fingerprint(csv_path)}_{file_fingerprint(model_artifact_path(model_path))}"
+    return os.path.join(CACHE_DIR, f"segment_cube_v{CUBE_VERSION}_{key}.npz")
+
+def load_segment_cube(csv_path, model_path, features) -> SegmentCube:
+    """Cube untuk (dataset, model), dibangun sekali dan disimpan di CACHE_DIR."""
+    path = segment_cube_path(csv_path, model_path)
+    if os.path.exists(path):
+        cube = SegmentCube.load(path)
+        if cube.features == list(features):
+            return cube
+    cube = build_segment_cube(csv_path, load_model_artifact(model_path), features)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    cube.save(path)
+    return cube
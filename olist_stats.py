@@ -0,0 +1,229 @@
+import hashlib
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from olist_data import CACHE_DIR, read_columns
+
+CHUNK_SIZE = 200_000
+PERCENTILES = (0.25, 0.5, 0.75)
+
+
+# =========================
+# STREAMING MOMENTS
+# =========================
+class RunningMoments:
+    """count/mean/M2/min/max per kolom, bisa di-update per batch dan digabung (Chan et al.)."""
+
+    def __init__(self, n_features):
+        self.count = np.zeros(n_features, dtype=np.int64)
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+        self.min = np.full(n_features, np.inf)
+        self.max = np.full(n_features, -np.inf)
+
+    def update(self, X: np.ndarray):
+        X = np.asarray(X, dtype=np.float64)
+        valid = np.isfinite(X)
+        n = valid.sum(axis=0)
+        Xz = np.where(valid, X, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(n > 0, Xz.sum(axis=0) / n, 0.0)
+        m2 = (np.where(valid, X - mean, 0.0) ** 2).sum(axis=0)
+        self._combine(n, mean, m2,
+                      np.where(valid, X, np.inf).min(axis=0, initial=np.inf),
+                      np.where(valid, X, -np.inf).max(axis=0, initial=-np.inf))
+
+    def merge(self, other: "RunningMoments"):
+        self._combine(other.count, other.mean, other.m2, other.min, other.max)
+
+    def _combine(self, n_b, mean_b, m2_b, min_b, max_b):
+        n_a = self.count
+        n = n_a + n_b
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta = mean_b - self.mean
+            self.mean = np.where(n > 0, self.mean + delta * n_b / n, 0.0)
+            self.m2 = np.where(n > 0, self.m2 + m2_b + delta ** 2 * n_a * n_b / n, 0.0)
+        self.count = n
+        self.min = np.minimum(self.min, min_b)
+        self.max = np.maximum(self.max, max_b)
+
+    @property
+    def std(self) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > 1, np.sqrt(self.m2 / (self.count - 1)), np.nan)
+
+
+# =========================
+# QUANTILE SKETCH (KLL)
+# =========================
+class QuantileSketch:
+    """Sketch quantile KLL yang mergeable; item di level i mewakili 2**i nilai asli."""
+
+    def __init__(self, k=1024, seed=0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if items.size > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                keep = items[:0]
+                if items.size % 2:
+                    keep, items = items[-1:], items[:-1]
+                # Ambil setiap item kedua dengan offset acak, bobotnya naik 2x
+                promoted = items[self._rng.integers(2)::2]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                self.levels[level] = keep
+            level += 1
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if values.size:
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+
+    def merge(self, other: "QuantileSketch"):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for i, items in enumerate(other.levels):
+            self.levels[i] = np.concatenate([self.levels[i], items])
+        self._compress()
+
+    def quantiles(self, qs) -> np.ndarray:
+        items = np.concatenate(self.levels)
+        if items.size == 0:
+            return np.full(len(qs), np.nan)
+        weights = np.concatenate([np.full(lvl.size, 2.0 ** i) for i, lvl in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        cum = np.cumsum(weights[order])
+        idx = np.searchsorted(cum, np.asarray(qs) * cum[-1], side="left")
+        return items[order][np.clip(idx, 0, items.size - 1)]
+
+
+# =========================
+# DESCRIBE ENGINE
+# =========================
+class DescribeState:
+    """Statistik deskriptif untuk `features` yang bisa ditambah data baru secara incremental."""
+
+    def __init__(self, features):
+        self.features = list(features)
+        self.moments = RunningMoments(len(self.features))
+        self.sketches = [QuantileSketch(seed=i) for i in range(len(self.features))]
+        # Posisi byte CSV yang sudah diproses + hash seluruh prefix itu (untuk deteksi append)
+        self.columns = None
+        self.byte_offset = 0
+        self.prefix_digest = None
+        self.mtime_ns = None
+
+    def update(self, df: pd.DataFrame):
+        X = df[self.features].to_numpy(dtype=np.float64)
+        self.moments.update(X)
+        for j, sketch in enumerate(self.sketches):
+            sketch.update(X[:, j])
+
+    def merge(self, other: "DescribeState"):
+        self.moments.merge(other.moments)
+        for sketch, other_sketch in zip(self.sketches, other.sketches):
+            sketch.merge(other_sketch)
+
+    def describe(self) -> pd.DataFrame:
+        """Format sama dengan `df[features].describe().T` (quantile berupa aproksimasi sketch)."""
+        m = self.moments
+        out = pd.DataFrame({"count": m.count.astype(np.float64), "mean": m.mean, "std": m.std}, index=self.features)
+        out["min"] = np.where(m.count > 0, m.min, np.nan)
+        qs = np.array([sketch.quantiles(PERCENTILES) for sketch in self.sketches])
+        for j, p in enumerate(PERCENTILES):
+            out[f"{p:.0%}"] = qs[:, j]
+        out["max"] = np.where(m.count > 0, m.max, np.nan)
+        out.loc[m.count == 0, ["mean"]] = np.nan
+        return out
+
+
+def _hash_range(digest, path, start, stop, block=1 << 20):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = stop - start
+        while remaining > 0:
+            data = f.read(min(block, remaining))
+            if not data:
+                break
+            digest.update(data)
+            remaining -= len(data)
+    return digest
+
+def _prefix_hasher(state: DescribeState, csv_path):
+    """Hasher atas byte [0, byte_offset) jika prefix itu identik dengan yang sudah diproses, jika tidak None.
+
+    Seluruh prefix di-hash (bukan hanya ekornya): edit di tengah file tanpa mengubah ukuran prefix
+    tetap terdeteksi dan berujung recompute penuh.
+    """
+    size = os.path.getsize(csv_path)
+    if getattr(state, "prefix_digest", None) is None or state.byte_offset == 0 or size < state.byte_offset:
+        return None
+    with open(csv_path, "rb") as f:
+        f.seek(state.byte_offset - 1)
+        if f.read(1) != b"\n":
+            return None
+    digest = _hash_range(hashlib.blake2b(digest_size=16), csv_path, 0, state.byte_offset)
+    return digest if digest.hexdigest() == state.prefix_digest else None
+
+def _state_path(csv_path) -> str:
+    key = hashlib.blake2b(os.path.abspath(csv_path).encode(), digest_size=8).hexdigest()
+    return os.path.join(CACHE_DIR, f"describe_{key}.pkl")
+
+def load_describe_state(csv_path, features) -> DescribeState:
+    """State statistik untuk CSV; jika CSV hanya bertambah baris, hanya baris baru yang diproses."""
+    state_path = _state_path(csv_path)
+    stat = os.stat(csv_path)
+    state = digest = None
+    if os.path.exists(state_path):
+        with open(state_path, "rb") as f:
+            state = pickle.load(f)
+        if state.features != list(features):
+            state = None
+        elif (getattr(state, "prefix_digest", None) is not None and stat.st_size == state.byte_offset
+              and stat.st_mtime_ns == state.mtime_ns):
+            # File tidak disentuh sejak state disimpan: tidak perlu membaca ulang
+            return state
+        else:
+            digest = _prefix_hasher(state, csv_path)
+            if digest is None:
+                state = None
+
+    size = stat.st_size
+    if state is None:
+        state = DescribeState(features)
+        state.columns = list(pd.read_csv(csv_path, nrows=0).columns)
+        state.update(read_columns(csv_path, features))
+        digest = _hash_range(hashlib.blake2b(digest_size=16), csv_path, 0, size)
+    elif size > state.byte_offset:
+        with open(csv_path, "rb") as f:
+            f.seek(state.byte_offset)
+            for chunk in pd.read_csv(f, header=None, names=state.columns, usecols=state.features,
+                                     chunksize=CHUNK_SIZE):
+                state.update(chunk)
+        digest = _hash_range(digest, csv_path, state.byte_offset, size)
+
+    state.byte_offset = size
+    state.prefix_digest = digest.hexdigest()
+    state.mtime_ns = stat.st_mtime_ns
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = state_path + ".part"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(state, f)
+    os.replace(tmp_path, state_path)
+    return state
@@ -0,0 +1,222 @@
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# Store hasil scoring per proses: tiap file hasil dibuka sekali sebagai tabel Arrow read-only di atas
+# memory map (<base>.arrow, IPC tanpa kompresi, dibuat sekali dari Parquet). Sesi hanya memegang handle;
+# halaman tabel = slice/take zero-copy yang baru di-decode ke pandas untuk baris yang ditampilkan.
+# Memori naik per dataset yang berbeda, bukan per sesi: halaman mmap dibagi semua sesi (dan page cache OS).
+# Hanya file hasil dasar yang dibuka; view terfilter/terurut = indeks baris di atas tabel dasar yang sama.
+BATCH_SIZE = 200_000
+# Entry tanpa handle aktif yang tetap dibuka (LRU) supaya sesi berikutnya tidak membuka ulang
+MAX_IDLE_ENTRIES = 8
+# Indeks view (filter x sort) yang disimpan per entry (LRU), dibagi semua sesi
+MAX_VIEWS = 16
+# Penanda file turunan di samping file hasil (salinan terurut/terfilter versi lama, file export)
+DERIVED_MARKERS = (".sort-", ".filter-", ".export-")
+
+
+def arrow_path(path) -> str:
+    return path + ".arrow"
+
+def is_base_result(path) -> bool:
+    return not any(marker in os.path.basename(path) for marker in DERIVED_MARKERS)
+
+def ensure_arrow(path) -> str:
+    """Companion Arrow IPC untuk file hasil Parquet `path`, ditulis per batch (atomik) jika belum ada/usang."""
+    if not is_base_result(path):
+        raise ValueError(f"Bukan file hasil dasar: {path}")
+    out_path = arrow_path(path)
+    if os.path.exists(out_path) and os.path.getmtime(out_path) >= os.path.getmtime(path):
+        return out_path
+    pf = pq.ParquetFile(path)
+    tmp_path = f"{out_path}.{os.getpid()}.{threading.get_ident()}.part"
+    try:
+        with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, pf.schema_arrow) as writer:
+            for batch in pf.iter_batches(batch_size=BATCH_SIZE):
+                writer.write_batch(batch)
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return out_path
+
+
+class _Entry:
+    """Satu file hasil yang terbuka: tabel di atas mmap + urutan sort yang sudah dihitung (dibagi semua sesi)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.source = pa.memory_map(ensure_arrow(path), "r")
+        self.table = pa.ipc.open_file(self.source).read_all()
+        self.refs = 0
+        self._orders = {}
+        self._views = OrderedDict()
+        self._lock = threading.Lock()
+
+    def sort_indices(self, column, ascending=True) -> pa.Array:
+        key = (column, ascending)
+        with self._lock:
+            if key not in self._orders:
+                # Nilai kosong otomatis ditaruh di akhir
+                self._orders[key] = pc.sort_indices(
+                    self.table.select([column]), sort_keys=[(column, "ascending" if ascending else "descending")])
+            return self._orders[key]
+
+    def view_indices(self, row_filter=None, sort=None, ascending=True):
+        """Posisi baris view (filter lalu urutan sort) di tabel dasar; None = seluruh tabel apa adanya."""
+        if row_filter is None and sort is None:
+            return None
+        if row_filter is None:
+            return self.sort_indices(sort, ascending)
+        key = (row_filter, sort, ascending)
+        with self._lock:
+            if key in self._views:
+                self._views.move_to_end(key)
+                return self._views[key]
+        from olist_scoring import result_filter_mask
+
+        mask = result_filter_mask(self.table, row_filter)
+        if sort is None:
+            indices = pc.indices_nonzero(mask)
+        else:
+            order = self.sort_indices(sort, ascending)
+            indices = order.filter(pc.take(mask, order))
+        with self._lock:
+            self._views[key] = indices
+            while len(self._views) > MAX_VIEWS:
+                self._views.popitem(last=False)
+        return indices
+
+    def close(self):
+        self.table = None
+        self._orders.clear()
+        self._views.clear()
+        self.source.close()
+
+
+class ResultHandle:
+    """Referensi satu sesi ke file hasil di ResultStore; dilepas lewat release() atau saat handle di-GC."""
+
+    def __init__(self, store, key, entry):
+        self.path = entry.path
+        self.key = key
+        self._entry = entry
+        self._finalizer = weakref.finalize(self, store._release, key)
+
+    @property
+    def released(self) -> bool:
+        return not self._finalizer.alive
+
+    @property
+    def num_rows(self) -> int:
+        return self._entry.table.num_rows
+
+    @property
+    def columns(self) -> list:
+        return self._entry.table.column_names
+
+    def is_current(self) -> bool:
+        """False jika file hasil sudah diganti/dihapus sejak handle dibuat."""
+        return not self.released and _file_key(self.path) == self.key
+
+    def count(self, row_filter=None) -> int:
+        """Jumlah baris yang lolos `row_filter`."""
+        if row_filter is None:
+            return self.num_rows
+        return len(self._entry.view_indices(row_filter))
+
+    def rows(self, start, stop, columns=None, sort=None, ascending=True, row_filter=None):
+        """Baris [start, stop) sebagai DataFrame (opsional hanya yang lolos `row_filter`, terurut menurut `sort`);
+        hanya halaman itu yang disalin."""
+        table = self._entry.table
+        indices = self._entry.view_indices(row_filter, sort, ascending)
+        if columns is not None:
+            table = table.select(columns)
+        total = table.num_rows if indices is None else len(indices)
+        stop = min(stop, total)
+        start = min(start, stop)
+        if indices is None:
+            page = table.slice(start, stop - start)
+        else:
+            page = table.take(indices.slice(start, stop - start))
+        return page.to_pandas()
+
+    def release(self):
+        self._finalizer()
+
+
+def _file_key(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+
+class ResultStore:
+    """Entry per (path, mtime, size) dengan refcount; entry tanpa handle di-evict LRU setelah MAX_IDLE_ENTRIES."""
+
+    def __init__(self, max_idle_entries=MAX_IDLE_ENTRIES):
+        self.max_idle_entries = max_idle_entries
+        self._entries = {}
+        self._idle = OrderedDict()
+        self._lock = threading.Lock()
+        self.opens = 0
+
+    def acquire(self, path) -> ResultHandle:
+        key = _file_key(path)
+        if key is None:
+            raise FileNotFoundError(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.refs += 1
+                self._idle.pop(key, None)
+                return ResultHandle(self, key, entry)
+        # Konversi Arrow (sekali per file) di luar lock supaya sesi lain tidak ikut menunggu
+        opened = _Entry(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = opened
+                self.opens += 1
+            else:
+                opened.close()
+            entry.refs += 1
+            self._idle.pop(key, None)
+        return ResultHandle(self, key, entry)
+
+    def _release(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.refs -= 1
+            if entry.refs <= 0:
+                self._idle[key] = entry
+                self._evict_idle()
+
+    def _evict_idle(self):
+        # File yang sudah diganti/dihapus tidak akan di-acquire lagi: tutup duluan
+        for key in [k for k in self._idle if _file_key(k[0]) != k]:
+            self._entries.pop(key).close()
+            del self._idle[key]
+        while len(self._idle) > self.max_idle_entries:
+            key, entry = self._idle.popitem(last=False)
+            self._entries.pop(key).close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "handles": sum(e.refs for e in self._entries.values()),
+                "mapped_bytes": sum(e.source.size() for e in self._entries.values()),
+                "opens": self.opens,
+            }
@@ -0,0 +1,166 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Skema input per feature: batas nilai (inklusif) dan pesan jika di luar batas.
+# Dipakai oleh validasi manual (satu baris) dan validasi batch (per kolom).
+FEATURE_SCHEMA = {
+    "recency": {"min": 0, "message": "Recency tidak boleh negatif."},
+    "frequency": {"min": 1, "message": "Frequency minimal 1."},
+    "monetary": {"min": 0, "message": "Monetary tidak boleh negatif."},
+    "payment_installments": {"min": 0, "message": "Payment Installments tidak boleh negatif."},
+    "price": {"min": 0, "message": "Price tidak boleh negatif."},
+    "review_score": {"min": 1, "max": 5, "message": "Review Score harus antara 1 sampai 5."},
+}
+# Urutan rule: satu baris hanya dihitung sekali per feature, pada rule pertama yang dilanggar
+RULES = ("non_numeric", "missing", "non_finite", "out_of_range")
+RULE_LABELS = {
+    "non_numeric": "bukan angka",
+    "missing": "kosong",
+    "non_finite": "tak hingga",
+    "out_of_range": "di luar batas",
+}
+# Jumlah nomor baris contoh yang disimpan per rule di laporan (jumlah pelanggaran tetap dihitung penuh)
+MAX_SAMPLE_ROWS = 1000
+
+
+# =========================
+# SCALAR (MANUAL INPUT)
+# =========================
+def validate_values(values: dict, schema=FEATURE_SCHEMA) -> list:
+    errors = []
+    for feature, spec in schema.items():
+        value = values[feature]
+        if value < spec.get("min", -np.inf) or value > spec.get("max", np.inf):
+            errors.append(spec["message"])
+    return errors
+
+
+# =========================
+# VECTORIZED (BATCH)
+# =========================
+def coerce_numeric(df: pd.DataFrame, column) -> tuple:
+    """Ubah kolom jadi float64 di dalam `df`; kembalikan (values, mask nilai teks yang gagal dikonversi).
+
+    Kolom yang sudah float64 tidak disalin.
+    """
+    col = df[column]
+    if col.dtype == np.float64:
+        return col.to_numpy(copy=False), None
+    if pd.api.types.is_numeric_dtype(col) or pd.api.types.is_bool_dtype(col):
+        values = col.to_numpy(dtype=np.float64)
+        df[column] = values
+        return values, None
+    values = pd.to_numeric(col, errors="coerce").to_numpy(dtype=np.float64)
+    non_numeric = np.isnan(values) & col.notna().to_numpy()
+    df[column] = values
+    return values, non_numeric
+
+def validate_frame(df: pd.DataFrame, schema=FEATURE_SCHEMA) -> tuple:
+    """Validasi semua kolom `schema` di `df` sekaligus (mask NumPy per kolom).
+
+    Kolom feature dikonversi ke float64 di tempat. Mengembalikan (valid, violations):
+    `valid` mask bool per baris, `violations` dict "feature:rule" -> posisi baris (0-based, urutan df).
+    """
+    n = len(df)
+    valid = np.ones(n, dtype=bool)
+    violations = {}
+    for feature, spec in schema.items():
+        values, non_numeric = coerce_numeric(df, feature)
+        finite = np.isfinite(values)
+        if finite.all():
+            masks = {}
+        else:
+            nan = np.isnan(values)
+            if non_numeric is not None:
+                nan &= ~non_numeric
+            masks = {"non_numeric": non_numeric, "missing": nan, "non_finite": np.isinf(values)}
+        lo, hi = spec.get("min"), spec.get("max")
+        with np.errstate(invalid="ignore"):
+            out = np.zeros(n, dtype=bool)
+            if lo is not None:
+                out |= values < lo
+            if hi is not None:
+                out |= values > hi
+        masks["out_of_range"] = out & finite
+        for rule in RULES:
+            mask = masks.get(rule)
+            if mask is None or not mask.any():
+                continue
+            violations[f"{feature}:{rule}"] = np.flatnonzero(mask)
+            valid &= ~mask
+    return valid, violations
+
+def violation_labels(violations: dict, n) -> np.ndarray:
+    """Daftar rule yang dilanggar per baris, mis. "monetary:out_of_range;price:missing"."""
+    labels = np.full(n, "", dtype=object)
+    for key, rows in violations.items():
+        labels[rows] += key + ";"
+    return np.array([s[:-1] for s in labels], dtype=object)
+
+
+# =========================
+# REPORT
+# =========================
+class ValidationReport:
+    """Rekap validasi lintas chunk: jumlah pelanggaran per rule dan contoh nomor baris (global)."""
+
+    def __init__(self):
+        self.rows = 0
+        self.valid_rows = 0
+        self.counts = {}
+        self.sample_rows = {}
+
+    def add(self, valid: np.ndarray, violations: dict):
+        for key, rows in violations.items():
+            self.counts[key] = self.counts.get(key, 0) + int(rows.size)
+            sample = self.sample_rows.setdefault(key, [])
+            if len(sample) < MAX_SAMPLE_ROWS:
+                sample.extend((rows[: MAX_SAMPLE_ROWS - len(sample)] + self.rows).tolist())
+        self.rows += len(valid)
+        self.valid_rows += int(valid.sum())
+
+    @property
+    def quarantined_rows(self) -> int:
+        return self.rows - self.valid_rows
+
+    def to_dict(self) -> dict:
+        return {"rows": self.rows, "valid_rows": self.valid_rows,
+                "counts": self.counts, "sample_rows": self.sample_rows}
+
+    @classmethod
+    def from_dict(cls, payload):
+        report = cls()
+        report.rows = payload["rows"]
+        report.valid_rows = payload["valid_rows"]
+        report.counts = payload["counts"]
+        report.sample_rows = payload["sample_rows"]
+        return report
+
+    def summary(self) -> pd.DataFrame:
+        """Satu baris per (feature, rule) yang dilanggar."""
+        records = []
+        for key, count in self.counts.items():
+            feature, rule = key.split(":")
+            records.append({
+                "feature": feature,
+                "rule": RULE_LABELS.get(rule, rule),
+                "rows": count,
+                "sample_rows": ", ".join(str(r) for r in self.sample_rows.get(key, [])[:10]),
+            })
+        return pd.DataFrame(records, columns=["feature", "rule", "rows", "sample_rows"])
+
+    def save(self, path):
+        tmp_path = path + ".part"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+def load_validation_report(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return ValidationReport.from_dict(json.load(f))
+    except FileNotFoundError:
+        return None
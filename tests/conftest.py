@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# Modul olist_* ada di root repo (tanpa packaging), sama seperti benchmarks/
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+SYNTHETIC_ROWS = 20_000
+
+
+@pytest.fixture(scope="session")
+def synthetic_csv(tmp_path_factory):
+    """Dataset sintetis (format Olist_Dataset_Clustering.csv) di direktori sementara, bukan di repo."""
+    from synthetic_olist import write_synthetic_csv
+
+    return write_synthetic_csv(str(tmp_path_factory.mktemp("data") / "olist.csv"), SYNTHETIC_ROWS)
@@ -0,0 +1,66 @@
+"""Build feature inkremental (olist_features) harus sama dengan rebuild penuh, termasuk perubahan order lama."""
+import pandas as pd
+
+from olist_features import RAW_TABLES, build_features
+
+ORDERS = [
+    ("o1", "c1", "delivered", "2018-01-01 10:00:00"),
+    ("o2", "c2", "delivered", "2018-01-02 10:00:00"),
+    ("o3", "c3", "delivered", "2018-01-03 10:00:00"),
+    ("o4", "c4", "delivered", "2018-01-04 10:00:00"),
+]
+CUSTOMERS = [("c1", "u1", "sao paulo", "SP"), ("c2", "u2", "rio", "RJ"), ("c3", "u1", "campinas", "SP"),
+             ("c4", "u3", "curitiba", "PR"), ("c5", "u2", "niteroi", "RJ")]
+ITEMS = [("o1", "p1", 10.0), ("o2", "p2", 20.0), ("o3", "p1", 30.0), ("o4", "p2", 40.0)]
+PAYMENTS = [("o1", "credit_card", 1, 10.0), ("o2", "boleto", 1, 20.0), ("o3", "credit_card", 3, 30.0),
+            ("o4", "voucher", 1, 40.0)]
+REVIEWS = [("r1", "o1", 5, "2018-01-05"), ("r2", "o2", 3, "2018-01-06")]
+
+
+def write_raw(raw_dir, orders, items, payments, reviews=REVIEWS):
+    tables = {
+        "orders": pd.DataFrame(orders, columns=["order_id", "customer_id", "order_status", "order_purchase_timestamp"]),
+        "order_items": pd.DataFrame(items, columns=["order_id", "product_id", "price"]),
+        "payments": pd.DataFrame(payments, columns=["order_id", "payment_type", "payment_installments",
+                                                    "payment_value"]),
+        "reviews": pd.DataFrame(reviews, columns=["review_id", "order_id", "review_score", "review_creation_date"]),
+        "customers": pd.DataFrame(CUSTOMERS, columns=["customer_id", "customer_unique_id", "customer_city",
+                                                      "customer_state"]),
+    }
+    raw_dir.mkdir(exist_ok=True)
+    for name, df in tables.items():
+        df.to_csv(raw_dir / f"{RAW_TABLES[name]}.csv", index=False)
+    return str(raw_dir)
+
+def build(raw_dir, tmp_path, name, full=False):
+    out = str(tmp_path / f"{name}.parquet")
+    stats = build_features(raw_dir, out, str(tmp_path / "state"), full=full)
+    return pd.read_parquet(out).sort_values("customer_unique_id", ignore_index=True), stats
+
+
+def test_incremental_matches_full_after_late_rows_and_cancel(tmp_path):
+    build(write_raw(tmp_path / "raw", ORDERS, ITEMS, PAYMENTS), tmp_path, "first")
+
+    # Snapshot berikutnya: order baru o5, item & pembayaran susulan untuk o1 (order lama), o4 jadi canceled
+    orders = ORDERS[:3] + [("o4", "c4", "canceled", "2018-01-04 10:00:00"),
+                           ("o5", "c5", "delivered", "2018-01-05 10:00:00")]
+    items = ITEMS + [("o1", "p2", 50.0), ("o5", "p1", 5.0)]
+    payments = PAYMENTS + [("o1", "voucher", 6, 50.0), ("o5", "boleto", 1, 5.0)]
+    raw_dir = write_raw(tmp_path / "raw", orders, items, payments)
+
+    incremental, stats = build(raw_dir, tmp_path, "incremental")
+    full, _ = build(raw_dir, tmp_path, "full", full=True)
+
+    assert stats["dropped_orders"] == 1 and stats["recomputed_customers"] == 2
+    pd.testing.assert_frame_equal(incremental, full)
+    u1 = incremental.set_index("customer_unique_id").loc["u1"]
+    assert u1["monetary"] == 90.0 and u1["payment_installments"] == 6 and u1["price"] == 30.0
+    # u3 hanya punya o4, yang kini canceled
+    assert "u3" not in set(incremental["customer_unique_id"])
+
+def test_incremental_run_without_changes_recomputes_nothing(tmp_path):
+    raw_dir = write_raw(tmp_path / "raw", ORDERS, ITEMS, PAYMENTS)
+    first, _ = build(raw_dir, tmp_path, "first")
+    again, stats = build(raw_dir, tmp_path, "again")
+    assert stats["orders"] == 0 and stats["recomputed_customers"] == 0
+    pd.testing.assert_frame_equal(first, again)
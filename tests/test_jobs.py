@@ -0,0 +1,41 @@
+"""Deteksi job yatim di job store: hanya job yang worker/manager-nya sudah mati yang digagalkan."""
+import os
+import subprocess
+import sys
+
+from olist_jobs import JobManager, pid_alive, process_start_time, read_status, write_status
+
+
+def dead_pid() -> int:
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+def make_job(job_dir, job_id, **fields):
+    os.makedirs(os.path.join(job_dir, job_id))
+    write_status(job_id, job_dir, id=job_id, **fields)
+
+
+def test_mark_orphans_only_fails_dead_owners(tmp_path):
+    job_dir = str(tmp_path)
+    me, gone = os.getpid(), dead_pid()
+    make_job(job_dir, "live-running", state="running", pid=me, pid_start=process_start_time(me))
+    make_job(job_dir, "live-queued", state="queued", owner_pid=me, owner_start=process_start_time(me))
+    make_job(job_dir, "dead-running", state="running", pid=gone)
+    make_job(job_dir, "dead-queued", state="queued", owner_pid=gone)
+    make_job(job_dir, "legacy-queued", state="queued")
+
+    JobManager(max_workers=1, job_dir=job_dir)
+
+    states = {job_id: read_status(job_id, job_dir)["state"] for job_id in os.listdir(job_dir)}
+    assert states["live-running"] == "running"
+    assert states["live-queued"] == "queued"
+    assert states["dead-running"] == "failed"
+    assert states["dead-queued"] == "failed"
+    assert states["legacy-queued"] == "failed"
+
+def test_reused_pid_is_not_alive():
+    me = os.getpid()
+    assert pid_alive(me, process_start_time(me))
+    if process_start_time(me) is not None:
+        assert not pid_alive(me, process_start_time(me) - 1)
@@ -0,0 +1,128 @@
+"""Parity CentroidPredictor (NumPy) vs pipeline.predict (sklearn) dan fallback compile_pipeline."""
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from olist_model import (CentroidPredictor, check_parity, compile_pipeline, load_model_artifact, model_artifact_path,
+                         parity_probe, pickle_fingerprint, read_slim_source, save_slim_model)
+from olist_scoring import FEATURES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH = os.path.join(ROOT, "rfm_kmeans_pipeline.pkl")
+DATA_PATH = os.path.join(ROOT, "Olist_Dataset_Clustering.csv")
+
+
+@pytest.fixture(scope="module")
+def pipeline():
+    return joblib.load(MODEL_PATH)
+
+@pytest.fixture(scope="module")
+def predictor(pipeline):
+    return CentroidPredictor.from_pipeline(pipeline)
+
+def frame(X) -> pd.DataFrame:
+    return pd.DataFrame(np.asarray(X, dtype=np.float64), columns=FEATURES)
+
+
+def test_parity_on_probe(predictor, pipeline):
+    assert check_parity(predictor, pipeline, parity_probe(predictor, n=50_000, seed=1)) == 1.0
+
+def test_parity_on_synthetic_dataset(predictor, pipeline, synthetic_csv):
+    X = pd.read_csv(synthetic_csv, usecols=FEATURES)[FEATURES].dropna()
+    np.testing.assert_array_equal(predictor.predict(X), pipeline.predict(X))
+
+@pytest.mark.skipif(not os.path.exists(DATA_PATH), reason="dataset tidak tersedia")
+def test_parity_on_dataset(predictor, pipeline):
+    X = pd.read_csv(DATA_PATH, usecols=FEATURES)[FEATURES].dropna()
+    np.testing.assert_array_equal(predictor.predict(X), pipeline.predict(X))
+
+def test_parity_on_edge_values(predictor, pipeline):
+    rng = np.random.default_rng(0)
+    edges = [
+        np.zeros(len(FEATURES)),
+        np.full(len(FEATURES), 1e9),
+        np.full(len(FEATURES), 1e-9),
+        [0, 1, 0, 0, 0, 1],
+        [10_000, 100, 1e7, 24, 1e7, 5],
+        predictor.center,
+    ]
+    # Titik dekat batas antar-cluster (ruang fitur asli). Tepat di tengah = seri, hasilnya hanya
+    # ditentukan pembulatan, jadi digeser 1% ke tiap sisi
+    centers = predictor.centroids * predictor.scale + predictor.center
+    mids = [w * centers[i] + (1 - w) * centers[j]
+            for i in range(len(centers)) for j in range(i + 1, len(centers)) for w in (0.49, 0.51)]
+    X = frame(np.vstack([np.asarray(edges, dtype=np.float64), mids,
+                         np.abs(rng.standard_cauchy((2000, len(FEATURES)))) * 1e3]))
+    np.testing.assert_array_equal(predictor.predict(X), pipeline.predict(X))
+
+def test_float32_input(predictor, pipeline):
+    X = parity_probe(predictor, n=5000, seed=2).astype(np.float32)
+    # Input float32 diproses di dtype predictor (float64) -> sama dengan pipeline untuk nilai float32 yang sama
+    np.testing.assert_array_equal(predictor.predict(X), pipeline.predict(frame(X)))
+    assert (predictor.predict(pd.DataFrame(X, columns=FEATURES)) == pipeline.predict(frame(X))).all()
+
+def test_predict_with_scores_labels_match_predict(predictor):
+    X = parity_probe(predictor, n=5000, seed=3)
+    labels, distance, margin, confidence = predictor.predict_with_scores(X)
+    np.testing.assert_array_equal(labels, predictor.predict(X))
+    assert (distance >= 0).all() and (margin >= 0).all()
+    assert ((confidence >= 1 / predictor.n_clusters - 1e-12) & (confidence <= 1 + 1e-12)).all()
+
+
+def test_compile_pipeline_returns_predictor(pipeline):
+    assert isinstance(compile_pipeline(pipeline), CentroidPredictor)
+
+class _ShiftedPipeline:
+    """Pipeline yang labelnya berbeda dari centroid terdekat -> parity gagal."""
+
+    def __init__(self, pipeline):
+        self.steps = pipeline.steps
+        self.feature_names_in_ = pipeline.feature_names_in_
+        self._pipeline = pipeline
+
+    def predict(self, X):
+        return (self._pipeline.predict(X) + 1) % self.steps[-1][1].n_clusters
+
+class _NoCentroidsPipeline:
+    steps = [("model", object())]
+
+    def predict(self, X):
+        return np.zeros(len(X), dtype=np.int64)
+
+def test_compile_pipeline_falls_back_on_parity_mismatch(pipeline):
+    shifted = _ShiftedPipeline(pipeline)
+    assert check_parity(CentroidPredictor.from_pipeline(shifted), shifted) < 1.0
+    assert compile_pipeline(shifted) is shifted
+
+def test_compile_pipeline_falls_back_without_centroids():
+    broken = _NoCentroidsPipeline()
+    assert compile_pipeline(broken) is broken
+
+
+def test_with_dtype_keeps_source(predictor):
+    predictor.source = "abc"
+    try:
+        assert predictor.with_dtype(np.float32).source == "abc"
+    finally:
+        predictor.source = None
+
+def test_stale_slim_artifact_is_not_rewritten(predictor, tmp_path, monkeypatch):
+    import shutil
+
+    import olist_data
+
+    monkeypatch.setattr(olist_data, "CACHE_DIR", str(tmp_path / "cache"))
+    model_path = str(tmp_path / "model.pkl")
+    shutil.copy(MODEL_PATH, model_path)
+    stale = predictor.with_dtype(np.float64)
+    stale.source = "stale"
+    save_slim_model(stale, str(tmp_path / "model.npz"))
+
+    model = load_model_artifact(model_path)
+    assert model.source == pickle_fingerprint(model_path)
+    # Export di samping .pkl tetap apa adanya; salinan hasil kompilasi ada di cache dir
+    assert read_slim_source(str(tmp_path / "model.npz")) == "stale"
+    assert model_artifact_path(model_path).startswith(str(tmp_path / "cache"))